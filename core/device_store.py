@@ -0,0 +1,298 @@
+"""
+Estado en memoria de los dispositivos, único para toda la app.
+
+Cada lectura del ESP32 entra una sola vez (DeviceStore.ingest_batch): se
+encola para la BD, se normaliza a un DeviceRecord y se publica. Dashboard,
+DevicesPage y DevicesController se suscriben a sus señales en vez de
+conectarse cada uno al worker y mantener su propio dict de dispositivos.
+
+Cada dispositivo es un DeviceRecord con __slots__ (sin dict por instancia)
+y el store emite señales con solo lo que cambió: IDs agregados, IDs
+modificados con sus campos, IDs eliminados. Las vistas redibujan esas
+filas/tarjetas en vez de recorrer la lista completa en cada lectura.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from database.devices_service import get_device_service
+
+# Campo del ESP32 → campo del DeviceRecord
+MAPA_ESP32 = {
+    "T_Amb": "temp_amb",
+    "Hum": "humedad",
+    "Aceleracion": "golpe",
+    "Luz": "luz",
+    "T_Sonda": "temp_sonda",
+    "Rocio": "punto_condensacion",
+    "Bat": "battery",
+}
+
+
+class DeviceRecord:
+    """Estado en memoria de un dispositivo"""
+
+    __slots__ = (
+        "id", "name", "connections", "location", "battery", "active", "foto",
+        "temp_amb", "humedad", "golpe", "luz", "temp_sonda", "punto_condensacion",
+        "com", "baud", "last_signal_ts", "source", "synced",
+    )
+
+    # Campos editables (todo menos el ID)
+    FIELDS = __slots__[1:]
+
+    def __init__(self, dev_id: str, **campos):
+        self.id = dev_id
+        self.name = f"Dispositivo {dev_id}"
+        self.connections = ""
+        self.location = ""
+        self.battery = 100
+        self.active = True
+        self.foto = None
+        self.temp_amb = None
+        self.humedad = None
+        self.golpe = None
+        self.luz = None
+        self.temp_sonda = None
+        self.punto_condensacion = None
+        self.com = None
+        self.baud = None
+        self.last_signal_ts = None
+        self.source = "manual"
+        self.synced = True
+        self.update(campos)
+
+    def update(self, campos: dict) -> List[str]:
+        """
+        Aplica los campos conocidos y devuelve los que cambiaron de valor.
+        Acepta también las claves "_source"/"_synced" del formato dict.
+        """
+        cambios = []
+        for campo, valor in campos.items():
+            campo = campo.lstrip("_")
+            if campo not in self.FIELDS:
+                continue
+            if getattr(self, campo) != valor:
+                setattr(self, campo, valor)
+                cambios.append(campo)
+        return cambios
+
+    def as_dict(self) -> dict:
+        """Formato dict que usaban las vistas antes del registro"""
+        d = {campo: getattr(self, campo) for campo in ("id",) + self.FIELDS}
+        d["_source"] = d.pop("source")
+        d["_synced"] = d.pop("synced")
+        return d
+
+
+def campos_lectura(data: dict) -> dict:
+    """Traduce una lectura del ESP32 a campos del DeviceRecord"""
+    campos = {}
+    for k_in, k_out in MAPA_ESP32.items():
+        if k_in in data:
+            valor = data[k_in]
+            # Convertir a int si es batería
+            if k_out == "battery" and isinstance(valor, (int, float)):
+                valor = int(valor)
+            campos[k_out] = valor
+    return campos
+
+
+class DeviceStore(QObject):
+    """
+    Señales:
+        devices_added(list[str])              IDs nuevos
+        devices_changed(dict[str, list[str]]) ID → campos modificados
+        devices_removed(list[str])            IDs eliminados
+        readings(list[dict])                  lecturas del lote ya ingeridas
+        persist_error(str)                    lote perdido por el escritor de la BD
+    """
+
+    devices_added = pyqtSignal(list)
+    devices_changed = pyqtSignal(dict)
+    devices_removed = pyqtSignal(list)
+    readings = pyqtSignal(list)
+    persist_error = pyqtSignal(str)
+
+    def __init__(self, parent=None, persist: bool = True):
+        super().__init__(parent)
+        self._records: Dict[str, DeviceRecord] = {}
+        self._worker = None
+        self.persist = persist
+        self.device_service = get_device_service()
+        if persist:
+            # Se emite desde el hilo escritor; Qt la entrega en el hilo de UI
+            self.device_service.ingestion.add_error_hook(
+                lambda mensaje, filas: self.persist_error.emit(mensaje)
+            )
+
+    # ==================== INGESTA ====================
+    def attach(self, worker):
+        """Conecta el store (una sola vez) al batch_received del worker"""
+        if self._worker is worker:
+            return
+        if self._worker is not None:
+            try:
+                self._worker.batch_received.disconnect(self.ingest_batch)
+            except (TypeError, RuntimeError):
+                pass
+        self._worker = worker
+        worker.batch_received.connect(self.ingest_batch)
+
+    def ingest_batch(self, lote: list):
+        """
+        Persiste, normaliza y publica un lote del worker.
+        Emite un solo delta por lote aunque un dispositivo mande varias lecturas.
+        """
+        agregados, cambiados, validas = [], {}, []
+        now = time.time()
+
+        for data in lote:
+            dev_id = str(data.get("ID", "")).strip()
+            if not dev_id:
+                continue
+
+            # Único punto de persistencia (cola + escritor dedicado)
+            if self.persist:
+                try:
+                    self.device_service.enqueue_device_data(data)
+                except Exception as e:
+                    print(f"[ERROR BD] No se pudo encolar sensor data: {e}")
+
+            record = self._records.get(dev_id)
+            if record is not None and not record.active:
+                # Desactivado por el usuario: se persiste pero la tarjeta no
+                # se actualiza ni se reactiva sola
+                validas.append(data)
+                continue
+
+            campos = campos_lectura(data)
+            campos["last_signal_ts"] = now
+            campos["source"] = "realtime"
+            campos["synced"] = False
+            puerto = data.get("Puerto")
+
+            if record is None:
+                if not isinstance(campos.get("battery"), int):
+                    campos["battery"] = 100
+                record = DeviceRecord(dev_id, **campos)
+                self._records[dev_id] = record
+                agregados.append(dev_id)
+            else:
+                cambios = record.update(campos)
+                if cambios and dev_id not in agregados:
+                    cambiados.setdefault(dev_id, set()).update(cambios)
+
+            if puerto and record.com != puerto:
+                record.com = puerto
+                record.baud = self._baudios(puerto)
+                if dev_id not in agregados:
+                    cambiados.setdefault(dev_id, set()).update(("com", "baud"))
+
+            validas.append(data)
+
+        if agregados:
+            self.devices_added.emit(agregados)
+        if cambiados:
+            self.devices_changed.emit({i: sorted(c) for i, c in cambiados.items()})
+        if validas:
+            self.readings.emit(validas)
+
+    def ingest(self, data: dict):
+        self.ingest_batch([data])
+
+    def _baudios(self, puerto: str):
+        if self._worker is None or not hasattr(self._worker, "puertos"):
+            return None
+        return next((b for p, b, _ in self._worker.puertos() if p == puerto), None)
+
+    def restore_from_database(self):
+        """
+        Agrega los dispositivos con lecturas en la BD que aún no están en memoria
+        (última lectura de cada uno, desde device_latest).
+        """
+        try:
+            latest_data = self.device_service.get_latest_all_devices()
+        except Exception as e:
+            print(f"[ERROR] No se pudieron cargar dispositivos desde BD: {e}")
+            return
+
+        agregados = []
+        for record in latest_data:
+            dev_id = record["device_id"]
+            if dev_id in self._records:
+                continue
+            ts_ms = record.get("ts_ms")
+            self._records[dev_id] = DeviceRecord(
+                dev_id,
+                battery=int(record["bateria"]) if record.get("bateria") else 100,
+                temp_amb=record.get("temp_amb"),
+                humedad=record.get("humedad"),
+                golpe=record.get("aceleracion"),
+                luz=record.get("luz"),
+                temp_sonda=record.get("temp_sonda"),
+                punto_condensacion=record.get("punto_rocio"),
+                last_signal_ts=ts_ms / 1000 if ts_ms else None,
+                source="database",
+                synced=True
+            )
+            agregados.append(dev_id)
+
+        if agregados:
+            self.devices_added.emit(agregados)
+            print(f"[DeviceStore] Cargados {len(agregados)} dispositivos desde BD")
+
+    # ==================== CONSULTA ====================
+    def get(self, dev_id: str) -> Optional[DeviceRecord]:
+        return self._records.get(dev_id)
+
+    def __contains__(self, dev_id: str) -> bool:
+        return dev_id in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def ids(self) -> List[str]:
+        return list(self._records)
+
+    def records(self) -> List[DeviceRecord]:
+        return list(self._records.values())
+
+    # ==================== MODIFICACIÓN ====================
+    def add(self, record: DeviceRecord) -> bool:
+        """Agrega un registro nuevo; False si el ID ya existe"""
+        if record.id in self._records:
+            return False
+        self._records[record.id] = record
+        self.devices_added.emit([record.id])
+        return True
+
+    def update(self, dev_id: str, campos: dict) -> List[str]:
+        """Actualiza un dispositivo existente; emite solo si algo cambió"""
+        record = self._records.get(dev_id)
+        if record is None:
+            return []
+        cambios = record.update(campos)
+        if cambios:
+            self.devices_changed.emit({dev_id: cambios})
+        return cambios
+
+    def remove(self, dev_id: str) -> bool:
+        if self._records.pop(dev_id, None) is None:
+            return False
+        self.devices_removed.emit([dev_id])
+        return True
+
+
+# Instancia global
+_store: Optional[DeviceStore] = None
+
+def get_device_store() -> DeviceStore:
+    """Obtiene el store global (se crea con los dispositivos de la BD)"""
+    global _store
+    if _store is None:
+        _store = DeviceStore()
+        _store.restore_from_database()
+    return _store
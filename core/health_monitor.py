@@ -0,0 +1,328 @@
+"""
+Salud de la conexión de cada dispositivo ESP32.
+
+Por dispositivo se guardan solo contadores y promedios de tamaño fijo
+(memoria constante sin importar cuántas lecturas lleguen):
+    - intervalo entre llegadas (media exponencial e histograma log2 para p95)
+    - jitter (estimador de RFC 3550 sobre la diferencia de intervalos)
+    - pérdida inferida de los saltos en `seq`
+    - tiempo en línea acumulado
+
+Los cambios online → stale → offline los dispara una rueda de temporizadores
+(TimerWheel): cada dispositivo tiene como mucho una entrada programada y en
+cada tick solo se revisan las entradas de una ranura, no toda la flota.
+Los umbrales se adaptan al ritmo de cada dispositivo (múltiplos de su
+intervalo medio, con un mínimo).
+"""
+
+import math
+import time
+from typing import Dict, Hashable, List, Optional
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from core.device_store import get_device_store
+
+ONLINE = "online"
+STALE = "stale"
+OFFLINE = "offline"
+
+# Umbrales: múltiplos del intervalo medio de cada dispositivo, con mínimo (s)
+STALE_FACTOR = 3.0
+OFFLINE_FACTOR = 10.0
+STALE_MIN_S = 10.0
+OFFLINE_MIN_S = 60.0
+
+# Resolución y tamaño de la rueda de temporizadores
+TICK_S = 1.0
+WHEEL_SLOTS = 128
+
+# Peso de cada intervalo nuevo en la media exponencial
+EWMA_ALPHA = 0.1
+
+# Buckets log2 (ms) del histograma de intervalos; se reduce a la mitad al
+# llegar a HIST_MAX muestras para que pese más lo reciente
+HIST_BUCKETS = 24
+HIST_MAX = 4096
+
+
+class TimerWheel:
+    """Rueda de temporizadores con ranuras de `resolucion` segundos"""
+
+    def __init__(self, slots: int = WHEEL_SLOTS, resolucion: float = TICK_S, ahora: float = None):
+        self.resolucion = resolucion
+        self._slots: List[list] = [[] for _ in range(slots)]
+        self._tick = self._tick_de(time.monotonic() if ahora is None else ahora)
+
+    def _tick_de(self, t: float) -> int:
+        return int(t // self.resolucion)
+
+    def schedule(self, deadline: float, clave: Hashable):
+        """Programa `clave` para el primer tick en o después de deadline"""
+        tick = max(math.ceil(deadline / self.resolucion), self._tick + 1)
+        self._slots[tick % len(self._slots)].append((tick, clave))
+
+    def advance(self, ahora: float) -> List[Hashable]:
+        """Avanza hasta `ahora` y devuelve las claves vencidas"""
+        fin = self._tick_de(ahora)
+        vencidas = []
+        # Tras una pausa larga basta una vuelta completa de la rueda
+        inicio = max(self._tick + 1, fin - len(self._slots) + 1)
+        for tick in range(inicio, fin + 1):
+            slot = self._slots[tick % len(self._slots)]
+            if not slot:
+                continue
+            pendientes = []
+            for entrada in slot:
+                if entrada[0] <= fin:
+                    vencidas.append(entrada[1])
+                else:
+                    pendientes.append(entrada)
+            slot[:] = pendientes
+        self._tick = max(self._tick, fin)
+        return vencidas
+
+
+class DeviceHealth:
+    """Estadísticas de conexión de un dispositivo (tamaño fijo)"""
+
+    __slots__ = (
+        "device_id", "estado", "primera", "ultima", "ultima_wall",
+        "recibidas", "perdidas", "ultimo_seq",
+        "intervalo", "ultimo_intervalo", "jitter", "hist", "hist_total",
+        "online_desde", "uptime", "programado",
+    )
+
+    def __init__(self, device_id: str, ahora: float):
+        self.device_id = device_id
+        self.estado = OFFLINE
+        self.primera = ahora
+        self.ultima = ahora
+        self.ultima_wall = time.time()
+        self.recibidas = 0
+        self.perdidas = 0
+        self.ultimo_seq = None
+        self.intervalo = None           # media exponencial (s)
+        self.ultimo_intervalo = None
+        self.jitter = 0.0               # s
+        self.hist = [0] * HIST_BUCKETS  # intervalos en ms, bucket = bit_length
+        self.hist_total = 0
+        self.online_desde = None
+        self.uptime = 0.0
+        self.programado = False
+
+    def registrar(self, llegada: float, seq, llegada_wall: Optional[float] = None):
+        ia = llegada - self.ultima
+        # Dos lecturas con la misma marca de llegada (misma lectura del puerto)
+        # no dicen nada del ritmo: no entran al intervalo, jitter ni histograma
+        if self.recibidas and ia > 0:
+            self.intervalo = ia if self.intervalo is None else (
+                self.intervalo + EWMA_ALPHA * (ia - self.intervalo)
+            )
+            if self.ultimo_intervalo is not None:
+                self.jitter += (abs(ia - self.ultimo_intervalo) - self.jitter) / 16
+            self.ultimo_intervalo = ia
+            self._histograma(ia)
+
+        if seq is not None:
+            seq = int(seq)
+            # salto <= 0: duplicada, desordenada o reinicio del equipo; no es pérdida
+            if self.ultimo_seq is not None and seq - self.ultimo_seq > 1:
+                self.perdidas += seq - self.ultimo_seq - 1
+            self.ultimo_seq = seq
+
+        self.recibidas += 1
+        if ia >= 0:
+            self.ultima = llegada
+            self.ultima_wall = time.time() if llegada_wall is None else llegada_wall
+
+    def _histograma(self, ia: float):
+        bucket = min(HIST_BUCKETS - 1, int(ia * 1000).bit_length())
+        self.hist[bucket] += 1
+        self.hist_total += 1
+        if self.hist_total >= HIST_MAX:
+            self.hist = [c // 2 for c in self.hist]
+            self.hist_total = sum(self.hist)
+
+    def percentil_ms(self, p: float) -> Optional[float]:
+        """Cota superior (ms) del percentil p del intervalo entre llegadas"""
+        if not self.hist_total:
+            return None
+        objetivo = p * self.hist_total
+        acumulado = 0
+        for bucket, n in enumerate(self.hist):
+            acumulado += n
+            if acumulado >= objetivo:
+                return float(1 << bucket)
+        return float(1 << (HIST_BUCKETS - 1))
+
+    def stale_after(self) -> float:
+        if self.intervalo is None:
+            return STALE_MIN_S
+        return max(STALE_MIN_S, STALE_FACTOR * self.intervalo)
+
+    def offline_after(self) -> float:
+        if self.intervalo is None:
+            return OFFLINE_MIN_S
+        return max(OFFLINE_MIN_S, OFFLINE_FACTOR * self.intervalo)
+
+    def uptime_s(self, ahora: float) -> float:
+        if self.estado == ONLINE and self.online_desde is not None:
+            return self.uptime + (ahora - self.online_desde)
+        return self.uptime
+
+    def resumen(self, ahora: float) -> Dict:
+        total = self.recibidas + self.perdidas
+        observado = max(ahora - self.primera, 1e-9)
+        return {
+            "device_id": self.device_id,
+            "estado": self.estado,
+            "recibidas": self.recibidas,
+            "perdidas": self.perdidas,
+            "perdida_pct": 100.0 * self.perdidas / total if total else 0.0,
+            "intervalo_ms": None if self.intervalo is None else self.intervalo * 1000,
+            "jitter_ms": self.jitter * 1000,
+            "p95_ms": self.percentil_ms(0.95),
+            "uptime_s": self.uptime_s(ahora),
+            "disponibilidad_pct": min(100.0, 100.0 * self.uptime_s(ahora) / observado),
+            "silencio_s": ahora - self.ultima,
+            "ultima_wall": self.ultima_wall,
+        }
+
+
+class HealthMonitor(QObject):
+    """
+    Señal transiciones(list[tuple[device_id, anterior, nuevo]]), una por
+    lote o tick, solo cuando algún dispositivo cambia de estado.
+    """
+
+    transiciones = pyqtSignal(list)
+
+    def __init__(self, parent=None, tick_s: float = TICK_S):
+        super().__init__(parent)
+        self._salud: Dict[str, DeviceHealth] = {}
+        self.rueda = TimerWheel(resolucion=tick_s)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(tick_s * 1000))
+        self.timer.timeout.connect(self.tick)
+
+    # ==================== LECTURAS ====================
+    def registrar_lote(
+        self, lote: list, ahora: Optional[float] = None, ahora_wall: Optional[float] = None
+    ):
+        """
+        Args:
+            lote: lecturas del store; se usa la llegada de cada una ("Recibido",
+                reloj de pared del lector), no la del lote, que llega agrupado
+            ahora: reloj monótono actual (tests)
+            ahora_wall: reloj de pared que corresponde a `ahora` (tests)
+        """
+        ahora = time.monotonic() if ahora is None else ahora
+        desfase = ahora - (time.time() if ahora_wall is None else ahora_wall)
+        cambios = []
+        for data in lote:
+            dev_id = str(data.get("ID", "")).strip()
+            if not dev_id:
+                continue
+            recibido = data.get("Recibido")
+            if isinstance(recibido, (int, float)):
+                llegada = min(ahora, recibido + desfase)
+            else:
+                recibido, llegada = None, ahora
+
+            salud = self._salud.get(dev_id)
+            if salud is None:
+                salud = self._salud[dev_id] = DeviceHealth(dev_id, llegada)
+            salud.registrar(llegada, data.get("seq"), recibido)
+
+            if salud.estado != ONLINE:
+                cambios.append((dev_id, salud.estado, ONLINE))
+                salud.estado = ONLINE
+                salud.online_desde = llegada
+                # La entrada pendiente (si hay) es la del plazo offline, mucho
+                # más lejano: se rearma el chequeo de stale. La vieja queda en
+                # la rueda pero es inofensiva, tick() revisa el silencio real.
+                self._programar(salud, salud.ultima + salud.stale_after())
+            elif not salud.programado:
+                # Una sola entrada por dispositivo; al vencer se revisa su última llegada
+                self._programar(salud, salud.ultima + salud.stale_after())
+
+        if cambios:
+            self.transiciones.emit(cambios)
+
+    # ==================== RUEDA ====================
+    def tick(self, ahora: Optional[float] = None):
+        ahora = time.monotonic() if ahora is None else ahora
+        cambios = []
+        for dev_id in self.rueda.advance(ahora):
+            salud = self._salud.get(dev_id)
+            if salud is None:
+                continue
+            salud.programado = False
+            silencio = ahora - salud.ultima
+
+            if salud.estado == ONLINE:
+                if silencio < salud.stale_after():
+                    self._programar(salud, salud.ultima + salud.stale_after())
+                    continue
+                cambios.append((dev_id, ONLINE, STALE))
+                salud.estado = STALE
+                salud.uptime += salud.ultima - salud.online_desde
+                salud.online_desde = None
+                self._programar(salud, salud.ultima + salud.offline_after())
+            elif salud.estado == STALE:
+                if silencio < salud.offline_after():
+                    self._programar(salud, salud.ultima + salud.offline_after())
+                    continue
+                cambios.append((dev_id, STALE, OFFLINE))
+                salud.estado = OFFLINE
+
+        if cambios:
+            self.transiciones.emit(cambios)
+
+    def _programar(self, salud: DeviceHealth, deadline: float):
+        self.rueda.schedule(deadline, salud.device_id)
+        salud.programado = True
+
+    def start(self):
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    # ==================== CONSULTA ====================
+    def estado(self, device_id: str) -> Optional[str]:
+        salud = self._salud.get(device_id)
+        return salud.estado if salud else None
+
+    def salud(self, device_id: str) -> Optional[DeviceHealth]:
+        return self._salud.get(device_id)
+
+    def estadisticas(self, device_id: str) -> Optional[Dict]:
+        salud = self._salud.get(device_id)
+        return salud.resumen(time.monotonic()) if salud else None
+
+    def resumen(self) -> List[Dict]:
+        ahora = time.monotonic()
+        return [s.resumen(ahora) for s in self._salud.values()]
+
+    def quitar(self, device_ids: list):
+        # Sus entradas en la rueda (si hay) se descartan al vencer
+        for device_id in device_ids:
+            self._salud.pop(device_id, None)
+
+
+# Instancia global
+_monitor: Optional[HealthMonitor] = None
+
+def get_health_monitor() -> HealthMonitor:
+    """Monitor global, alimentado por las lecturas del DeviceStore"""
+    global _monitor
+    if _monitor is None:
+        store = get_device_store()
+        _monitor = HealthMonitor()
+        store.readings.connect(_monitor.registrar_lote)
+        store.devices_removed.connect(_monitor.quitar)
+        _monitor.start()
+    return _monitor
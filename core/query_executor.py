@@ -0,0 +1,166 @@
+"""
+Ejecución de consultas en segundo plano (QThreadPool) con cancelación.
+
+Cada pedido tiene un tipo ("historial", "stats", "export", ...); un pedido
+nuevo del mismo tipo cancela al anterior, así las respuestas viejas nunca
+llegan a la UI. Las tareas reciben un CancelToken para cortar scans largos
+entre bloques y una función `emit_partial` para ir entregando resultados.
+
+Cancelar además libera el pool: un pedido que aún no arrancó se saca de la
+cola, y a uno en curso se le interrumpe la consulta SQLite que esté
+ejecutando (conn.interrupt() sobre la conexión de su hilo).
+"""
+
+import itertools
+import threading
+from typing import Any, Callable, Dict
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from database.connection_pool import interrupt_thread
+
+
+class QueryCancelled(Exception):
+    """La tarea se detuvo porque su pedido fue cancelado"""
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread_id = None   # hilo del pool que corre la tarea
+
+    def cancel(self):
+        with self._lock:
+            self._event.set()
+            if self._thread_id is not None:
+                interrupt_thread(self._thread_id)
+
+    def _attach(self):
+        with self._lock:
+            self._thread_id = threading.get_ident()
+
+    def _detach(self):
+        # Con el lock: después de esto cancel() no toca la conexión del hilo,
+        # que ya puede estar corriendo otra tarea
+        with self._lock:
+            self._thread_id = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """Corta la tarea (QueryCancelled) si el pedido ya no interesa"""
+        if self._event.is_set():
+            raise QueryCancelled()
+
+
+class _TaskSignals(QObject):
+    partial = pyqtSignal(int, object)
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+
+
+class _QueryTask(QRunnable):
+    def __init__(self, request_id: int, token: CancelToken, fn: Callable, args, kwargs):
+        super().__init__()
+        self.request_id = request_id
+        self.token = token
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = _TaskSignals()
+
+    def _emit_partial(self, value: Any):
+        if not self.token.cancelled:
+            self.signals.partial.emit(self.request_id, value)
+
+    def run(self):
+        if self.token.cancelled:
+            return
+        self.token._attach()
+        try:
+            result = self.fn(self.token, self._emit_partial, *self.args, **self.kwargs)
+        except QueryCancelled:
+            return
+        except Exception as e:
+            # Con el pedido cancelado, el error es la consulta interrumpida
+            if not self.token.cancelled:
+                self.signals.failed.emit(self.request_id, str(e))
+            return
+        finally:
+            self.token._detach()
+        if not self.token.cancelled:
+            self.signals.finished.emit(self.request_id, result)
+
+
+class QueryExecutor(QObject):
+    """
+    Señales (en el hilo de UI):
+        partial(tipo, request_id, valor)
+        finished(tipo, request_id, resultado)
+        failed(tipo, request_id, mensaje)
+    """
+
+    partial = pyqtSignal(str, int, object)
+    finished = pyqtSignal(str, int, object)
+    failed = pyqtSignal(str, int, str)
+
+    def __init__(self, parent=None, max_threads: int = 2):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._ids = itertools.count(1)
+        self._active: Dict[str, tuple] = {}   # tipo -> (request_id, token, task)
+
+    def submit(self, kind: str, fn: Callable, *args, **kwargs) -> int:
+        """
+        Corre fn(token, emit_partial, *args, **kwargs) en el pool.
+        Cancela el pedido anterior del mismo tipo.
+
+        Returns:
+            request_id del pedido
+        """
+        self.cancel(kind)
+        request_id = next(self._ids)
+        token = CancelToken()
+        task = _QueryTask(request_id, token, fn, args, kwargs)
+        task.signals.partial.connect(lambda rid, v: self._relay(kind, rid, self.partial, v))
+        task.signals.finished.connect(lambda rid, v: self._relay(kind, rid, self.finished, v, done=True))
+        task.signals.failed.connect(lambda rid, v: self._relay(kind, rid, self.failed, v, done=True))
+
+        # La referencia a la tarea mantiene vivas sus señales hasta que termine
+        self._active[kind] = (request_id, token, task)
+        self.pool.start(task)
+        return request_id
+
+    def _relay(self, kind: str, request_id: int, signal, value, done: bool = False):
+        active = self._active.get(kind)
+        if active is None or active[0] != request_id or active[1].cancelled:
+            return   # respuesta de un pedido ya reemplazado
+        if done:
+            del self._active[kind]
+        signal.emit(kind, request_id, value)
+
+    def cancel(self, kind: str):
+        active = self._active.pop(kind, None)
+        if active is not None:
+            _, token, task = active
+            token.cancel()
+            # Si todavía espera en la cola del pool, no llega a correr
+            try:
+                self.pool.tryTake(task)
+            except RuntimeError:
+                pass   # ya terminó y Qt la liberó (autoDelete)
+
+    def cancel_all(self):
+        for kind in list(self._active):
+            self.cancel(kind)
+
+    def is_running(self, kind: str) -> bool:
+        return kind in self._active
+
+    def shutdown(self, timeout_ms: int = 3000):
+        self.cancel_all()
+        self.pool.waitForDone(timeout_ms)
@@ -0,0 +1,210 @@
+"""
+Índices de búsqueda en memoria por tipo de entidad (dispositivos, insumos,
+usuarios, vehículos, rutas, asignaciones).
+
+Cada documento se normaliza una sola vez al indexarlo (minúsculas, sin
+acentos) y sus trigramas van a un índice invertido. Una búsqueda intersecta
+las listas de los trigramas de la consulta y solo verifica esos candidatos,
+en vez de pasar str(v).lower() por cada campo de cada tarjeta en cada tecla.
+Las páginas actualizan el índice en sus altas, ediciones y bajas.
+
+Para la UI:
+    SearchFilterProxyModel  proxy de filtro (con debounce) sobre un modelo Qt
+    BusquedaDebounced       debounce + búsqueda para páginas con tarjetas/tablas
+"""
+
+import unicodedata
+from typing import Dict, Hashable, Iterable, Optional, Set
+
+from PyQt6.QtCore import QObject, QSortFilterProxyModel, QTimer, Qt, pyqtSignal
+
+# Espera tras la última tecla antes de filtrar
+DEBOUNCE_MS = 120
+
+# Largo de los n-gramas del índice invertido
+NGRAM = 3
+
+# Separa campos dentro del texto de un documento (no aparece en consultas)
+_SEP = "\x1f"
+
+
+def normalizar(texto) -> str:
+    """Minúsculas y sin acentos/diacríticos ("Biológico" → "biologico")"""
+    if texto is None:
+        return ""
+    texto = unicodedata.normalize("NFKD", str(texto))
+    return "".join(c for c in texto if not unicodedata.combining(c)).casefold()
+
+
+def _ngramas(texto: str) -> Set[str]:
+    return {texto[i:i + NGRAM] for i in range(len(texto) - NGRAM + 1)}
+
+
+class SearchIndex:
+    """
+    Índice de subcadenas: un documento coincide si cada término de la
+    consulta aparece (sin acentos ni mayúsculas) en alguno de sus campos.
+    """
+
+    def __init__(self):
+        self._textos: Dict[Hashable, str] = {}
+        self._postings: Dict[str, Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._textos)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._textos
+
+    # ==================== ACTUALIZACIÓN ====================
+    def add(self, doc_id: Hashable, campos: Iterable):
+        """Indexa (o reindexa) un documento con los valores de sus campos"""
+        texto = _SEP.join(normalizar(v) for v in campos if v is not None and v != "")
+        anterior = self._textos.get(doc_id)
+        if anterior == texto:
+            return
+        if anterior is not None:
+            self._quitar_postings(doc_id, anterior)
+
+        self._textos[doc_id] = texto
+        for gram in _ngramas(texto):
+            self._postings.setdefault(gram, set()).add(doc_id)
+
+    update = add
+
+    def remove(self, doc_id: Hashable):
+        texto = self._textos.pop(doc_id, None)
+        if texto is not None:
+            self._quitar_postings(doc_id, texto)
+
+    def _quitar_postings(self, doc_id: Hashable, texto: str):
+        for gram in _ngramas(texto):
+            docs = self._postings.get(gram)
+            if docs is not None:
+                docs.discard(doc_id)
+                if not docs:
+                    del self._postings[gram]
+
+    def rebuild(self, docs: Iterable):
+        """Reemplaza todo el contenido con pares (doc_id, campos)"""
+        self.clear()
+        for doc_id, campos in docs:
+            self.add(doc_id, campos)
+
+    def clear(self):
+        self._textos.clear()
+        self._postings.clear()
+
+    # ==================== BÚSQUEDA ====================
+    def search(self, consulta: str) -> Optional[Set[Hashable]]:
+        """
+        IDs que coinciden con la consulta.
+
+        Returns:
+            None si la consulta está vacía (no filtra nada)
+        """
+        terminos = normalizar(consulta).split()
+        if not terminos:
+            return None
+
+        # Términos de 1-2 letras no tienen trigramas: recorrido de los textos
+        # ya normalizados (sin str()/lower() por campo)
+        grams = set()
+        for termino in terminos:
+            grams |= _ngramas(termino)
+        if not grams:
+            docs = self._textos.items()
+            for termino in terminos:
+                docs = [(doc_id, texto) for doc_id, texto in docs if termino in texto]
+            return {doc_id for doc_id, _ in docs}
+
+        # Candidatos: intersección de trigramas, empezando por la lista más corta
+        listas = sorted((self._postings.get(g, ()) for g in grams), key=len)
+        if not listas[0]:
+            return set()
+        candidatos = set(listas[0])
+        for docs in listas[1:]:
+            candidatos &= docs
+            if not candidatos:
+                return candidatos
+
+        textos = self._textos
+        return {
+            doc_id for doc_id in candidatos
+            if all(t in textos[doc_id] for t in terminos)
+        }
+
+
+# Índices globales por tipo de entidad
+_indices: Dict[str, SearchIndex] = {}
+
+def get_search_index(tipo: str) -> SearchIndex:
+    """Obtiene el índice compartido de un tipo de entidad ("insumos", "usuarios", ...)"""
+    index = _indices.get(tipo)
+    if index is None:
+        index = _indices[tipo] = SearchIndex()
+    return index
+
+
+class BusquedaDebounced(QObject):
+    """
+    Búsqueda con debounce para vistas de tarjetas o tablas de widgets.
+    Emite resultados(set | None) una vez que el texto deja de cambiar.
+    """
+
+    resultados = pyqtSignal(object)
+
+    def __init__(self, index: SearchIndex, parent=None, delay_ms: int = DEBOUNCE_MS):
+        super().__init__(parent)
+        self.index = index
+        self.texto = ""
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self.buscar)
+
+    def set_texto(self, texto: str):
+        self.texto = texto
+        self._timer.start()
+
+    def buscar(self):
+        self._timer.stop()
+        self.resultados.emit(self.index.search(self.texto))
+
+
+class SearchFilterProxyModel(QSortFilterProxyModel):
+    """
+    Proxy que filtra filas por el SearchIndex con debounce.
+    El ID de cada fila se lee del rol `id_role` de la columna `id_column`.
+    """
+
+    def __init__(self, index: SearchIndex, parent=None, id_column: int = 0,
+                 id_role=Qt.ItemDataRole.UserRole, delay_ms: int = DEBOUNCE_MS):
+        super().__init__(parent)
+        self.index = index
+        self.id_column = id_column
+        self.id_role = id_role
+        self._coincidencias: Optional[Set[Hashable]] = None
+        # Filas nuevas/editadas pasan por filterAcceptsRow con el resultado vigente
+        self.setDynamicSortFilter(False)
+
+        self._busqueda = BusquedaDebounced(index, self, delay_ms)
+        self._busqueda.resultados.connect(self._aplicar)
+
+    def set_query(self, texto: str):
+        self._busqueda.set_texto(texto)
+
+    def refresh(self):
+        """Repite la búsqueda vigente (tras cambios en el índice)"""
+        if self._busqueda.texto.strip():
+            self._busqueda.buscar()
+
+    def _aplicar(self, coincidencias):
+        self._coincidencias = coincidencias
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._coincidencias is None:
+            return True
+        doc_id = self.sourceModel().index(source_row, self.id_column, source_parent).data(self.id_role)
+        return doc_id in self._coincidencias
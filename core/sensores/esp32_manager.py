@@ -0,0 +1,212 @@
+import heapq
+import threading
+import time
+from collections import deque
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from core.sensores.esp32_serial import ESP32Serial
+
+# Cada cuánto el hilo de UI recoge y publica lo acumulado por todos los puertos
+INTERVALO_ENTREGA_MS = 50
+
+# Cada cuánto se publican métricas agregadas de los lectores
+INTERVALO_ESTADISTICAS = 1.0
+
+# Backoff de reconexión por puerto (segundos)
+BACKOFF_INICIAL = 1.0
+BACKOFF_MAXIMO = 30.0
+
+
+class LectorPuerto(threading.Thread):
+    """
+    Hilo de lectura de un puerto serie.
+    Cada puerto reconecta con su propio backoff sin afectar a los demás.
+    """
+
+    def __init__(self, puerto: str, baudios: int, entregar, avisar, fallar, anterior=None):
+        super().__init__(name=f"esp32-{puerto}", daemon=True)
+        self.puerto = puerto
+        self.baudios = baudios
+        self.serial = ESP32Serial()
+        self._entregar = entregar      # entregar(puerto, lote)
+        self._avisar = avisar          # avisar(mensaje)
+        self._fallar = fallar          # fallar(mensaje), una vez por caída
+        self._anterior = anterior      # lector previo del mismo puerto (aún cerrando)
+        self._detener = threading.Event()
+        self.ultimas_estadisticas: dict = {}
+
+    @property
+    def conectado(self) -> bool:
+        return self.serial.conectado
+
+    def run(self):
+        # El lector anterior libera el puerto en su propio hilo; se espera aquí, no en la UI
+        if self._anterior is not None:
+            self._anterior.join()
+            self._anterior = None
+
+        espera = BACKOFF_INICIAL
+        ultimo_stats = time.monotonic()
+        error_reportado = False
+
+        while not self._detener.is_set():
+            if not self.serial.conectado:
+                self._avisar(f"Reconectando ESP32 en {self.puerto}...")
+                if self.serial.conectar(self.puerto, self.baudios):
+                    espera = BACKOFF_INICIAL
+                    error_reportado = False
+                    self._avisar(f"ESP32 conectado en {self.puerto}")
+                else:
+                    if not error_reportado and not self._detener.is_set():
+                        error_reportado = True
+                        self._fallar(f"No se pudo conectar al ESP32 en {self.puerto}")
+                    # wait() en lugar de sleep() para poder detener al instante
+                    self._detener.wait(espera)
+                    espera = min(BACKOFF_MAXIMO, espera * 2)
+                    continue
+
+            lote = self.serial.leer_lote()
+            if lote:
+                recibido = time.time()
+                for lectura in lote:
+                    lectura["Puerto"] = self.puerto
+                    lectura["Recibido"] = recibido
+                self._entregar(self.puerto, lote)
+
+            ahora = time.monotonic()
+            if ahora - ultimo_stats >= INTERVALO_ESTADISTICAS:
+                ultimo_stats = ahora
+                self.ultimas_estadisticas = self.serial.estadisticas()
+
+        self.serial.cerrar()
+
+    def detener(self):
+        self._detener.set()
+
+
+class ESP32AcquisitionManager(QObject):
+    """
+    Adquisición concurrente de N gateways ESP32 (un hilo por puerto).
+
+    Los hilos solo acumulan lecturas; un QTimer en el hilo de UI las recoge,
+    las mezcla por orden de llegada y emite UN lote por tick, así el trabajo
+    del hilo de UI no crece con el número de puertos.
+
+    Señales: batch_received(list) con el lote mezclado de todos los puertos,
+    data_received(dict) por lectura (solo si hay receptores), estadisticas,
+    estado (avisos de conexión) y error (un puerto no conecta).
+    """
+    data_received = pyqtSignal(dict)
+    batch_received = pyqtSignal(list)
+    estadisticas = pyqtSignal(dict)    # {puerto: métricas del lector}
+    error = pyqtSignal(str)
+    estado = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._lectores: dict[str, LectorPuerto] = {}
+        self._pendientes: dict[str, deque] = {}
+        self._avisos: deque = deque(maxlen=100)
+        self._errores: deque = deque(maxlen=100)
+        self._lock = threading.Lock()
+        self._ultimo_stats = time.monotonic()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(INTERVALO_ENTREGA_MS)
+        self._timer.timeout.connect(self._entregar_pendientes)
+
+    # ==========================
+    # PUERTOS
+    # ==========================
+    def agregar_puerto(self, puerto: str, baudios: int):
+        """Empieza a leer un puerto (si ya existía, lo reconecta con los nuevos baudios)"""
+        anterior = self.quitar_puerto(puerto)
+
+        lector = LectorPuerto(
+            puerto, baudios, self._acumular, self._avisos.append, self._errores.append,
+            anterior=anterior
+        )
+        with self._lock:
+            self._lectores[puerto] = lector
+            self._pendientes.setdefault(puerto, deque())
+        lector.start()
+        self.start()
+
+    def quitar_puerto(self, puerto: str):
+        """
+        Detiene la lectura de un puerto sin bloquear la UI: el hilo termina
+        y cierra el puerto por su cuenta.
+
+        Returns:
+            El lector detenido (o None), por si hay que esperar a que libere el puerto
+        """
+        with self._lock:
+            lector = self._lectores.pop(puerto, None)
+        if lector:
+            lector.detener()
+        return lector
+
+    def puertos(self) -> list[tuple[str, int, bool]]:
+        """[(puerto, baudios, conectado)]"""
+        return [(l.puerto, l.baudios, l.conectado) for l in self._lectores.values()]
+
+    # ==========================
+    # CICLO DE VIDA
+    # ==========================
+    def start(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def isRunning(self) -> bool:
+        return self._timer.isActive() or bool(self._lectores)
+
+    def stop(self):
+        for puerto in list(self._lectores):
+            self.quitar_puerto(puerto)
+        self._timer.stop()
+        self._entregar_pendientes()
+
+    # ==========================
+    # HILOS LECTORES → UI
+    # ==========================
+    def _acumular(self, puerto: str, lote: list):
+        # Llamado desde el hilo del puerto: solo encola
+        with self._lock:
+            cola = self._pendientes.get(puerto)
+            if cola is not None:
+                cola.append(lote)
+
+    def _entregar_pendientes(self):
+        with self._lock:
+            por_puerto = []
+            for cola in self._pendientes.values():
+                if cola:
+                    lecturas = []
+                    while cola:
+                        lecturas.extend(cola.popleft())
+                    por_puerto.append(lecturas)
+
+        while self._avisos:
+            self.estado.emit(self._avisos.popleft())
+        while self._errores:
+            self.error.emit(self._errores.popleft())
+
+        if por_puerto:
+            # Cada puerto ya viene ordenado; basta una mezcla k-way
+            if len(por_puerto) == 1:
+                lote = por_puerto[0]
+            else:
+                lote = list(heapq.merge(*por_puerto, key=lambda d: d["Recibido"]))
+
+            self.batch_received.emit(lote)
+            if self.receivers(self.data_received) > 0:
+                for lectura in lote:
+                    self.data_received.emit(lectura)
+
+        ahora = time.monotonic()
+        if ahora - self._ultimo_stats >= INTERVALO_ESTADISTICAS and self._lectores:
+            self._ultimo_stats = ahora
+            self.estadisticas.emit({
+                l.puerto: l.ultimas_estadisticas for l in self._lectores.values()
+            })
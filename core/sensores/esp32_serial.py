@@ -1,12 +1,20 @@
 import serial
-import json
 import time
 
+from core.sensores.tramas import ExtractorTramas
+
+# Espera máxima de read() cuando no hay bytes pendientes.
+# Corta para no añadir latencia; no hay sleep fijo entre lecturas.
+TIMEOUT_LECTURA = 0.05
+
 
 class ESP32Serial:
     def __init__(self):
         self.ser: serial.Serial | None = None
         self.conectado = False
+        self.extractor = ExtractorTramas()
+        self._stats_t0 = time.monotonic()
+        self._stats_lineas = 0
 
     def conectar(self, puerto: str, baudios: int) -> bool:
         self.cerrar()
@@ -16,10 +24,11 @@ class ESP32Serial:
             self.ser = serial.Serial(
                 port=puerto,
                 baudrate=baudios,
-                timeout=2,
+                timeout=TIMEOUT_LECTURA,
                 write_timeout=2
             )
             time.sleep(2.5)  # Esperar a que ESP32 esté listo
+            self.extractor.reiniciar()
             self.conectado = True
             print(f"[ESP32] Conectado a {puerto}")
             return True
@@ -41,26 +50,33 @@ class ESP32Serial:
             return False
 
    
-    def leer(self) -> dict | None:
+    def leer_lote(self) -> list[dict]:
+        """
+        Vacía todo lo que haya en in_waiting y devuelve las lecturas completas.
+        Si no hay nada pendiente, espera como máximo TIMEOUT_LECTURA.
+        """
         if not self.conectado or not self.ser or not self.ser.is_open:
-            return None
+            return []
 
         try:
-            linea = self.ser.readline()
-            if not linea:
-                return None
+            pendientes = self.ser.in_waiting
+            chunk = self.ser.read(pendientes or 1)
+            if not chunk:
+                return []
 
-            return json.loads(linea.decode(errors="ignore").strip())
+            # Lo que llegó mientras se bloqueaba en read(1)
+            pendientes = self.ser.in_waiting
+            if pendientes:
+                chunk += self.ser.read(pendientes)
 
-        except (json.JSONDecodeError, UnicodeDecodeError):
-            return None
+            return self.extractor.alimentar(chunk)
 
         except serial.SerialException as e:
             # Error de conexión real (puerto desconectado, etc)
             print(f"[ESP32] Desconectado ({e})")
             self.conectado = False
             self.cerrar()
-            return None
+            return []
         
         except Exception as e:
             # Errores críticos del puerto (ClearCommError, PermissionError, etc)
@@ -72,9 +88,28 @@ class ESP32Serial:
             else:
                 # Otros errores transitorios - no marcar como desconectado
                 print(f"[ESP32] Error temporal (ignorado): {e}")
-            return None
+            return []
+
+    def estadisticas(self) -> dict:
+        """
+        Métricas del lector desde la última llamada:
+        tramas/s (JSON + binarias), fallos de parseo acumulados y máximo del buffer.
+        """
+        ahora = time.monotonic()
+        ext = self.extractor
+        dt = ahora - self._stats_t0
+        tasa = (ext.tramas - self._stats_lineas) / dt if dt > 0 else 0.0
+        self._stats_t0 = ahora
+        self._stats_lineas = ext.tramas
+        return {
+            "puerto": self.ser.port if self.ser else None,
+            "lineas_s": round(tasa, 1),
+            "lineas": ext.lineas,
+            "binarias": ext.binarias,
+            "fallos": ext.fallos,
+            "max_buffer": ext.max_buffer,
+        }
 
-   
     def cerrar(self):
         try:
             if self.ser:
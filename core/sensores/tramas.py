@@ -0,0 +1,234 @@
+import binascii
+import json
+import math
+import struct
+
+# Tamaño máximo de una trama; si el buffer crece más sin separador
+# se asume basura en la línea y se descarta
+MAX_TRAMA = 4096
+
+# ==========================
+# TRAMA BINARIA (opcional)
+# ==========================
+# | A5 5A | len u8 | payload (len bytes) | crc16 u16 LE |
+# crc16 = CRC-CCITT (binascii.crc_hqx, semilla 0xFFFF) sobre len + payload.
+#
+# Payload v1, little-endian: 20 bytes (25 con cabecera y CRC, frente a ~100 de una línea JSON)
+#   version u8 | id u16 | seq u32 | ts i16 | ta i16 | h u16 | lz u16 | a i16 | bat u16 | flags u8
+#   ts/ta/h/a en centésimas, bat en mV, lz en lux.
+#   Valor ausente: -32768 (i16) / 65535 (u16). flags: bit0 = batería "E", bit1 = alarma.
+SYNC = b"\xa5\x5a"
+_SYNC0 = SYNC[0]
+_SYNC1 = SYNC[1]
+VERSION_BINARIA = 1
+PAYLOAD_V1 = struct.Struct("<BHIhhHHhHB")
+_CABECERA = 3   # sync + len
+_CRC = 2
+_NA_I16 = -32768
+_NA_U16 = 0xFFFF
+
+
+# Calcula punto de rocío, None si falta t o h
+def roc(t, h):
+    if t is None or h is None:
+        return None
+
+    if h <= 0:
+        return None
+
+    a = 17.27
+    b = 237.7
+
+    g = math.log(h / 100.0) + (a * t) / (b + t)
+    return (b * g) / (a - g)
+
+
+def _num(v):
+    try:
+        return float(v)
+    except Exception:
+        return None
+
+
+def normalizar(d: dict) -> dict:
+    """Convierte una trama JSON del ESP32 al formato interno de lectura"""
+    ts = _num(d.get("ts"))
+    h = _num(d.get("h"))
+    return {
+        "ID": str(d.get("id")).strip(),
+        "T_Sonda": ts,
+        "T_Amb": _num(d.get("ta")),
+        "Hum": h,
+        "Luz": _num(d.get("lz")),
+        "seq": _num(d.get("seq")),
+        "Aceleracion": _num(d.get("a")),
+        "Bat": _num(d.get("bat")),
+        "Activo": d.get("bat") == "E",
+        "Alarma": d.get("a", "N"),
+        "Rocio": roc(ts, h)
+    }
+
+
+def _escala(v, factor, ausente):
+    return None if v == ausente else v / factor
+
+
+def decodificar_binaria(datos, offset: int = 0) -> dict | None:
+    """
+    Decodifica un payload v1 que empieza en datos[offset] directamente al
+    formato interno (sin copiar: struct lee del buffer original).
+    """
+    if len(datos) - offset < PAYLOAD_V1.size or datos[offset] != VERSION_BINARIA:
+        return None
+
+    _, dev, seq, ts, ta, h, lz, a, bat, flags = PAYLOAD_V1.unpack_from(datos, offset)
+    t_sonda = _escala(ts, 100.0, _NA_I16)
+    hum = _escala(h, 100.0, _NA_U16)
+    return {
+        "ID": str(dev),
+        "T_Sonda": t_sonda,
+        "T_Amb": _escala(ta, 100.0, _NA_I16),
+        "Hum": hum,
+        "Luz": None if lz == _NA_U16 else float(lz),
+        "seq": float(seq),
+        "Aceleracion": _escala(a, 100.0, _NA_I16),
+        "Bat": _escala(bat, 1000.0, _NA_U16),
+        "Activo": bool(flags & 0x01),
+        "Alarma": "A" if flags & 0x02 else "N",
+        "Rocio": roc(t_sonda, hum)
+    }
+
+
+def _crudo(v, factor, ausente, minimo, maximo):
+    if v is None:
+        return ausente
+    return max(minimo, min(maximo, int(round(v * factor))))
+
+
+def codificar_binaria(lectura: dict) -> bytes:
+    """
+    Codifica una lectura (formato interno) como trama binaria v1.
+    Referencia para el firmware y para pruebas con simuladores.
+    """
+    flags = (0x01 if lectura.get("Activo") else 0) | (0x02 if lectura.get("Alarma") not in (None, "N") else 0)
+    payload = PAYLOAD_V1.pack(
+        VERSION_BINARIA,
+        int(lectura["ID"]) & 0xFFFF,
+        int(lectura.get("seq") or 0) & 0xFFFFFFFF,
+        _crudo(lectura.get("T_Sonda"), 100, _NA_I16, -32767, 32767),
+        _crudo(lectura.get("T_Amb"), 100, _NA_I16, -32767, 32767),
+        _crudo(lectura.get("Hum"), 100, _NA_U16, 0, 65534),
+        _crudo(lectura.get("Luz"), 1, _NA_U16, 0, 65534),
+        _crudo(lectura.get("Aceleracion"), 100, _NA_I16, -32767, 32767),
+        _crudo(lectura.get("Bat"), 1000, _NA_U16, 0, 65534),
+        flags
+    )
+    cuerpo = bytes([len(payload)]) + payload
+    return SYNC + cuerpo + struct.pack("<H", binascii.crc_hqx(cuerpo, 0xFFFF))
+
+
+class ExtractorTramas:
+    """
+    Separa tramas de forma incremental sobre un bytearray reutilizable.
+
+    alimentar(chunk) agrega bytes y devuelve todas las lecturas completas
+    ya normalizadas; lo incompleto queda en el buffer para la próxima vez.
+    Detecta el formato por trama: las binarias empiezan con SYNC y las
+    JSON son líneas ASCII, así que ambos tipos de dispositivo conviven.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self.lineas = 0
+        self.binarias = 0
+        self.fallos = 0
+        self.max_buffer = 0
+
+    @property
+    def tramas(self) -> int:
+        return self.lineas + self.binarias
+
+    def alimentar(self, chunk: bytes) -> list[dict]:
+        buf = self._buf
+        buf += chunk
+        if len(buf) > self.max_buffer:
+            self.max_buffer = len(buf)
+
+        lecturas = []
+        inicio = 0
+        total = len(buf)
+
+        # La vista debe liberarse antes de recortar el bytearray
+        with memoryview(buf) as mv:
+            while inicio < total:
+                if buf[inicio] == _SYNC0:
+                    if total - inicio < _CABECERA:
+                        break
+                    if buf[inicio + 1] != _SYNC1:
+                        inicio += 1
+                        continue
+
+                    fin = inicio + _CABECERA + buf[inicio + 2] + _CRC
+                    if fin > total:
+                        break
+
+                    crc = buf[fin - 2] | (buf[fin - 1] << 8)
+                    if binascii.crc_hqx(mv[inicio + 2:fin - _CRC], 0xFFFF) != crc:
+                        # Sync falso o trama corrupta: resincronizar un byte después
+                        self.fallos += 1
+                        inicio += 1
+                        continue
+
+                    lectura = None
+                    if buf[inicio + 2] == PAYLOAD_V1.size:
+                        lectura = decodificar_binaria(buf, inicio + _CABECERA)
+                    inicio = fin
+                    self.binarias += 1
+                    if lectura is None:
+                        self.fallos += 1
+                    else:
+                        lecturas.append(lectura)
+                    continue
+
+                fin = buf.find(b"\n", inicio)
+                # Solo dentro de la línea actual: sin cota, un buffer de puro JSON
+                # se recorrería hasta el final en cada línea (O(n²) por lote)
+                sync = buf.find(SYNC, inicio, total if fin == -1 else fin)
+                if sync != -1 and (fin == -1 or sync < fin):
+                    # Basura sin salto de línea antes de una trama binaria
+                    self.fallos += 1
+                    inicio = sync
+                    continue
+                if fin == -1:
+                    break
+
+                linea = bytes(mv[inicio:fin]).strip()
+                inicio = fin + 1
+                if not linea:
+                    continue
+
+                self.lineas += 1
+                try:
+                    d = json.loads(linea)
+                except (ValueError, UnicodeDecodeError):
+                    self.fallos += 1
+                    continue
+
+                if isinstance(d, dict):
+                    lectura = normalizar(d)
+                    if lectura["ID"] and lectura["ID"] != "None":
+                        lecturas.append(lectura)
+                        continue
+                self.fallos += 1
+
+        # Un solo recorte por llamada (no por trama)
+        if inicio:
+            del buf[:inicio]
+        if len(buf) > MAX_TRAMA:
+            self.fallos += 1
+            buf.clear()
+
+        return lecturas
+
+    def reiniciar(self):
+        self._buf.clear()
@@ -1,7 +1,7 @@
-import sqlite3
 from pathlib import Path
 from datetime import datetime
 
+from database.connection_pool import get_connection
 from database.vehiculos_db import set_estado_vehiculo
 
 DB_PATH = Path("data/asignaciones.db")
@@ -11,10 +11,8 @@ ESTADOS_VALIDOS = ("Activa", "Finalizada")
 
 # ======================================================
 def get_conn():
-    DB_PATH.parent.mkdir(exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    # Conexión persistente del hilo (WAL); `with` confirma sin cerrarla
+    return get_connection(DB_PATH)
 
 
 # ======================================================
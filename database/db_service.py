@@ -3,32 +3,39 @@ Servicio centralizado de base de datos para toda la aplicación.
 Proporciona acceso uniforme a todas las funcionalidades de BD.
 """
 
-import sqlite3
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
+from database.connection_pool import get_pool
+
 class DatabaseService:
     """Gestor centralizado de conexiones y operaciones de base de datos"""
     
     def __init__(self, db_path: str = "data/device_data.db"):
         self.db_path = Path(db_path)
-        self.db_path.parent.mkdir(exist_ok=True)
+        self.pool = get_pool(self.db_path)
     
     @contextmanager
     def get_connection(self):
-        """Context manager para conexiones a la BD (sin auto-commit)"""
-        conn = sqlite3.connect(str(self.db_path))
-        conn.row_factory = sqlite3.Row
+        """
+        Context manager para conexiones a la BD (sin auto-commit).
+        La conexión es la persistente del hilo actual: no se cierra al salir,
+        pero lo que no se haya confirmado con commit() se revierte.
+        """
+        conn = self.pool.connection()
         try:
             yield conn
         except Exception as e:
             conn.rollback()
-            print(f"[DB ERROR] {str(e)}")
+            # "interrupted": consulta cortada a propósito (pedido cancelado)
+            if str(e) != "interrupted":
+                print(f"[DB ERROR] {str(e)}")
             raise
         finally:
-            conn.close()
+            if conn.in_transaction:
+                conn.rollback()
     
     def execute_query(self, query: str, params = ()) -> List[Dict]:
         """Ejecuta una consulta SELECT y retorna resultados"""
@@ -85,12 +92,12 @@ class DatabaseService:
             conn.commit()
             return cursor.rowcount
 
-# Instancia global del servicio
-_db_service: Optional[DatabaseService] = None
+# Instancias globales del servicio (una por archivo de BD)
+_db_services: Dict[str, DatabaseService] = {}
 
 def get_db_service(db_path: str = "data/device_data.db") -> DatabaseService:
-    """Obtiene la instancia global del servicio de BD"""
-    global _db_service
-    if _db_service is None:
-        _db_service = DatabaseService(db_path)
-    return _db_service
+    """Obtiene la instancia global del servicio de BD para db_path"""
+    key = str(Path(db_path).resolve())
+    if key not in _db_services:
+        _db_services[key] = DatabaseService(db_path)
+    return _db_services[key]
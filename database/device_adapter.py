@@ -1,11 +1,15 @@
 """
 Adaptador de datos de dispositivos con soporte de fallback.
 Implementa la lógica: BD → datos en tiempo real
+Las últimas lecturas salen de la caché en memoria (database.latest_cache),
+que el servicio precarga al iniciar y la ingesta mantiene al día.
 """
 
+import time
 from typing import Dict, Optional
 from datetime import datetime, timedelta
 from database.devices_service import get_device_service
+from database.latest_cache import get_latest_cache
 
 
 class DeviceDataAdapter:
@@ -24,6 +28,7 @@ class DeviceDataAdapter:
             freshness_threshold_minutes: tiempo máximo que se considera "fresco" un dato de BD
         """
         self.device_service = get_device_service()
+        self.latest = get_latest_cache()
         self.freshness_threshold = timedelta(minutes=freshness_threshold_minutes)
     
     def get_device_data(
@@ -49,31 +54,35 @@ class DeviceDataAdapter:
                 "_timestamp": datetime.now().isoformat()
             }
         
-        # 2. Intentar obtener datos recientes de la BD
-        latest = self.device_service.get_latest_data(device_id)
+        # 2. Última lectura conocida (caché, sin consultar la BD)
+        latest = self.latest.get(device_id)
         if latest:
             latest_dict = dict(latest)
-            timestamp = datetime.fromisoformat(latest_dict.get("timestamp", ""))
-            time_diff = datetime.now() - timestamp
+            age = self._age_seconds(latest_dict)
             
-            if time_diff <= self.freshness_threshold:
+            if age <= self.freshness_threshold.total_seconds():
                 # Datos frescos de la BD
                 return {
                     **latest_dict,
                     "_source": "database_fresh",
-                    "_age_seconds": int(time_diff.total_seconds())
+                    "_age_seconds": int(age)
                 }
             else:
                 # Datos antiguos, pero es lo que tenemos
                 return {
                     **latest_dict,
                     "_source": "database_stale",
-                    "_age_seconds": int(time_diff.total_seconds())
+                    "_age_seconds": int(age)
                 }
         
         # 3. Sin datos disponibles
         return None
     
+    @staticmethod
+    def _age_seconds(row: Dict) -> float:
+        """Antigüedad de una fila en segundos, desde ts_ms (sin parsear texto)"""
+        return time.time() - row["ts_ms"] / 1000
+
     def get_all_devices_data(
         self,
         realtime_devices: Optional[Dict[str, Dict]] = None
@@ -90,32 +99,40 @@ class DeviceDataAdapter:
         realtime_devices = realtime_devices or {}
         result = {}
         
-        # Obtener IDs de todos los dispositivos
-        all_ids = set(self.device_service.get_all_device_ids())
+        # Una copia de la caché: O(dispositivos), sin consultas N+1
+        cached = self.latest.snapshot()
+        all_ids = set(cached)
         all_ids.update(realtime_devices.keys())
+        now = time.time()
         
         for device_id in all_ids:
-            data = self.get_device_data(
-                device_id,
-                realtime_devices.get(device_id)
-            )
-            if data:
-                result[device_id] = data
+            realtime = realtime_devices.get(device_id)
+            if realtime:
+                result[device_id] = self.get_device_data(device_id, realtime)
+                continue
+            
+            latest = cached[device_id]
+            age = now - latest["ts_ms"] / 1000
+            fresh = age <= self.freshness_threshold.total_seconds()
+            result[device_id] = {
+                **latest,
+                "_source": "database_fresh" if fresh else "database_stale",
+                "_age_seconds": int(age)
+            }
         
         return result
     
     def is_data_fresh(self, device_id: str) -> bool:
         """Verifica si los datos de un dispositivo están frescos"""
-        latest = self.device_service.get_latest_data(device_id)
+        latest = self.latest.get(device_id)
         if not latest:
             return False
         
-        timestamp = datetime.fromisoformat(latest["timestamp"])
-        return (datetime.now() - timestamp) <= self.freshness_threshold
+        return self._age_seconds(latest) <= self.freshness_threshold.total_seconds()
     
     def get_data_status(self, device_id: str) -> Dict[str, str]:
         """Obtiene estado de los datos de un dispositivo"""
-        latest = self.device_service.get_latest_data(device_id)
+        latest = self.latest.get(device_id)
         
         if not latest:
             return {
@@ -123,20 +140,20 @@ class DeviceDataAdapter:
                 "message": "Sin datos registrados"
             }
         
-        timestamp = datetime.fromisoformat(latest["timestamp"])
-        time_diff = datetime.now() - timestamp
+        age = self._age_seconds(latest)
         
-        if time_diff <= self.freshness_threshold:
+        if age <= self.freshness_threshold.total_seconds():
             return {
                 "status": "fresh",
-                "message": f"Datos frescos ({int(time_diff.total_seconds())}s)",
-                "age_seconds": int(time_diff.total_seconds())
+                "message": f"Datos frescos ({int(age)}s)",
+                "age_seconds": int(age)
             }
         else:
+            hora = datetime.fromtimestamp(latest["ts_ms"] / 1000)
             return {
                 "status": "stale",
-                "message": f"Datos del {timestamp.strftime('%H:%M:%S')}",
-                "age_seconds": int(time_diff.total_seconds())
+                "message": f"Datos del {hora.strftime('%H:%M:%S')}",
+                "age_seconds": int(age)
             }
 
 
@@ -0,0 +1,178 @@
+"""
+Rollups de series de tiempo para device_data.
+Tablas agregadas a 1 min, 15 min y 1 h con min/max/promedio/conteo por sensor,
+mantenidas de forma incremental por el escritor de ingesta.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+# Resoluciones en segundos, de la más fina a la más gruesa
+RESOLUTIONS = (60, 900, 3600)
+
+# Columnas numéricas de device_data que se agregan
+SENSOR_COLUMNS = ("temp_sonda", "temp_amb", "humedad", "luz", "aceleracion", "bateria")
+
+# Por columna: mínimo, máximo, suma y cantidad de valores no nulos
+_AGG_FIELDS = [
+    f"{col}_{suffix}" for col in SENSOR_COLUMNS for suffix in ("min", "max", "sum", "n")
+]
+
+
+def _epoch(timestamp: str) -> int:
+    """Segundos epoch de un timestamp ISO local (mismo criterio que ts_ms)"""
+    return int(datetime.fromisoformat(timestamp).timestamp())
+
+
+class DeviceRollupStore:
+    """Mantenimiento y consulta de la tabla device_rollup"""
+
+    UPSERT_QUERY = """
+    INSERT INTO device_rollup (
+        resolution, device_id, bucket, samples, {fields}
+    ) VALUES (
+        :resolution, :device_id, :bucket, :samples, {params}
+    )
+    ON CONFLICT (resolution, device_id, bucket) DO UPDATE SET
+        samples = samples + excluded.samples,
+        {updates}
+    """.format(
+        fields=", ".join(_AGG_FIELDS),
+        params=", ".join(f":{f}" for f in _AGG_FIELDS),
+        updates=",\n        ".join(
+            # min()/max() escalares devuelven NULL si un lado es NULL
+            f"{col}_min = min(coalesce({col}_min, excluded.{col}_min), coalesce(excluded.{col}_min, {col}_min)),\n        "
+            f"{col}_max = max(coalesce({col}_max, excluded.{col}_max), coalesce(excluded.{col}_max, {col}_max)),\n        "
+            f"{col}_sum = {col}_sum + excluded.{col}_sum,\n        "
+            f"{col}_n = {col}_n + excluded.{col}_n"
+            for col in SENSOR_COLUMNS
+        )
+    )
+
+    # ==================== ESQUEMA ====================
+    def init(self, conn):
+        """Crea la tabla (y la reconstruye si hay datos crudos sin agregar)"""
+        columns = ",\n                ".join(
+            f"{col}_min REAL, {col}_max REAL, "
+            f"{col}_sum REAL NOT NULL DEFAULT 0, {col}_n INTEGER NOT NULL DEFAULT 0"
+            for col in SENSOR_COLUMNS
+        )
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS device_rollup (
+                resolution INTEGER NOT NULL,
+                device_id TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                samples INTEGER NOT NULL,
+                {columns},
+                PRIMARY KEY (resolution, device_id, bucket)
+            ) WITHOUT ROWID
+        """)
+
+        empty = conn.execute("SELECT 1 FROM device_rollup LIMIT 1").fetchone() is None
+        has_raw = conn.execute("SELECT 1 FROM device_data LIMIT 1").fetchone() is not None
+        if empty and has_raw:
+            self.rebuild(conn)
+
+    def rebuild(self, conn, device_id: Optional[str] = None):
+        """Recalcula los rollups desde device_data (migración o reparación)"""
+        where = "WHERE device_id = ?" if device_id else ""
+        if device_id:
+            conn.execute("DELETE FROM device_rollup WHERE device_id = ?", (device_id,))
+        else:
+            conn.execute("DELETE FROM device_rollup")
+
+        aggregates = ", ".join(
+            f"MIN({col}), MAX({col}), TOTAL({col}), COUNT({col})" for col in SENSOR_COLUMNS
+        )
+        for res in RESOLUTIONS:
+            params = (res, res, res, device_id) if device_id else (res, res, res)
+            conn.execute(f"""
+                INSERT INTO device_rollup (
+                    resolution, device_id, bucket, samples, {", ".join(_AGG_FIELDS)}
+                )
+                SELECT ?, device_id,
+                       (ts_ms / 1000 / ?) * ? AS bucket,
+                       COUNT(*), {aggregates}
+                FROM device_data
+                {where}
+                GROUP BY device_id, bucket
+            """, params)
+
+    # ==================== MANTENIMIENTO INCREMENTAL ====================
+    def aggregate(self, rows: Iterable[Dict]) -> List[Dict]:
+        """Pre-agrega un lote de filas crudas en memoria (una fila por bucket)"""
+        acc: Dict[tuple, Dict] = {}
+        for row in rows:
+            ts = row["ts_ms"] // 1000
+            for res in RESOLUTIONS:
+                key = (res, row["device_id"], ts - ts % res)
+                agg = acc.get(key)
+                if agg is None:
+                    agg = acc[key] = {
+                        "resolution": res,
+                        "device_id": row["device_id"],
+                        "bucket": key[2],
+                        "samples": 0,
+                    }
+                    for col in SENSOR_COLUMNS:
+                        agg[f"{col}_min"] = None
+                        agg[f"{col}_max"] = None
+                        agg[f"{col}_sum"] = 0.0
+                        agg[f"{col}_n"] = 0
+
+                agg["samples"] += 1
+                for col in SENSOR_COLUMNS:
+                    v = row.get(col)
+                    if v is None:
+                        continue
+                    lo, hi = agg[f"{col}_min"], agg[f"{col}_max"]
+                    agg[f"{col}_min"] = v if lo is None or v < lo else lo
+                    agg[f"{col}_max"] = v if hi is None or v > hi else hi
+                    agg[f"{col}_sum"] += v
+                    agg[f"{col}_n"] += 1
+        return list(acc.values())
+
+    def accumulate(self, conn, rows: List[Dict]):
+        """Suma un lote de filas crudas a los rollups (dentro de la transacción del llamador)"""
+        aggregated = self.aggregate(rows)
+        if aggregated:
+            conn.executemany(self.UPSERT_QUERY, aggregated)
+
+    # ==================== CONSULTA ====================
+    @staticmethod
+    def pick_resolution(span_seconds: float, max_points: int) -> Optional[int]:
+        """
+        Resolución más gruesa que aún llena max_points en el rango.
+        None = ninguna alcanza, usar datos crudos.
+        """
+        for res in reversed(RESOLUTIONS):
+            if span_seconds / res >= max_points:
+                return res
+        return None
+
+    def query(self, db, device_id: str, resolution: int, start_time: str, end_time: str) -> List[Dict]:
+        """Serie agregada: por cada bucket, promedio (nombre de columna) y _min/_max"""
+        start = _epoch(start_time)
+        end = _epoch(end_time)
+        rows = db.execute_query("""
+            SELECT * FROM device_rollup
+            WHERE resolution = ? AND device_id = ?
+            AND bucket BETWEEN ? AND ?
+            ORDER BY bucket
+        """, (resolution, device_id, start - start % resolution, end))
+
+        series = []
+        for r in rows:
+            point = {
+                "device_id": r["device_id"],
+                "timestamp": datetime.fromtimestamp(r["bucket"]).isoformat(),
+                "resolution": resolution,
+                "samples": r["samples"],
+            }
+            for col in SENSOR_COLUMNS:
+                n = r[f"{col}_n"]
+                point[col] = r[f"{col}_sum"] / n if n else None
+                point[f"{col}_min"] = r[f"{col}_min"]
+                point[f"{col}_max"] = r[f"{col}_max"]
+            series.append(point)
+        return series
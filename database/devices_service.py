@@ -4,15 +4,31 @@ Maneja: guardar datos → recuperar datos → fallback en tiempo real
 """
 
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from database.db_service import get_db_service
+from database.ingestion import DeviceIngestionPipeline
+from database.device_rollups import DeviceRollupStore
+from database.latest_cache import get_latest_cache
+from database.retention import RetentionEngine
+from database.timeutils import (
+    SQL_EPOCH_MS, epoch_ms_from_unix, from_epoch_ms, register_sql_functions, to_epoch_ms
+)
+
+# Filas por paso al migrar ts_ms en BDs existentes
+MIGRATION_CHUNK = 5000
 
 class DeviceDataService:
     """Servicio unificado para gestión de datos de dispositivos"""
     
     def __init__(self):
         self.db = get_db_service("data/device_data.db")
+        self._ingestion: Optional[DeviceIngestionPipeline] = None
+        self.rollups = DeviceRollupStore()
+        self.retention = RetentionEngine(self)
+        self.latest = get_latest_cache()
         self._init_db()
+        if not self.latest.warmed:
+            self.latest.warm(self.get_latest_all_devices())
     
     def _init_db(self):
         """Inicializa la estructura de la base de datos"""
@@ -33,35 +49,169 @@ class DeviceDataService:
                 seq INTEGER,
                 timestamp TEXT NOT NULL,
                 synced INTEGER DEFAULT 0,
-                last_sync TEXT
+                last_sync TEXT,
+                ts_ms INTEGER
             )
             """)
             
+            self._migrate_epoch_ms(conn)
+            
+            # (device_id, ts_ms) cubre rangos, último valor y MIN/MAX/COUNT por
+            # dispositivo; (ts_ms) sirve a la retención. Los índices sobre el
+            # texto ISO quedan reemplazados.
             conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_device_timestamp
-            ON device_data (device_id, timestamp DESC)
+            CREATE INDEX IF NOT EXISTS idx_device_ts
+            ON device_data (device_id, ts_ms)
             """)
             
             conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_device_latest
-            ON device_data (device_id, id DESC)
+            CREATE INDEX IF NOT EXISTS idx_ts
+            ON device_data (ts_ms)
             """)
             
+            conn.execute("DROP INDEX IF EXISTS idx_device_timestamp")
+            conn.execute("DROP INDEX IF EXISTS idx_device_latest")
+            
+            self._init_latest(conn)
+            self.rollups.init(conn)
+            
+            conn.commit()
+
+    def _migrate_epoch_ms(self, conn):
+        """Agrega ts_ms a BDs anteriores y la rellena por bloques de id"""
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(device_data)")}
+        if "ts_ms" not in columns:
+            conn.execute("ALTER TABLE device_data ADD COLUMN ts_ms INTEGER")
             conn.commit()
+
+        pending = conn.execute(
+            "SELECT MIN(id) AS lo, MAX(id) AS hi FROM device_data WHERE ts_ms IS NULL"
+        ).fetchone()
+        if pending["lo"] is None:
+            return
+
+        print("[DB] Migrando timestamps a ts_ms...")
+        register_sql_functions(conn)
+        lo = pending["lo"] - 1
+        while lo < pending["hi"]:
+            hi = lo + MIGRATION_CHUNK
+            conn.execute(f"""
+                UPDATE device_data
+                SET ts_ms = {SQL_EPOCH_MS.format(col="timestamp")}
+                WHERE id > ? AND id <= ? AND ts_ms IS NULL
+            """, (lo, hi))
+            conn.commit()
+            lo = hi
     
-    # ==================== INSERCIÓN ====================
-    def save_device_data(self, data: dict, timestamp: Optional[str] = None) -> int:
+    def _init_latest(self, conn):
         """
-        Guarda datos de un dispositivo en la BD.
-        
-        Args:
-            data: dict con campos {ID, T_Sonda, T_Amb, Hum, Luz, Aceleracion, Bat, Alarma, Activo, Rocio, seq}
-            timestamp: timestamp personalizado (por defecto ahora)
-        
-        Returns:
-            ID del registro insertado
+        Tabla device_latest: copia de la fila más nueva de device_data por
+        device_id (mismas columnas, incluidos id, synced y last_sync).
+
+        La mantienen triggers de SQLite en la misma transacción que cada
+        INSERT/UPDATE, así ninguna ruta de escritura tiene que acordarse de
+        ella. Una lectura atrasada no pisa a una más nueva.
         """
-        payload = {
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(device_latest)")}
+        if columns and "id" not in columns:
+            # Versión anterior sin id/synced/last_sync: se reconstruye
+            conn.execute("DROP TABLE device_latest")
+
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS device_latest (
+            id INTEGER NOT NULL,
+            device_id TEXT PRIMARY KEY,
+            temp_sonda REAL,
+            temp_amb REAL,
+            humedad REAL,
+            luz REAL,
+            aceleracion REAL,
+            bateria REAL,
+            alarma TEXT,
+            activo INTEGER,
+            punto_rocio REAL,
+            seq INTEGER,
+            timestamp TEXT NOT NULL,
+            synced INTEGER DEFAULT 0,
+            last_sync TEXT,
+            ts_ms INTEGER NOT NULL
+        )
+        """)
+
+        conn.execute(self.LATEST_TRIGGER_QUERY)
+
+        conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_device_latest_sync
+        AFTER UPDATE OF synced, last_sync ON device_data
+        BEGIN
+            UPDATE device_latest
+            SET synced = NEW.synced, last_sync = NEW.last_sync
+            WHERE device_id = NEW.device_id AND id = NEW.id;
+        END
+        """)
+
+        # Carga única desde el histórico existente: con MAX() SQLite toma el
+        # resto de columnas de esa misma fila
+        empty = conn.execute("SELECT 1 FROM device_latest LIMIT 1").fetchone() is None
+        if empty:
+            conn.execute(f"""
+            INSERT INTO device_latest ({self.LATEST_COLUMNS})
+            SELECT {self.LATEST_COLUMNS} FROM (
+                SELECT *, MAX(ts_ms) FROM device_data
+                WHERE ts_ms IS NOT NULL
+                GROUP BY device_id
+            )
+            """)
+        conn.commit()
+    
+    # ==================== INSERCIÓN ====================
+    INSERT_QUERY = """
+    INSERT INTO device_data (
+        device_id, temp_sonda, temp_amb, humedad, luz,
+        aceleracion, bateria, alarma, activo, punto_rocio, seq,
+        timestamp, synced, last_sync, ts_ms
+    ) VALUES (
+        :device_id, :temp_sonda, :temp_amb, :humedad, :luz,
+        :aceleracion, :bateria, :alarma, :activo, :punto_rocio, :seq,
+        :timestamp, :synced, :last_sync, :ts_ms
+    )
+    """
+
+    LATEST_COLUMNS = (
+        "id, device_id, temp_sonda, temp_amb, humedad, luz, aceleracion, bateria, "
+        "alarma, activo, punto_rocio, seq, timestamp, synced, last_sync, ts_ms"
+    )
+
+    # Solo avanza: una lectura atrasada no pisa a una más nueva
+    LATEST_TRIGGER_QUERY = """
+    CREATE TRIGGER IF NOT EXISTS trg_device_latest_insert
+    AFTER INSERT ON device_data
+    BEGIN
+        INSERT INTO device_latest ({columns})
+        VALUES ({values})
+        ON CONFLICT (device_id) DO UPDATE SET
+            {updates}
+        WHERE excluded.ts_ms >= device_latest.ts_ms;
+    END
+    """.format(
+        columns=LATEST_COLUMNS,
+        values=", ".join(f"NEW.{c}" for c in LATEST_COLUMNS.split(", ")),
+        updates=",\n            ".join(
+            f"{c} = excluded.{c}" for c in LATEST_COLUMNS.split(", ") if c != "device_id"
+        )
+    )
+
+    def _build_row(self, data: dict, timestamp: Optional[str] = None) -> dict:
+        """Convierte una lectura normalizada del ESP32 en una fila de device_data"""
+        ts_ms = None
+        if timestamp is None and data.get("Recibido"):
+            # Hora de llegada al puerto (no la hora de proceso en la UI). ts_ms
+            # sale del epoch directo: el texto local es ambiguo en la hora
+            # repetida del cambio de horario
+            timestamp = datetime.fromtimestamp(data["Recibido"]).isoformat()
+            ts_ms = epoch_ms_from_unix(data["Recibido"])
+        timestamp = timestamp or datetime.now().isoformat()
+        return {
             "device_id": str(data.get("ID", "")).strip(),
             "temp_sonda": data.get("T_Sonda"),
             "temp_amb": data.get("T_Amb"),
@@ -73,31 +223,81 @@ class DeviceDataService:
             "activo": int(bool(data.get("Activo"))),
             "punto_rocio": data.get("Rocio"),
             "seq": data.get("seq"),
-            "timestamp": timestamp or datetime.now().isoformat(),
+            "timestamp": timestamp,
             "synced": 0,
-            "last_sync": None
+            "last_sync": None,
+            "ts_ms": to_epoch_ms(timestamp) if ts_ms is None else ts_ms
         }
-        
-        query = """
-        INSERT INTO device_data (
-            device_id, temp_sonda, temp_amb, humedad, luz,
-            aceleracion, bateria, alarma, activo, punto_rocio, seq,
-            timestamp, synced, last_sync
-        ) VALUES (
-            :device_id, :temp_sonda, :temp_amb, :humedad, :luz,
-            :aceleracion, :bateria, :alarma, :activo, :punto_rocio, :seq,
-            :timestamp, :synced, :last_sync
-        )
+
+    def save_device_data(self, data: dict, timestamp: Optional[str] = None) -> int:
         """
+        Guarda datos de un dispositivo en la BD (síncrono, una transacción).
+        Para el flujo en tiempo real usar enqueue_device_data().
+        
+        Args:
+            data: dict con campos {ID, T_Sonda, T_Amb, Hum, Luz, Aceleracion, Bat, Alarma, Activo, Rocio, seq}
+            timestamp: timestamp personalizado (por defecto ahora)
         
-        return self.db.execute_insert(query, payload)
+        Returns:
+            ID del registro insertado
+        """
+        row = self._build_row(data, timestamp)
+        with self.db.get_connection() as conn:
+            cursor = conn.execute(self.INSERT_QUERY, row)
+            self.rollups.accumulate(conn, [row])
+            conn.commit()
+        self.latest.update(row)
+        return cursor.lastrowid
     
     def save_device_data_batch(self, data_list: List[dict]) -> int:
         """Guarda múltiples registros en una transacción"""
+        rows = [self._build_row(data) for data in data_list]
+        written = self._write_rows(rows)
+        for row in rows:
+            self.latest.update(row)
+        return written
+
+    def _write_rows(self, rows: List[dict]) -> int:
+        """Escribe filas crudas y sus rollups en una sola transacción"""
+        if not rows:
+            return 0
         with self.db.get_connection() as conn:
-            for data in data_list:
-                self.save_device_data(data)
-            return len(data_list)
+            conn.executemany(self.INSERT_QUERY, rows)
+            self.rollups.accumulate(conn, rows)
+            conn.commit()
+        return len(rows)
+
+    # ==================== INGESTA (COLA ÚNICA) ====================
+    @property
+    def ingestion(self) -> DeviceIngestionPipeline:
+        """Pipeline de escritura compartido (se arranca en el primer uso)"""
+        if self._ingestion is None:
+            self._ingestion = DeviceIngestionPipeline(self._write_rows)
+            self._ingestion.start()
+        return self._ingestion
+
+    def enqueue_device_data(self, data: dict, timestamp: Optional[str] = None) -> bool:
+        """
+        Encola una lectura para el escritor dedicado.
+        El timestamp se fija aquí (momento de llegada), no al escribir.
+
+        Returns:
+            False si la lectura era duplicada o la cola está saturada
+        """
+        row = self._build_row(data, timestamp)
+        if not row["device_id"]:
+            return False
+        if not self.ingestion.submit(row):
+            return False
+        # Visible para lectores antes de llegar a disco
+        self.latest.update(row)
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que todas las lecturas encoladas estén en disco"""
+        if self._ingestion is None:
+            return True
+        return self._ingestion.flush(timeout)
     
     # ==================== CONSULTAS ====================
     def get_latest_data(self, device_id: str) -> Optional[Dict]:
@@ -108,7 +308,7 @@ class DeviceDataService:
         query = """
         SELECT * FROM device_data
         WHERE device_id = ?
-        ORDER BY timestamp DESC
+        ORDER BY ts_ms DESC
         LIMIT 1
         """
         return self.db.execute_one(query, (device_id,))
@@ -118,24 +318,17 @@ class DeviceDataService:
         query = """
         SELECT * FROM device_data
         WHERE device_id = ?
-        ORDER BY timestamp DESC
+        ORDER BY ts_ms DESC
         LIMIT ?
         """
         return self.db.execute_query(query, (device_id, limit))
     
     def get_latest_all_devices(self) -> List[Dict]:
-        """Obtiene el último registro de cada dispositivo"""
-        query = """
-        SELECT d1.* 
-        FROM device_data d1
-        WHERE d1.id = (
-            SELECT id FROM device_data d2 
-            WHERE d2.device_id = d1.device_id
-            ORDER BY d2.timestamp DESC
-            LIMIT 1
-        )
-        ORDER BY d1.device_id
         """
+        Obtiene el último registro de cada dispositivo (una fila por dispositivo,
+        con las mismas columnas que device_data)
+        """
+        query = "SELECT * FROM device_latest ORDER BY device_id"
         return self.db.execute_query(query)
     
     def get_all_device_ids(self) -> List[str]:
@@ -144,36 +337,127 @@ class DeviceDataService:
         results = self.db.execute_query(query)
         return [row["device_id"] for row in results]
     
-    def get_data_range(self, device_id: str, start_time: str, end_time: str) -> List[Dict]:
-        """Obtiene datos dentro de un rango de tiempo"""
+    def get_data_range(
+        self,
+        device_id: str,
+        start_time: str,
+        end_time: str,
+        max_points: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Obtiene datos dentro de un rango de tiempo.
+
+        Con max_points se lee del rollup más grueso que aún llena esa cantidad
+        de puntos (promedio por bucket + columnas _min/_max, samples, resolution);
+        si ninguno alcanza, se devuelven las filas crudas.
+        """
+        if max_points:
+            span = (
+                datetime.fromisoformat(end_time) - datetime.fromisoformat(start_time)
+            ).total_seconds()
+            resolution = self.rollups.pick_resolution(span, max_points)
+            if resolution:
+                return self.rollups.query(self.db, device_id, resolution, start_time, end_time)
+
         query = """
         SELECT * FROM device_data
         WHERE device_id = ? 
-        AND timestamp BETWEEN ? AND ?
-        ORDER BY timestamp
+        AND ts_ms BETWEEN ? AND ?
+        ORDER BY ts_ms
         """
-        return self.db.execute_query(query, (device_id, start_time, end_time))
+        return self.db.execute_query(
+            query, (device_id, to_epoch_ms(start_time), to_epoch_ms(end_time))
+        )
     
+    def count_range(self, device_id: str, start_ms: int, end_ms: int) -> int:
+        """Filas crudas de un dispositivo en [start_ms, end_ms] (solo índice)"""
+        row = self.db.execute_one("""
+        SELECT COUNT(*) AS total FROM device_data
+        WHERE device_id = ? AND ts_ms BETWEEN ? AND ?
+        """, (device_id, start_ms, end_ms))
+        return row["total"] if row else 0
+
+    def get_range_page(
+        self,
+        device_id: str,
+        start_ms: int,
+        end_ms: int,
+        after: Optional[Tuple[int, int]] = None,
+        limit: int = 500
+    ) -> List[Dict]:
+        """
+        Una página del rango, de la lectura más nueva a la más vieja.
+        Paginación por clave (keyset): `after` es el (ts_ms, id) de la última
+        fila de la página anterior, así cada página es un seek en idx_device_ts
+        y no un OFFSET que recorre todo lo anterior.
+        """
+        if after is None:
+            return self.db.execute_query("""
+            SELECT * FROM device_data
+            WHERE device_id = ? AND ts_ms BETWEEN ? AND ?
+            ORDER BY ts_ms DESC, id DESC
+            LIMIT ?
+            """, (device_id, start_ms, end_ms, limit))
+
+        ts, row_id = after
+        return self.db.execute_query("""
+        SELECT * FROM device_data
+        WHERE device_id = ? AND ts_ms >= ?
+        AND (ts_ms < ? OR (ts_ms = ? AND id < ?))
+        ORDER BY ts_ms DESC, id DESC
+        LIMIT ?
+        """, (device_id, start_ms, ts, ts, row_id, limit))
+
+    def get_range_key(self, device_id: str, start_ms: int, end_ms: int, offset: int) -> Optional[Tuple[int, int]]:
+        """
+        (ts_ms, id) de la fila en la posición `offset` del rango (orden de
+        get_range_page). Solo lee el índice; sirve para saltar a una página
+        lejana sin traer las filas intermedias.
+        """
+        row = self.db.execute_one("""
+        SELECT ts_ms, id FROM device_data
+        WHERE device_id = ? AND ts_ms BETWEEN ? AND ?
+        ORDER BY ts_ms DESC, id DESC
+        LIMIT 1 OFFSET ?
+        """, (device_id, start_ms, end_ms, offset))
+        return (row["ts_ms"], row["id"]) if row else None
+
+    def get_range_stats(self, device_id: str, start_ms: int, end_ms: int) -> Dict:
+        """Conteo y min/promedio/máximo de temperatura y humedad en un rango"""
+        return self.db.execute_one("""
+        SELECT COUNT(*) AS total,
+               MIN(temp_sonda) AS temp_min, AVG(temp_sonda) AS temp_avg, MAX(temp_sonda) AS temp_max,
+               MIN(humedad) AS hum_min, AVG(humedad) AS hum_avg, MAX(humedad) AS hum_max
+        FROM device_data
+        WHERE device_id = ? AND ts_ms BETWEEN ? AND ?
+        """, (device_id, start_ms, end_ms)) or {}
+
     def get_device_stats(self, device_id: Optional[str] = None) -> Dict:
         """Obtiene estadísticas de un dispositivo o de todos"""
         if device_id:
             query = """
             SELECT COUNT(*) as total,
-                   MIN(timestamp) as primer,
-                   MAX(timestamp) as ultimo
+                   MIN(ts_ms) as primer,
+                   MAX(ts_ms) as ultimo
             FROM device_data
             WHERE device_id = ?
             """
-            return self.db.execute_one(query, (device_id,)) or {}
+            stats = self.db.execute_one(query, (device_id,)) or {}
         else:
             query = """
             SELECT COUNT(*) as total,
                    COUNT(DISTINCT device_id) as dispositivos,
-                   MIN(timestamp) as primer,
-                   MAX(timestamp) as ultimo
+                   MIN(ts_ms) as primer,
+                   MAX(ts_ms) as ultimo
             FROM device_data
             """
-            return self.db.execute_one(query) or {}
+            stats = self.db.execute_one(query) or {}
+
+        # Se conservan las claves ISO que ya consume la UI
+        for key in ("primer", "ultimo"):
+            if stats.get(key) is not None:
+                stats[key] = from_epoch_ms(stats[key])
+        return stats
     
     # ==================== ACTUALIZACIONES ====================
     def mark_as_synced(self, row_id: int) -> int:
@@ -197,19 +481,29 @@ class DeviceDataService:
     # ==================== MANTENIMIENTO ====================
     def delete_device_history(self, device_id: str) -> int:
         """Elimina todo el historial de un dispositivo"""
+        self.flush()
+        self.db.execute_update("DELETE FROM device_rollup WHERE device_id = ?", (device_id,))
+        self.db.execute_update("DELETE FROM device_latest WHERE device_id = ?", (device_id,))
+        self.latest.remove(device_id)
         query = "DELETE FROM device_data WHERE device_id = ?"
         return self.db.execute_update(query, (device_id,))
     
     def delete_old_data(self, days: int = 30) -> int:
-        """Elimina datos más antiguos que N días"""
-        query = """
-        DELETE FROM device_data
-        WHERE datetime(timestamp) < datetime('now', '-' || ? || ' days')
-        """
-        return self.db.execute_update(query, (days,))
+        """Elimina datos más antiguos que N días (en bloques, sin archivar; rollups intactos)"""
+        return self.retention.run_once(days=days, archive=False)["deleted"]
+
+    def start_retention(self, days: Optional[int] = None):
+        """Arranca la poda programada con archivado diario (data/archive/device_data)"""
+        if days is not None:
+            self.retention.retention_days = days
+        self.retention.start()
     
     def clear_all(self) -> int:
         """⚠️ Limpia TODOS los datos"""
+        self.flush()
+        self.db.execute_update("DELETE FROM device_rollup")
+        self.db.execute_update("DELETE FROM device_latest")
+        self.latest.clear()
         query = "DELETE FROM device_data"
         return self.db.execute_update(query)
 
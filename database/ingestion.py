@@ -0,0 +1,270 @@
+"""
+Pipeline de ingestión de lecturas de dispositivos.
+Una sola cola y un solo hilo escritor: deduplica por (device_id, seq),
+agrupa en transacciones executemany y expone flush/backpressure.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+
+class _FlushRequest:
+    """Marcador en la cola: el escritor confirma todo lo anterior y avisa"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class DeviceIngestionPipeline:
+    """
+    Cola única con hilo escritor dedicado.
+
+    - submit(): no bloquea el hilo de UI (salvo backpressure con put_timeout)
+    - El escritor agrupa filas y las escribe con write_batch(rows) cuando
+      se alcanza batch_size o pasa flush_interval desde la primera fila pendiente
+    - Dedupe: descarta lecturas repetidas (device_id, seq) recientes
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[Dict]], int],
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        max_pending: int = 20000,
+        put_timeout: float = 0.05,
+        dedupe_window: int = 64,
+        high_watermark: float = 0.8,
+        max_retries: int = 3,
+        retry_delay: float = 0.1
+    ):
+        """
+        Args:
+            write_batch: función que persiste una lista de filas en una transacción
+            batch_size: filas máximas por transacción
+            flush_interval: segundos máximos que una fila espera en memoria
+            max_pending: capacidad de la cola (backpressure)
+            put_timeout: segundos que submit() espera si la cola está llena
+            dedupe_window: cuántos seq recientes se recuerdan por dispositivo
+            high_watermark: fracción de ocupación que dispara los hooks de backpressure
+            max_retries: reintentos de un lote fallido (p. ej. "database is locked")
+            retry_delay: espera antes del primer reintento; se duplica en cada uno
+        """
+        self._write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.dedupe_window = dedupe_window
+        self.capacity = max_pending
+        self._high_mark = max(1, int(max_pending * high_watermark))
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._recent_seq: Dict[str, deque] = {}
+        self._seq_lock = threading.Lock()
+        self._backpressure_hooks: List[Callable[[int, int], None]] = []
+        self._error_hooks: List[Callable[[str, int], None]] = []
+        self._pressured = False
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Métricas
+        self.accepted = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.failed = 0
+
+    # ==================== CICLO DE VIDA ====================
+    def start(self):
+        """Arranca el hilo escritor (idempotente)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="device-ingestion-writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Vacía la cola y detiene el escritor"""
+        if not self._thread or not self._thread.is_alive():
+            return
+        self.flush(timeout)
+        self._stop.set()
+        self._thread.join(timeout)
+
+    # ==================== PRODUCTOR ====================
+    def submit(self, row: Dict) -> bool:
+        """
+        Encola una fila ya normalizada (columnas de device_data).
+
+        Returns:
+            True si se aceptó, False si era duplicada o la cola estaba llena
+        """
+        if self._is_duplicate(row.get("device_id"), row.get("seq")):
+            self.duplicates += 1
+            return False
+
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            # No se persistió: el reintento de esta lectura no es duplicado
+            self._forget_seq(row.get("device_id"), row.get("seq"))
+            self.dropped += 1
+            self._notify_backpressure()
+            return False
+
+        self.accepted += 1
+        if self._queue.qsize() >= self._high_mark:
+            self._notify_backpressure()
+        else:
+            self._pressured = False
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Bloquea hasta que todo lo encolado antes de la llamada esté en disco"""
+        if not self._thread or not self._thread.is_alive():
+            return True
+        req = _FlushRequest()
+        self._queue.put(req)
+        return req.done.wait(timeout)
+
+    # ==================== BACKPRESSURE ====================
+    def add_backpressure_hook(self, hook: Callable[[int, int], None]):
+        """Registra hook(pending, capacity) llamado al superar el umbral alto"""
+        self._backpressure_hooks.append(hook)
+
+    def add_error_hook(self, hook: Callable[[str, int], None]):
+        """Registra hook(mensaje, filas) llamado cuando un lote se pierde tras los reintentos"""
+        self._error_hooks.append(hook)
+
+    def pending(self) -> int:
+        """Filas en cola aún no escritas"""
+        return self._queue.qsize()
+
+    def is_saturated(self) -> bool:
+        return self._queue.qsize() >= self._high_mark
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "dropped": self.dropped,
+            "written": self.written,
+            "batches": self.batches,
+            "errors": self.errors,
+            "failed": self.failed,
+            "pending": self.pending(),
+        }
+
+    def _notify_backpressure(self):
+        # Solo en la transición para no inundar a los listeners
+        if self._pressured:
+            return
+        self._pressured = True
+        pending = self._queue.qsize()
+        for hook in list(self._backpressure_hooks):
+            try:
+                hook(pending, self.capacity)
+            except Exception as e:
+                print(f"[INGESTA] Error en hook de backpressure: {e}")
+
+    def _notify_error(self, mensaje: str, filas: int):
+        for hook in list(self._error_hooks):
+            try:
+                hook(mensaje, filas)
+            except Exception as e:
+                print(f"[INGESTA] Error en hook de errores: {e}")
+
+    # ==================== DEDUPE ====================
+    def _is_duplicate(self, device_id, seq) -> bool:
+        # Sin seq no hay forma fiable de identificar la lectura
+        if seq is None or not device_id:
+            return False
+
+        with self._seq_lock:
+            recent = self._recent_seq.get(device_id)
+            if recent is None:
+                recent = self._recent_seq[device_id] = deque(maxlen=self.dedupe_window)
+            elif seq in recent:
+                return True
+            recent.append(seq)
+            return False
+
+    def _forget_seq(self, device_id, seq):
+        if seq is None or not device_id:
+            return
+        with self._seq_lock:
+            recent = self._recent_seq.get(device_id)
+            if recent is not None and seq in recent:
+                recent.remove(seq)
+
+    # ==================== ESCRITOR ====================
+    def _run(self):
+        batch: List[Dict] = []
+        deadline = None
+
+        while True:
+            # Sin lote pendiente se despierta cada 0.5s para revisar stop()
+            wait = 0.5 if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=wait)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, _FlushRequest):
+                self._write(batch)
+                batch, deadline = [], None
+                item.done.set()
+                continue
+
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (
+                len(batch) >= self.batch_size
+                or time.monotonic() >= deadline
+            ):
+                self._write(batch)
+                batch, deadline = [], None
+
+            if self._stop.is_set() and not batch and self._queue.empty():
+                return
+
+    def _write(self, batch: List[Dict]):
+        if not batch:
+            return
+
+        espera = self.retry_delay
+        for intento in range(self.max_retries + 1):
+            try:
+                self._write_batch(batch)
+                self.written += len(batch)
+                self.batches += 1
+                return
+            except Exception as e:
+                self.errors += 1
+                error = e
+            if intento < self.max_retries:
+                # Bloqueos de SQLite suelen ser breves: backoff acotado
+                time.sleep(espera)
+                espera = min(espera * 2, 2.0)
+
+        # Lote perdido: el reenvío del dispositivo no debe verse como duplicado
+        for row in batch:
+            self._forget_seq(row.get("device_id"), row.get("seq"))
+        self.failed += len(batch)
+        self._notify_error(
+            f"No se pudo escribir un lote de {len(batch)} lecturas: {error}", len(batch)
+        )
@@ -1,15 +1,14 @@
-import sqlite3
 from pathlib import Path
 from datetime import datetime
 
+from database.connection_pool import get_connection
+
 DB_PATH = Path("data/insumos.db")
 
 
 def conn():
-    DB_PATH.parent.mkdir(exist_ok=True)
-    c = sqlite3.connect(DB_PATH)
-    c.row_factory = sqlite3.Row
-    return c
+    # Conexión persistente del hilo (WAL); `with` confirma sin cerrarla
+    return get_connection(DB_PATH)
 
 
 def init_db():
@@ -0,0 +1,72 @@
+"""
+Caché en memoria de la última lectura por dispositivo.
+Se precarga con una sola consulta agrupada y se actualiza en la ingesta
+(write-through), así los snapshots de la flota no tocan la BD.
+
+Las filas tienen las columnas de device_data; las que llegan por la ingesta
+aún no tienen `id` (se asigna al escribir). Quien necesite la fila persistida
+completa usa DeviceDataService.get_latest_all_devices().
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+
+class LatestReadingCache:
+    """Última fila conocida de cada device_id (segura entre hilos)"""
+
+    def __init__(self):
+        self._rows: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.warmed = False
+
+    def warm(self, rows: List[Dict]):
+        """Carga inicial (filas de una consulta agrupada por device_id)"""
+        with self._lock:
+            for row in rows:
+                self._put(row)
+            self.warmed = True
+
+    def update(self, row: Dict):
+        """Write-through: descarta lecturas más viejas que la ya guardada"""
+        with self._lock:
+            self._put(row)
+
+    def _put(self, row: Dict):
+        current = self._rows.get(row["device_id"])
+        if current is None or row["ts_ms"] >= current["ts_ms"]:
+            self._rows[row["device_id"]] = row
+
+    def get(self, device_id: str) -> Optional[Dict]:
+        return self._rows.get(device_id)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Copia superficial {device_id: fila}"""
+        with self._lock:
+            return dict(self._rows)
+
+    def device_ids(self) -> List[str]:
+        with self._lock:
+            return sorted(self._rows)
+
+    def remove(self, device_id: str):
+        with self._lock:
+            self._rows.pop(device_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+
+
+# Instancia global (una por proceso)
+_latest_cache: Optional[LatestReadingCache] = None
+_latest_cache_lock = threading.Lock()
+
+def get_latest_cache() -> LatestReadingCache:
+    """Obtiene la caché global de últimas lecturas"""
+    global _latest_cache
+    if _latest_cache is None:
+        with _latest_cache_lock:
+            if _latest_cache is None:
+                _latest_cache = LatestReadingCache()
+    return _latest_cache
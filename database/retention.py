@@ -0,0 +1,174 @@
+"""
+Motor de retención y archivado de device_data.
+Borra en bloques acotados, exporta antes a archivos diarios comprimidos
+y nunca toca los rollups (el histórico agregado se conserva).
+"""
+
+import csv
+import gzip
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from database.timeutils import to_epoch_ms
+
+# Días de datos crudos que se conservan por defecto
+RETENTION_DAYS = 30
+
+# Filas por bloque: cada bloque es una transacción corta
+CHUNK_SIZE = 2000
+
+# Pausa entre bloques para ceder el lock de escritura al escritor de ingesta
+CHUNK_PAUSE = 0.05
+
+# Páginas liberadas por cada incremental_vacuum
+VACUUM_PAGES = 1000
+
+# Cada cuánto corre el motor en segundo plano
+INTERVAL_HOURS = 6
+
+ARCHIVE_DIR = Path("data/archive/device_data")
+
+
+class RetentionEngine:
+    """Poda programada de datos crudos con archivado previo"""
+
+    def __init__(
+        self,
+        service,
+        retention_days: int = RETENTION_DAYS,
+        archive_dir: Optional[Path] = ARCHIVE_DIR,
+        chunk_size: int = CHUNK_SIZE,
+        chunk_pause: float = CHUNK_PAUSE
+    ):
+        """
+        Args:
+            service: DeviceDataService dueño de la BD
+            retention_days: días de datos crudos a conservar
+            archive_dir: carpeta de archivos diarios .csv.gz (None = no archivar)
+            chunk_size: filas por bloque de borrado
+            chunk_pause: segundos de pausa entre bloques
+        """
+        self.service = service
+        self.db = service.db
+        self.retention_days = retention_days
+        self.archive_dir = Path(archive_dir) if archive_dir else None
+        self.chunk_size = chunk_size
+        self.chunk_pause = chunk_pause
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # ==================== PROGRAMACIÓN ====================
+    def start(self, interval_hours: float = INTERVAL_HOURS):
+        """Corre run_once() ahora y luego cada interval_hours en un hilo propio"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(interval_hours * 3600,),
+            name="device-retention", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+    def _loop(self, interval: float):
+        while not self._stop.is_set():
+            try:
+                result = self.run_once()
+                if result["deleted"]:
+                    print(f"[RETENCION] {result['deleted']} filas archivadas/eliminadas")
+            except Exception as e:
+                print(f"[RETENCION] Error: {e}")
+            self._stop.wait(interval)
+
+    # ==================== PODA ====================
+    def run_once(self, days: Optional[int] = None, archive: bool = True) -> Dict:
+        """
+        Elimina (y archiva) las filas con más de `days` días, bloque a bloque.
+
+        Returns:
+            {"deleted": filas eliminadas, "files": archivos de archivo tocados}
+        """
+        days = self.retention_days if days is None else days
+        cutoff = to_epoch_ms((datetime.now() - timedelta(days=days)).isoformat())
+        archive = archive and self.archive_dir is not None
+
+        deleted = 0
+        files = set()
+
+        with self._lock:
+            while not self._stop.is_set():
+                # Los más antiguos primero vía idx_ts: cada bloque es un seek
+                # sobre el índice, nunca un scan completo
+                rows = self.db.execute_query("""
+                    SELECT * FROM device_data
+                    WHERE ts_ms < ?
+                    ORDER BY ts_ms
+                    LIMIT ?
+                """, (cutoff, self.chunk_size))
+                if not rows:
+                    break
+
+                if archive:
+                    files.update(self._archive(rows))
+                with self.db.get_connection() as conn:
+                    cursor = conn.executemany(
+                        "DELETE FROM device_data WHERE id = ?",
+                        [(r["id"],) for r in rows]
+                    )
+                    conn.commit()
+                deleted += cursor.rowcount
+
+                if len(rows) < self.chunk_size:
+                    break
+                time.sleep(self.chunk_pause)
+
+            if deleted:
+                self.incremental_vacuum()
+
+        return {"deleted": deleted, "files": sorted(files)}
+
+    def _archive(self, rows: List[Dict]) -> List[str]:
+        """Agrega filas a un .csv.gz por día (cada llamada es un miembro gzip nuevo)"""
+        by_day: Dict[str, List[Dict]] = {}
+        for r in rows:
+            by_day.setdefault(r["timestamp"][:10], []).append(r)
+
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        for day, day_rows in by_day.items():
+            path = self.archive_dir / f"{day}.csv.gz"
+            new_file = not path.exists()
+            with gzip.open(path, "at", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=list(day_rows[0].keys()))
+                if new_file:
+                    writer.writeheader()
+                writer.writerows(day_rows)
+            written.append(str(path))
+        return written
+
+    # ==================== ESPACIO EN DISCO ====================
+    def incremental_vacuum(self, pages: int = VACUUM_PAGES):
+        """
+        Devuelve páginas libres al sistema de archivos en pasos acotados.
+        Solo tiene efecto en BDs creadas con auto_vacuum=INCREMENTAL
+        (ver enable_incremental_vacuum para las existentes).
+        """
+        with self.db.get_connection() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                return
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+
+    def enable_incremental_vacuum(self):
+        """Migración única (bloqueante): activa auto_vacuum=INCREMENTAL con un VACUUM completo"""
+        with self.db.get_connection() as conn:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
@@ -0,0 +1,40 @@
+"""
+Conversión entre timestamps ISO (hora local, como se guardan en `timestamp`)
+y epoch en milisegundos (columna `ts_ms`).
+"""
+
+import time
+from datetime import datetime
+
+# Expresión SQL para migrar filas existentes. Es to_epoch_ms() registrada en
+# la conexión (register_sql_functions): julianday(..., 'utc') de SQLite elige
+# la otra ocurrencia de la hora repetida al salir del horario de verano.
+SQL_EPOCH_MS = "epoch_ms({col})"
+
+
+def to_epoch_ms(timestamp: str) -> int:
+    """ISO local → epoch ms"""
+    return int(round(datetime.fromisoformat(timestamp).timestamp() * 1000))
+
+
+def from_epoch_ms(ms: int) -> str:
+    """epoch ms → ISO local"""
+    return datetime.fromtimestamp(ms / 1000).isoformat()
+
+
+def epoch_ms_from_unix(seconds: float) -> int:
+    """Epoch en segundos (time.time()) → epoch ms, sin pasar por la hora local"""
+    return int(round(seconds * 1000))
+
+
+def register_sql_functions(conn):
+    """Registra epoch_ms(timestamp) en una conexión SQLite"""
+    conn.create_function(
+        "epoch_ms", 1,
+        lambda timestamp: None if timestamp is None else to_epoch_ms(timestamp),
+        deterministic=True
+    )
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
@@ -1,14 +1,14 @@
 import sqlite3
 from pathlib import Path
 
+from database.connection_pool import get_connection as _pooled_connection
+
 DB_PATH = Path("data/users.db")
 
 
 def get_connection():
-    DB_PATH.parent.mkdir(exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    # Conexión persistente del hilo (WAL); `with` confirma sin cerrarla
+    return _pooled_connection(DB_PATH)
 
 
 def init_db():
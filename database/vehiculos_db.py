@@ -1,16 +1,15 @@
-import sqlite3
 from pathlib import Path
 
+from database.connection_pool import get_connection
+
 DB_PATH = Path("data/vehiculos.db")
 
 ESTADOS_VALIDOS = ("Disponible", "En ruta", "Mantenimiento")
 
 
 def get_conn():
-    DB_PATH.parent.mkdir(exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    # Conexión persistente del hilo (WAL); `with` confirma sin cerrarla
+    return get_connection(DB_PATH)
 
 
 def init_db():
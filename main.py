@@ -12,6 +12,7 @@ if __name__ == "__main__":
     init_db()
     
     device_service = get_device_service()
+    device_service.start_retention()
     device_adapter = get_device_adapter()
 
     app = QApplication(sys.argv)
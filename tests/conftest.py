@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# Los tests importan los paquetes de la app (core, database, ui) desde la raíz
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture
+def device_service(tmp_path, monkeypatch):
+    """DeviceDataService sobre una BD nueva: las rutas data/... quedan en tmp_path"""
+    from database import latest_cache
+    from database.devices_service import DeviceDataService
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(latest_cache, "_latest_cache", None)
+    service = DeviceDataService()
+    yield service
+    if service._ingestion is not None:
+        service._ingestion.stop()
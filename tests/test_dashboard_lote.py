@@ -0,0 +1,23 @@
+from types import SimpleNamespace
+
+from ui.dashboard.dashboard_window import Dashboard
+
+
+def test_lectura_mal_formada_no_descarta_el_resto_del_lote(capsys):
+    procesadas = []
+
+    def on_sensor_data(datos):
+        procesadas.append(datos["ID"])
+        datos["T_Sonda"] + 1
+
+    dashboard = SimpleNamespace(on_sensor_data=on_sensor_data)
+    lote = [
+        {"ID": "1", "T_Sonda": 4.0},
+        {"ID": "2", "T_Sonda": "4,0"},
+        {"ID": "3"},
+        {"ID": "4", "T_Sonda": 5.0},
+    ]
+    Dashboard.on_sensor_batch(dashboard, lote)
+
+    assert procesadas == ["1", "2", "3", "4"]
+    assert capsys.readouterr().out.count("[DASHBOARD]") == 2
@@ -0,0 +1,81 @@
+from datetime import datetime
+
+INICIO = datetime(2024, 3, 1, 8, 0).timestamp()
+
+
+def lectura(device_id, segundos, temp, seq=0):
+    return {"ID": device_id, "T_Sonda": temp, "Hum": 50.0, "seq": seq, "Recibido": INICIO + segundos}
+
+
+def ultima(service, device_id):
+    return next(r for r in service.get_latest_all_devices() if r["device_id"] == device_id)
+
+
+def fila_mas_nueva(service, device_id):
+    return service.db.execute_one(
+        "SELECT * FROM device_data WHERE device_id = ? ORDER BY ts_ms DESC, id DESC LIMIT 1",
+        (device_id,)
+    )
+
+
+# ==================== TRIGGERS ====================
+def test_lectura_atrasada_no_pisa_a_la_nueva(device_service):
+    device_service.save_device_data(lectura("a", 100, 5.0))
+    device_service.save_device_data(lectura("a", 50, 9.0))
+    device_service.save_device_data_batch([lectura("a", 10, 1.0), lectura("a", 60, 2.0)])
+
+    assert ultima(device_service, "a") == fila_mas_nueva(device_service, "a")
+    assert ultima(device_service, "a")["temp_sonda"] == 5.0
+
+
+def test_lectura_nueva_avanza(device_service):
+    device_service.save_device_data(lectura("a", 100, 5.0))
+    device_service.save_device_data(lectura("a", 200, 6.0))
+    assert ultima(device_service, "a") == fila_mas_nueva(device_service, "a")
+    assert ultima(device_service, "a")["temp_sonda"] == 6.0
+
+
+def test_mismo_instante_gana_la_ultima_insertada(device_service):
+    device_service.save_device_data(lectura("a", 100, 5.0))
+    device_service.save_device_data(lectura("a", 100, 7.0))
+    assert ultima(device_service, "a")["temp_sonda"] == 7.0
+
+
+def test_una_fila_por_dispositivo_via_ingesta(device_service):
+    for i in range(300):
+        # Llegan desordenadas: la más nueva de cada dispositivo no es la última encolada
+        device_service.enqueue_device_data(lectura(f"d{i % 3}", (i * 37) % 300, float(i), seq=i))
+    assert device_service.flush(timeout=10)
+
+    filas = device_service.get_latest_all_devices()
+    assert [r["device_id"] for r in filas] == ["d0", "d1", "d2"]
+    for fila in filas:
+        assert fila == fila_mas_nueva(device_service, fila["device_id"])
+
+
+def test_sincronizado_solo_sigue_a_la_fila_mas_nueva(device_service):
+    vieja = device_service.save_device_data(lectura("a", 10, 1.0))
+    nueva = device_service.save_device_data(lectura("a", 20, 2.0))
+
+    device_service.mark_as_synced(vieja)
+    assert ultima(device_service, "a")["synced"] == 0
+
+    device_service.mark_as_synced(nueva)
+    assert ultima(device_service, "a")["synced"] == 1
+    assert ultima(device_service, "a") == fila_mas_nueva(device_service, "a")
+
+
+# ==================== CARGA INICIAL ====================
+def test_carga_inicial_desde_el_historico(device_service):
+    device_service.save_device_data_batch(
+        [lectura(f"d{i % 4}", (i * 53) % 400, float(i), seq=i) for i in range(400)]
+    )
+    esperado = device_service.get_latest_all_devices()
+
+    device_service.db.execute_update("DELETE FROM device_latest")
+    with device_service.db.get_connection() as conn:
+        device_service._init_latest(conn)
+
+    assert device_service.get_latest_all_devices() == esperado
+    for fila in esperado:
+        assert fila == fila_mas_nueva(device_service, fila["device_id"])
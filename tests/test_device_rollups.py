@@ -0,0 +1,118 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.device_rollups import RESOLUTIONS, SENSOR_COLUMNS, DeviceRollupStore
+
+INICIO = datetime(2024, 3, 1, 7, 58, 30)
+
+
+def lecturas(n, device_id="a", paso=7, semilla=0):
+    rnd = random.Random(semilla)
+    filas = []
+    for i in range(n):
+        filas.append({
+            "ID": device_id,
+            "T_Sonda": round(rnd.uniform(2, 8), 2),
+            # Columnas con huecos: el conteo por columna difiere de samples
+            "T_Amb": None if i % 3 == 0 else round(rnd.uniform(15, 25), 2),
+            "Hum": round(rnd.uniform(40, 70), 1),
+            "Luz": None,
+            "Bat": 3.7,
+            "seq": i,
+            "Recibido": (INICIO + timedelta(seconds=paso * i)).timestamp(),
+        })
+    return filas
+
+
+def rollups(service):
+    return service.db.execute_query(
+        "SELECT * FROM device_rollup ORDER BY resolution, device_id, bucket"
+    )
+
+
+def reconstruir(service):
+    with service.db.get_connection() as conn:
+        service.rollups.rebuild(conn)
+        conn.commit()
+    return rollups(service)
+
+
+# ==================== INCREMENTAL = RECONSTRUCCIÓN ====================
+def test_incremental_igual_a_reconstruccion(device_service):
+    filas = lecturas(1500) + lecturas(400, device_id="b", paso=31, semilla=1)
+    random.Random(2).shuffle(filas)
+
+    # Todas las rutas de escritura: lotes, fila suelta y cola de ingesta
+    device_service.save_device_data_batch(filas[:700])
+    for data in filas[700:720]:
+        device_service.save_device_data(data)
+    for data in filas[720:]:
+        assert device_service.enqueue_device_data(data)
+    assert device_service.flush(timeout=10)
+
+    incremental = rollups(device_service)
+    completo = reconstruir(device_service)
+
+    assert len(incremental) == len(completo)
+    for inc, full in zip(incremental, completo):
+        for clave, valor in full.items():
+            if isinstance(valor, float):
+                assert inc[clave] == pytest.approx(valor), clave
+            else:
+                assert inc[clave] == valor, clave
+
+
+def test_buckets_alineados_y_sin_perdidas(device_service):
+    device_service.save_device_data_batch(lecturas(900))
+    for res in RESOLUTIONS:
+        filas = [r for r in rollups(device_service) if r["resolution"] == res]
+        assert all(r["bucket"] % res == 0 for r in filas)
+        assert sum(r["samples"] for r in filas) == 900
+        assert sum(r["temp_amb_n"] for r in filas) == 600
+        assert all(r["luz_n"] == 0 and r["luz_min"] is None for r in filas)
+
+
+# ==================== CONSULTA ====================
+@pytest.mark.parametrize("span, puntos, esperado", [
+    (3600, 500, None),
+    (7 * 86400, 500, 900),
+    (30 * 86400, 500, 3600),
+    (86400, 1000, 60),
+    (86400, 90, 900),
+    (86400, 100, 60),
+])
+def test_elige_la_resolucion_mas_gruesa_que_llena(span, puntos, esperado):
+    assert DeviceRollupStore.pick_resolution(span, puntos) == esperado
+
+
+def test_rango_desde_rollup_promedia_las_crudas(device_service):
+    filas = lecturas(3000, paso=30)
+    device_service.save_device_data_batch(filas)
+    inicio = INICIO.isoformat()
+    fin = (INICIO + timedelta(seconds=30 * 3000)).isoformat()
+
+    serie = device_service.get_data_range("a", inicio, fin, max_points=20)
+    assert serie[0]["resolution"] == 3600
+    assert sum(p["samples"] for p in serie) == 3000
+
+    crudas = device_service.get_data_range("a", inicio, fin)
+    for punto in serie:
+        desde = datetime.fromisoformat(punto["timestamp"])
+        bucket = [
+            r["temp_sonda"] for r in crudas
+            if desde <= datetime.fromisoformat(r["timestamp"]) < desde + timedelta(hours=1)
+        ]
+        assert punto["temp_sonda"] == pytest.approx(sum(bucket) / len(bucket))
+        assert punto["temp_sonda_min"] == min(bucket)
+        assert punto["temp_sonda_max"] == max(bucket)
+
+
+def test_sin_max_points_devuelve_crudas(device_service):
+    device_service.save_device_data_batch(lecturas(10))
+    fin = (INICIO + timedelta(hours=1)).isoformat()
+    filas = device_service.get_data_range("a", INICIO.isoformat(), fin)
+    assert len(filas) == 10
+    assert "resolution" not in filas[0]
+    assert set(SENSOR_COLUMNS) <= set(filas[0])
@@ -0,0 +1,179 @@
+import pytest
+
+from core.health_monitor import (
+    OFFLINE, ONLINE, STALE, STALE_MIN_S, OFFLINE_MIN_S, HealthMonitor, TimerWheel
+)
+
+
+@pytest.fixture
+def monitor():
+    m = HealthMonitor()
+    m.rueda = TimerWheel(ahora=0)
+    transiciones = []
+    m.transiciones.connect(transiciones.extend)
+    m.registradas = transiciones
+    return m
+
+
+def lecturas(monitor, dev_id, desde, hasta, paso=1):
+    """Una lectura por `paso` segundos en [desde, hasta), con tick en cada una"""
+    t = desde
+    seq = 0
+    while t < hasta:
+        monitor.registrar_lote([{"ID": dev_id, "seq": seq}], ahora=t)
+        monitor.tick(ahora=t)
+        seq += 1
+        t += paso
+
+
+def avanzar(monitor, desde, hasta):
+    for t in range(desde, hasta + 1):
+        monitor.tick(ahora=t)
+
+
+# ==================== TimerWheel ====================
+def test_rueda_vence_en_su_tick():
+    rueda = TimerWheel(slots=8, resolucion=1.0, ahora=0)
+    rueda.schedule(3.2, "a")
+    assert rueda.advance(3.9) == []
+    assert rueda.advance(4.0) == ["a"]
+    assert rueda.advance(10.0) == []
+
+
+def test_rueda_deadline_mas_alla_de_una_vuelta():
+    rueda = TimerWheel(slots=8, resolucion=1.0, ahora=0)
+    rueda.schedule(20, "lejos")
+    # Pasa dos veces por la misma ranura antes de vencer
+    assert rueda.advance(12) == []
+    assert rueda.advance(19) == []
+    assert rueda.advance(20) == ["lejos"]
+
+
+def test_rueda_pausa_larga_no_pierde_entradas():
+    rueda = TimerWheel(slots=8, resolucion=1.0, ahora=0)
+    rueda.schedule(2, "a")
+    rueda.schedule(5, "b")
+    assert sorted(rueda.advance(1000)) == ["a", "b"]
+
+
+def test_rueda_deadline_pasado_vence_en_el_proximo_tick():
+    rueda = TimerWheel(slots=8, resolucion=1.0, ahora=10)
+    rueda.schedule(3, "tarde")
+    assert rueda.advance(11) == ["tarde"]
+
+
+# ==================== HealthMonitor ====================
+def test_primera_lectura_pasa_a_online(monitor):
+    monitor.registrar_lote([{"ID": "a", "seq": 1}], ahora=0)
+    assert monitor.estado("a") == ONLINE
+    assert monitor.registradas == [("a", OFFLINE, ONLINE)]
+
+
+def test_silencio_online_stale_offline(monitor):
+    lecturas(monitor, "a", 0, 20)
+    avanzar(monitor, 20, 200)
+
+    assert [t[2] for t in monitor.registradas] == [ONLINE, STALE, OFFLINE]
+    salud = monitor.salud("a")
+    assert salud.stale_after() == STALE_MIN_S
+    assert salud.offline_after() == OFFLINE_MIN_S
+    assert monitor.estado("a") == OFFLINE
+
+
+def test_online_stale_online_stale(monitor):
+    """Tras recuperarse de stale, el chequeo de stale se rearma (no espera al plazo offline)"""
+    lecturas(monitor, "a", 0, 20)
+    avanzar(monitor, 20, 30)
+    assert monitor.estado("a") == STALE
+
+    monitor.registrar_lote([{"ID": "a", "seq": 100}], ahora=32.5)
+    assert monitor.estado("a") == ONLINE
+    limite = 32.5 + monitor.salud("a").stale_after()
+
+    t = 33
+    while monitor.estado("a") == ONLINE and t < 120:
+        monitor.tick(ahora=t)
+        t += 1
+
+    assert monitor.estado("a") == STALE
+    # ~stale_after después de la última lectura, no al vencer el plazo offline
+    assert t - 1 <= limite + 1
+    assert [c[2] for c in monitor.registradas] == [ONLINE, STALE, ONLINE, STALE]
+
+
+def test_perdida_por_saltos_de_seq(monitor):
+    lote = [{"ID": "a", "seq": s} for s in (1, 2, 5, 6, 6, 1, 2, 4)]
+    monitor.registrar_lote(lote, ahora=0)
+    salud = monitor.salud("a")
+    # Faltan 3-4 y, tras el reinicio, 3; duplicadas y reinicios no cuentan
+    assert salud.perdidas == 2 + 1
+    assert salud.recibidas == len(lote)
+
+
+def test_umbrales_se_adaptan_al_intervalo(monitor):
+    lecturas(monitor, "lento", 0, 600, paso=30)
+    salud = monitor.salud("lento")
+    assert salud.intervalo == pytest.approx(30)
+    assert salud.stale_after() == pytest.approx(90)
+    assert salud.offline_after() == pytest.approx(300)
+    assert monitor.estado("lento") == ONLINE
+
+
+def test_quitar_descarta_el_dispositivo(monitor):
+    lecturas(monitor, "a", 0, 5)
+    monitor.quitar(["a"])
+    avanzar(monitor, 5, 200)
+    assert monitor.estado("a") is None
+    assert monitor.registradas == [("a", OFFLINE, ONLINE)]
+
+
+# ==================== LLEGADA POR LECTURA ====================
+WALL = 1_700_000_000.0
+
+
+def lote_recibido(dev_id, llegadas, seq=0):
+    """Lecturas de un dispositivo con su marca "Recibido" (reloj de pared)"""
+    return [{"ID": dev_id, "seq": seq + i, "Recibido": WALL + t} for i, t in enumerate(llegadas)]
+
+
+def test_lote_con_varias_lecturas_usa_su_llegada(monitor):
+    # El store agrupa: 4 lecturas separadas 0.5 s llegan en un solo lote
+    for k in range(10):
+        base = 2.0 * k
+        llegadas = [base + 0.5 * i for i in range(4)]
+        entrega = base + 1.6
+        monitor.registrar_lote(
+            lote_recibido("a", llegadas, seq=4 * k), ahora=entrega, ahora_wall=WALL + entrega
+        )
+
+    salud = monitor.salud("a")
+    assert salud.intervalo == pytest.approx(0.5)
+    assert salud.jitter == pytest.approx(0.0)
+    assert salud.percentil_ms(0.95) == 512
+    assert salud.ultima == pytest.approx(19.5)
+    assert salud.ultima_wall == pytest.approx(WALL + 19.5)
+    assert salud.perdidas == 0
+
+
+def test_misma_marca_de_llegada_no_cuenta_como_intervalo(monitor):
+    for t in range(10):
+        monitor.registrar_lote(lote_recibido("a", [t], seq=int(t)), ahora=t, ahora_wall=WALL + t)
+    # Varias lecturas de una misma lectura del puerto: comparten "Recibido"
+    monitor.registrar_lote(
+        lote_recibido("a", [10.0] * 5, seq=10), ahora=10.05, ahora_wall=WALL + 10.05
+    )
+
+    salud = monitor.salud("a")
+    assert salud.intervalo == pytest.approx(1.0)
+    assert salud.percentil_ms(0.95) == 1024
+    assert salud.recibidas == 15
+
+
+def test_stale_cuenta_desde_la_llegada_y_no_desde_el_lote(monitor):
+    monitor.registrar_lote(lote_recibido("a", [0.0]), ahora=0, ahora_wall=WALL)
+    # El lote se entrega tarde: la lectura llegó en t=1
+    monitor.registrar_lote(lote_recibido("a", [1.0], seq=1), ahora=4, ahora_wall=WALL + 4)
+    assert monitor.salud("a").ultima == pytest.approx(1.0)
+
+    avanzar(monitor, 4, 1 + int(STALE_MIN_S) + 1)
+    assert monitor.estado("a") == STALE
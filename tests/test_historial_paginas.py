@@ -0,0 +1,86 @@
+import random
+from datetime import datetime
+
+import pytest
+
+from ui.historial import historial_model
+from ui.historial.historial_model import MAX_PAGES, HistorialTableModel
+
+INICIO = datetime(2024, 3, 1, 8, 0).timestamp()
+
+
+@pytest.fixture
+def rango(device_service):
+    """800 lecturas de "a" con instantes repetidos (empates en ts_ms) y ruido de "b" """
+    rnd = random.Random(0)
+    filas = [
+        {"ID": "a", "T_Sonda": float(i), "seq": i, "Recibido": INICIO + i // 3}
+        for i in range(800)
+    ] + [
+        {"ID": "b", "T_Sonda": 0.0, "seq": i, "Recibido": INICIO + i}
+        for i in range(300)
+    ]
+    rnd.shuffle(filas)
+    device_service.save_device_data_batch(filas)
+
+    start_ms, end_ms = int((INICIO + 10) * 1000), int((INICIO + 250) * 1000)
+    esperado = device_service.db.execute_query("""
+        SELECT id, ts_ms FROM device_data
+        WHERE device_id = 'a' AND ts_ms BETWEEN ? AND ?
+        ORDER BY ts_ms DESC, id DESC
+    """, (start_ms, end_ms))
+    return start_ms, end_ms, [(r["ts_ms"], r["id"]) for r in esperado]
+
+
+def claves(filas):
+    return [(r["ts_ms"], r["id"]) for r in filas]
+
+
+# ==================== KEYSET ====================
+@pytest.mark.parametrize("limite", [1, 7, 50, 1000])
+def test_paginas_recorren_el_rango_sin_huecos_ni_repetidas(device_service, rango, limite):
+    start_ms, end_ms, esperado = rango
+    vistas, after = [], None
+    while True:
+        pagina = device_service.get_range_page("a", start_ms, end_ms, after, limite)
+        if not pagina:
+            break
+        assert len(pagina) <= limite
+        vistas += claves(pagina)
+        after = vistas[-1]
+    assert vistas == esperado
+    assert device_service.count_range("a", start_ms, end_ms) == len(esperado)
+
+
+def test_clave_por_posicion(device_service, rango):
+    start_ms, end_ms, esperado = rango
+    for offset in (0, 1, 99, len(esperado) - 1):
+        assert device_service.get_range_key("a", start_ms, end_ms, offset) == esperado[offset]
+    assert device_service.get_range_key("a", start_ms, end_ms, len(esperado)) is None
+
+
+# ==================== MODELO ====================
+def test_modelo_acceso_aleatorio_y_memoria_acotada(device_service, rango, monkeypatch):
+    monkeypatch.setattr(historial_model, "PAGE_SIZE", 16)
+    start_ms, end_ms, esperado = rango
+    modelo = HistorialTableModel(device_service)
+    modelo.set_range("a", start_ms, end_ms)
+    assert modelo.rowCount() == len(esperado)
+
+    # Saltos lejanos (sin páginas previas) y vuelta atrás
+    filas = [len(esperado) - 1, 0, 400, 17, 16, 15, 500, 3]
+    filas += random.Random(1).sample(range(len(esperado)), 100)
+    for fila in filas:
+        registro = modelo.record(fila)
+        assert (registro["ts_ms"], registro["id"]) == esperado[fila]
+        assert len(modelo._pages) <= MAX_PAGES
+
+    assert modelo.record(len(esperado)) is None
+
+
+def test_modelo_con_primera_pagina_precargada(device_service, rango):
+    start_ms, end_ms, esperado = rango
+    primera = device_service.get_range_page("a", start_ms, end_ms, None, historial_model.PAGE_SIZE)
+    modelo = HistorialTableModel(device_service)
+    modelo.set_range("a", start_ms, end_ms, total=len(esperado), first_page=primera)
+    assert [modelo.record(i)["id"] for i in range(len(esperado))] == [i for _, i in esperado]
@@ -0,0 +1,111 @@
+import threading
+
+from database.ingestion import DeviceIngestionPipeline
+
+
+def fila(device_id="a", seq=1):
+    return {"device_id": device_id, "seq": seq}
+
+
+def test_dedupe_por_device_y_seq():
+    p = DeviceIngestionPipeline(lambda rows: len(rows))
+    assert p.submit(fila("a", 1))
+    assert not p.submit(fila("a", 1))
+    assert p.submit(fila("b", 1))
+    assert p.submit(fila("a", None))
+    assert p.submit(fila("a", None))
+    assert p.stats()["duplicates"] == 1
+
+
+def test_cola_llena_no_marca_la_lectura_como_vista():
+    p = DeviceIngestionPipeline(lambda rows: len(rows), max_pending=1, put_timeout=0.01)
+    assert p.submit(fila("a", 1))
+    assert not p.submit(fila("a", 2))
+    assert p.stats()["dropped"] == 1
+
+    # Hay lugar otra vez: el reintento de seq 2 no es un duplicado
+    p._queue.get_nowait()
+    assert p.submit(fila("a", 2))
+    assert p.stats()["duplicates"] == 0
+
+
+def test_escritor_agrupa_y_flush_confirma():
+    escritas = []
+    lock = threading.Lock()
+
+    def escribir(rows):
+        with lock:
+            escritas.append(list(rows))
+        return len(rows)
+
+    p = DeviceIngestionPipeline(escribir, batch_size=100, flush_interval=5.0)
+    p.start()
+    try:
+        for i in range(250):
+            p.submit(fila("a", i))
+        assert p.flush(timeout=5)
+    finally:
+        p.stop()
+
+    assert sum(len(b) for b in escritas) == 250
+    assert max(len(b) for b in escritas) <= 100
+    assert p.stats()["written"] == 250
+
+
+def test_backpressure_avisa_una_vez_por_transicion():
+    avisos = []
+    p = DeviceIngestionPipeline(lambda rows: len(rows), max_pending=10, high_watermark=0.5)
+    p.add_backpressure_hook(lambda pending, capacity: avisos.append((pending, capacity)))
+    for i in range(8):
+        p.submit(fila("a", i))
+    assert avisos == [(5, 10)]
+    assert p.is_saturated()
+
+
+def test_lote_fallido_se_reintenta():
+    escritas = []
+    fallos = [RuntimeError("database is locked")]
+
+    def escribir(rows):
+        if fallos:
+            raise fallos.pop()
+        escritas.extend(rows)
+        return len(rows)
+
+    p = DeviceIngestionPipeline(escribir, retry_delay=0.01)
+    p.start()
+    try:
+        for i in range(10):
+            p.submit(fila("a", i))
+        assert p.flush(timeout=5)
+    finally:
+        p.stop()
+
+    assert [r["seq"] for r in escritas] == list(range(10))
+    assert p.stats()["written"] == 10
+    assert p.stats()["errors"] == 1
+    assert p.stats()["failed"] == 0
+
+
+def test_lote_perdido_avisa_y_olvida_los_seq():
+    avisos = []
+
+    def escribir(rows):
+        raise RuntimeError("database is locked")
+
+    p = DeviceIngestionPipeline(escribir, max_retries=2, retry_delay=0.01)
+    p.add_error_hook(lambda mensaje, filas: avisos.append(filas))
+    p.start()
+    try:
+        p.submit(fila("a", 1))
+        p.submit(fila("a", 2))
+        assert p.flush(timeout=5)
+    finally:
+        p.stop()
+
+    assert avisos == [2]
+    assert p.stats()["errors"] == 3
+    assert p.stats()["failed"] == 2
+    # El dispositivo reenvía: no se descarta como duplicado
+    assert p.submit(fila("a", 1))
+    assert p.stats()["duplicates"] == 0
@@ -0,0 +1,39 @@
+import itertools
+
+import numpy as np
+
+from ui.IA.logica_difusa import evaluar_riesgo_difuso, evaluar_riesgo_difuso_lote
+
+# Valores en y alrededor de los cortes de cada función de pertenencia
+PENDIENTES = [-0.05, -0.03, -0.02, -0.01, 0.0, 0.005, 0.01, 0.02, 0.03, 0.1]
+R2S = [0.0, 0.29, 0.3, 0.45, 0.6, 0.9, 1.0]
+VALORES = [0.5, 1.0, 1.5, 2.0, 5.0, 8.0, 8.5, 9.0, 12.0]
+
+
+def test_lote_igual_a_escalar():
+    casos = list(itertools.product(PENDIENTES, R2S, VALORES))
+    pendientes, r2s, valores = (list(c) for c in zip(*casos))
+
+    etiquetas, riesgos = evaluar_riesgo_difuso_lote(pendientes, r2s, valores, 2, 8)
+
+    assert len(etiquetas) == len(casos)
+    for (p, r2, v), etiqueta, riesgo in zip(casos, etiquetas, riesgos):
+        esperado, valor = evaluar_riesgo_difuso(p, r2, v, 2, 8)
+        assert etiqueta == esperado, (p, r2, v)
+        assert riesgo == valor
+
+
+def test_lote_limites_por_serie():
+    etiquetas, riesgos = evaluar_riesgo_difuso_lote(
+        [0.1, 0.1], [0.9, 0.9], [50.0, 50.0], [2, 30], [8, 70]
+    )
+    assert list(etiquetas) == [
+        evaluar_riesgo_difuso(0.1, 0.9, 50.0, 2, 8)[0],
+        evaluar_riesgo_difuso(0.1, 0.9, 50.0, 30, 70)[0],
+    ]
+
+
+def test_lote_vacio():
+    etiquetas, riesgos = evaluar_riesgo_difuso_lote([], [], [], 2, 8)
+    assert len(etiquetas) == 0
+    assert isinstance(riesgos, np.ndarray)
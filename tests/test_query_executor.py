@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+from PyQt6.QtCore import QCoreApplication
+
+from core.query_executor import CancelToken, QueryCancelled, QueryExecutor
+from database.db_service import get_db_service
+
+# Decenas de segundos: solo termina a tiempo si se interrumpe la conexión
+CONSULTA_LARGA = """
+WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 500000000)
+SELECT COUNT(*) AS n FROM c
+"""
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+@pytest.fixture
+def executor(qapp):
+    e = QueryExecutor(max_threads=1)
+    yield e
+    e.shutdown()
+    e.pool.waitForDone(5000)
+
+
+@pytest.fixture
+def db(tmp_path):
+    return get_db_service(str(tmp_path / "consultas.db"))
+
+
+def esperar(condicion, timeout=5.0):
+    fin = time.monotonic() + timeout
+    while not condicion():
+        if time.monotonic() > fin:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_token():
+    token = CancelToken()
+    token.check()
+    token.cancel()
+    assert token.cancelled
+    with pytest.raises(QueryCancelled):
+        token.check()
+
+
+# ==================== CANCELACIÓN ====================
+def test_cancelar_interrumpe_la_consulta_en_curso(executor, db):
+    arranco, terminado = threading.Event(), []
+
+    def scan(token, emit_partial):
+        arranco.set()
+        try:
+            db.execute_query(CONSULTA_LARGA)
+        except Exception as e:
+            terminado.append(str(e))
+            raise
+
+    executor.submit("historial", scan)
+    assert arranco.wait(5)
+    time.sleep(0.2)
+    executor.cancel("historial")
+
+    assert executor.pool.waitForDone(5000)
+    assert terminado == ["interrupted"]
+    assert not executor.is_running("historial")
+
+
+def test_pedido_nuevo_corta_al_anterior_y_libera_el_hilo(executor, db):
+    arranco, corridas = threading.Event(), []
+
+    def scan(token, emit_partial):
+        arranco.set()
+        # Como las consultas del historial: revisa el token entre bloques
+        while True:
+            token.check()
+            db.execute_query(CONSULTA_LARGA)
+
+    def rapida(token, emit_partial):
+        corridas.append(db.execute_one("SELECT 1 AS uno")["uno"])
+
+    executor.submit("historial", scan)
+    assert arranco.wait(5)
+    time.sleep(0.2)
+    # Con un solo hilo, la nueva solo corre si la vieja se interrumpió
+    executor.submit("historial", rapida)
+    assert esperar(lambda: corridas == [1])
+
+
+def test_pedido_en_cola_no_llega_a_correr(executor):
+    liberar, corridas = threading.Event(), []
+
+    def ocupar(token, emit_partial):
+        liberar.wait(5)
+
+    executor.submit("export", ocupar)
+    executor.submit("stats", lambda token, emit_partial: corridas.append("stats"))
+    executor.cancel("stats")
+    liberar.set()
+
+    assert executor.pool.waitForDone(5000)
+    assert corridas == []
+
+
+def test_cancelar_despues_de_terminar_no_toca_la_conexion(executor, db):
+    """El token suelta el hilo al terminar: no interrumpe la tarea siguiente"""
+    tokens, resultados = [], []
+
+    def primera(token, emit_partial):
+        tokens.append(token)
+        return db.execute_one("SELECT 1 AS uno")
+
+    def segunda(token, emit_partial):
+        tokens[0].cancel()
+        resultados.append(db.execute_one("SELECT COUNT(*) AS n FROM (SELECT 1 UNION SELECT 2)")["n"])
+
+    executor.submit("a", primera)
+    assert executor.pool.waitForDone(5000)
+    executor.submit("b", segunda)
+    assert executor.pool.waitForDone(5000)
+    assert resultados == [2]
@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from ui.IA.regresion import RegresionIncremental, regresion_lineal
+
+
+def serie(n, semilla=0):
+    rnd = random.Random(semilla)
+    return [20 + 0.05 * i + rnd.gauss(0, 0.3) for i in range(n)]
+
+
+@pytest.mark.parametrize("ventana", [3, 5, 10, 30])
+def test_incremental_igual_a_regresion_lineal(ventana):
+    valores = serie(300)
+    regresion = RegresionIncremental(ventana)
+    for i, v in enumerate(valores):
+        regresion.agregar(v)
+        esperado = regresion_lineal(valores[max(0, i + 1 - ventana):i + 1])
+        pendiente, r2 = regresion.resultado()
+        assert pendiente == pytest.approx(esperado[0], abs=1e-4)
+        assert r2 == pytest.approx(esperado[1], abs=1e-4)
+
+
+def test_incremental_pocas_muestras_y_serie_plana():
+    regresion = RegresionIncremental(10)
+    regresion.agregar(5.0)
+    regresion.agregar(5.0)
+    assert regresion.resultado() == (0.0, 0.0) == regresion_lineal([5.0, 5.0])
+    for _ in range(20):
+        regresion.agregar(5.0)
+    assert regresion.resultado() == regresion_lineal([5.0] * 10)
+
+
+def test_incremental_resincroniza_sin_deriva():
+    regresion = RegresionIncremental(10)
+    valores = serie(RegresionIncremental.RESYNC_CADA * 2 + 50, semilla=3)
+    for v in valores:
+        regresion.agregar(v + 1e6)
+    esperado = regresion_lineal([v + 1e6 for v in valores[-10:]])
+    assert regresion.resultado()[0] == pytest.approx(esperado[0], abs=1e-4)
+
+
+def test_media():
+    regresion = RegresionIncremental(4)
+    for v in (1, 2, 3, 4, 5, 6):
+        regresion.agregar(v)
+    assert regresion.media == pytest.approx(4.5)
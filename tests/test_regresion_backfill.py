@@ -0,0 +1,113 @@
+from datetime import datetime
+
+import pytest
+
+from database.timeutils import from_epoch_ms
+from ui.IA import regresion_backfill
+from ui.IA.regresion_backfill import _cubierto, backfill_device
+from ui.IA.regresion_service import MAX_INTERVAL, RegressionService
+
+INICIO = datetime(2024, 3, 1, 8, 0).timestamp()
+
+
+def guardar(service, desde, hasta, device_id="a"):
+    """Una lectura por segundo en [desde, hasta) (segundos desde INICIO)"""
+    service.save_device_data_batch([
+        {
+            "ID": device_id,
+            "T_Sonda": 4.0 + 0.02 * t + (0.3 if t % 7 == 0 else 0.0),
+            "Hum": 50.0 + (t % 11),
+            "seq": t,
+            "Recibido": INICIO + t,
+        }
+        for t in range(desde, hasta)
+    ])
+
+
+def resultados(device_id="a", sensor="T_Sonda"):
+    rows = RegressionService().db.execute_query(
+        "SELECT timestamp FROM regression_results WHERE device_id = ? AND sensor = ? ORDER BY timestamp",
+        (device_id, sensor)
+    )
+    return [datetime.fromisoformat(r["timestamp"]).timestamp() - INICIO for r in rows]
+
+
+def hasta(segundos):
+    return int((INICIO + segundos) * 1000)
+
+
+# ==================== TRAMOS CUBIERTOS EN VIVO ====================
+def test_cubierto_requiere_resultado_antes_y_despues():
+    margen = int(MAX_INTERVAL * 1000)
+    guardados = [10_000, 10_000 + margen - 1]
+    assert _cubierto(guardados, 10_000)
+    assert _cubierto(guardados, 20_000)
+    assert not _cubierto(guardados, 9_000)
+    assert not _cubierto(guardados, 10_000 + margen + 5)
+    assert not _cubierto([], 10_000)
+
+
+# ==================== BACKFILL ====================
+def test_llena_el_hueco_antes_de_resultados_en_vivo(device_service):
+    # 0..600 s con la app cerrada, 600..1200 s con el dashboard guardando cada 30 s
+    guardar(device_service, 0, 1200)
+    vivos = [600 + 30 * k for k in range(20)]
+    RegressionService().save_results([
+        {
+            "device_id": "a", "sensor": sensor, "window_size": 10,
+            "slope": 0.02, "r2": 0.9, "prediction": 0.0,
+            "trend": "Estable", "risk_level": "Alto",
+            "timestamp": from_epoch_ms(int((INICIO + t) * 1000)),
+        }
+        for t in vivos for sensor in ("T_Sonda", "Hum")
+    ])
+
+    stats = backfill_device("a", hasta_ms=hasta(1200))
+
+    assert stats["rows"] == 1200
+    tiempos = resultados()
+    hueco = [t for t in tiempos if t < vivos[0]]
+    # La política guarda cada serie al menos cada MAX_INTERVAL (reloj de los datos)
+    assert len(hueco) >= vivos[0] // MAX_INTERVAL
+    assert hueco[0] < MAX_INTERVAL
+    # Dentro del tramo en vivo no se agregó nada
+    assert [t for t in tiempos if vivos[0] <= t <= vivos[-1]] == pytest.approx(vivos)
+
+
+def test_retoma_desde_la_marca_de_agua(device_service):
+    guardar(device_service, 0, 300)
+    primera = backfill_device("a", hasta_ms=hasta(300))
+    antes = resultados()
+
+    guardar(device_service, 300, 500)
+    segunda = backfill_device("a", hasta_ms=hasta(500))
+    despues = resultados()
+
+    assert primera["rows"] == 300
+    assert segunda["rows"] == 200
+    assert despues[:len(antes)] == antes
+    assert all(t >= 300 for t in despues[len(antes):])
+    assert len(set(despues)) == len(despues)
+
+    marca = RegressionService().get_watermark("a")
+    ultima = device_service.db.execute_one("SELECT MAX(id) AS id FROM device_data")
+    assert marca["last_id"] == ultima["id"]
+    assert marca["last_ts_ms"] == hasta(499)
+
+
+def test_no_pasa_del_corte(device_service):
+    guardar(device_service, 0, 100)
+    stats = backfill_device("a", hasta_ms=hasta(49))
+    assert stats["rows"] == 50
+    assert RegressionService().get_watermark("a")["last_ts_ms"] == hasta(49)
+    assert max(resultados()) <= 49
+
+
+def test_corrida_no_arranca_con_la_app_abierta(device_service):
+    guardar(device_service, 0, 10)
+    RegressionService().save_result({
+        "device_id": "a", "sensor": "T_Sonda", "window_size": 5, "slope": 0.0,
+        "r2": 0.0, "prediction": 4.0, "trend": "Estable", "risk_level": "Bajo",
+    })
+    assert regresion_backfill._app_activa(RegressionService().db)
+    assert regresion_backfill.run_backfill() == []
@@ -0,0 +1,84 @@
+import pytest
+
+from ui.IA.regresion_service import (
+    MAX_INTERVAL, PREDICTION_DELTA, R2_DELTA, SLOPE_DELTA, RegressionService, RegressionThrottle
+)
+
+
+def resultado(device_id="a", sensor="T_Sonda", **cambios):
+    r = {
+        "device_id": device_id, "sensor": sensor, "window_size": 10,
+        "slope": 0.01, "r2": 0.5, "prediction": 5.0,
+        "trend": "Estable", "risk_level": "Medio", "fuzzy_risk": "bajo", "fuzzy_score": 0.2,
+    }
+    r.update(cambios)
+    return r
+
+
+# ==================== POLÍTICA ====================
+def test_primer_resultado_de_cada_serie_se_guarda():
+    throttle = RegressionThrottle()
+    assert throttle.should_write(resultado(), 0)
+    assert throttle.should_write(resultado(sensor="Hum"), 0)
+    assert throttle.should_write(resultado(device_id="b"), 0)
+
+
+def test_sin_cambios_se_descarta_hasta_max_interval():
+    throttle = RegressionThrottle()
+    assert throttle.should_write(resultado(), 0)
+    for t in range(1, int(MAX_INTERVAL)):
+        assert not throttle.should_write(resultado(slope=0.01 + SLOPE_DELTA / 2), t)
+    assert throttle.should_write(resultado(), MAX_INTERVAL)
+
+
+@pytest.mark.parametrize("cambio", [
+    {"slope": 0.01 + 1.5 * SLOPE_DELTA},
+    {"r2": 0.5 + 1.5 * R2_DELTA},
+    {"prediction": 5.0 + 1.5 * PREDICTION_DELTA},
+    {"trend": "Subiendo"},
+    {"fuzzy_risk": "alto"},
+])
+def test_cambio_suficiente_se_guarda(cambio):
+    throttle = RegressionThrottle()
+    throttle.should_write(resultado(), 0)
+    assert throttle.should_write(resultado(**cambio), 1)
+
+
+def test_compara_contra_la_ultima_fila_guardada():
+    """La deriva lenta se acumula: se compara con lo escrito, no con lo último visto"""
+    throttle = RegressionThrottle()
+    throttle.should_write(resultado(slope=0.0), 0)
+    escritos = [
+        t for t in range(1, 10)
+        if throttle.should_write(resultado(slope=t * SLOPE_DELTA * 0.4), t)
+    ]
+    assert escritos == [3, 6, 9]
+
+
+def test_forget_por_dispositivo():
+    throttle = RegressionThrottle()
+    throttle.should_write(resultado("a"), 0)
+    throttle.should_write(resultado("b"), 0)
+    throttle.forget("a")
+    assert throttle.should_write(resultado("a"), 1)
+    assert not throttle.should_write(resultado("b"), 1)
+
+
+# ==================== ESCRITURA EN LOTE ====================
+def test_submit_acumula_y_flush_escribe(device_service):
+    service = RegressionService(batch_size=1000)
+    for t in range(120):
+        service.submit_result(resultado(), now=t)
+    assert service.db.execute_one("SELECT COUNT(*) AS n FROM regression_results")["n"] == 0
+
+    assert service.flush() == 2
+    assert service.flush() == 0
+    assert service.db.execute_one("SELECT COUNT(*) AS n FROM regression_results")["n"] == 2
+
+
+def test_lote_lleno_se_escribe_solo(device_service):
+    service = RegressionService(batch_size=3)
+    for i in range(4):
+        service.submit_result(resultado(device_id=str(i)), now=0)
+    assert service.db.execute_one("SELECT COUNT(*) AS n FROM regression_results")["n"] == 3
+    assert len(service._pending) == 1
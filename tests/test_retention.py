@@ -0,0 +1,88 @@
+import csv
+import gzip
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from database.retention import RetentionEngine
+
+AHORA = datetime.now().replace(microsecond=0)
+
+
+def guardar(service, dias_atras, n, paso_min=30, device_id="a"):
+    """n lecturas cada paso_min minutos desde hace `dias_atras` días"""
+    desde = AHORA - timedelta(days=dias_atras)
+    service.save_device_data_batch([
+        {
+            "ID": device_id, "T_Sonda": 4.0 + i % 5, "Hum": 50.0, "seq": i,
+            "Recibido": (desde + timedelta(minutes=paso_min * i)).timestamp(),
+        }
+        for i in range(n)
+    ])
+
+
+def archivadas(carpeta: Path):
+    filas = []
+    for path in sorted(carpeta.glob("*.csv.gz")):
+        with gzip.open(path, "rt", newline="", encoding="utf-8") as f:
+            filas += [(path.name, fila) for fila in csv.DictReader(f)]
+    return filas
+
+
+def contar(service, tabla="device_data"):
+    return service.db.execute_one(f"SELECT COUNT(*) AS n FROM {tabla}")["n"]
+
+
+@pytest.fixture
+def motor(device_service, tmp_path):
+    return RetentionEngine(
+        device_service, retention_days=30, archive_dir=tmp_path / "archivo",
+        chunk_size=50, chunk_pause=0
+    )
+
+
+# ==================== PODA ====================
+def test_archiva_y_borra_lo_vencido_por_bloques(device_service, motor):
+    guardar(device_service, 40, 48 * 3)            # 3 días vencidos
+    guardar(device_service, 5, 48, device_id="b")  # 1 día vigente
+    rollups_antes = contar(device_service, "device_rollup")
+    latest_antes = device_service.get_latest_all_devices()
+
+    resultado = motor.run_once()
+
+    assert resultado["deleted"] == 48 * 3
+    assert contar(device_service) == 48
+    assert {r["device_id"] for r in device_service.db.execute_query(
+        "SELECT device_id FROM device_data")} == {"b"}
+
+    filas = archivadas(motor.archive_dir)
+    assert len(filas) == 48 * 3
+    assert len(resultado["files"]) == len({nombre for nombre, _ in filas}) >= 3
+    # Cada archivo tiene solo filas de su día, con las columnas de device_data
+    for nombre, fila in filas:
+        assert fila["timestamp"].startswith(nombre[:10])
+        assert fila["device_id"] == "a"
+
+    # El histórico agregado y la última lectura por dispositivo se conservan
+    assert contar(device_service, "device_rollup") == rollups_antes
+    assert device_service.get_latest_all_devices() == latest_antes
+
+
+def test_segunda_corrida_no_duplica_archivos(device_service, motor):
+    guardar(device_service, 40, 10)
+    motor.run_once()
+    assert motor.run_once() == {"deleted": 0, "files": []}
+
+    # Lo que vence después se agrega al mismo archivo del día
+    guardar(device_service, 40, 10, paso_min=1)
+    assert motor.run_once()["deleted"] == 10
+    assert len(archivadas(motor.archive_dir)) == 20
+
+
+def test_delete_old_data_no_archiva(device_service, tmp_path):
+    guardar(device_service, 40, 10)
+    guardar(device_service, 1, 10, device_id="b")
+    assert device_service.delete_old_data(days=30) == 10
+    assert contar(device_service) == 10
+    assert not (tmp_path / "data" / "archive").exists()
@@ -0,0 +1,75 @@
+import pytest
+
+from core.search_index import SearchIndex, get_search_index, normalizar
+
+
+@pytest.fixture
+def indice():
+    i = SearchIndex()
+    i.add("1", ["Vacuna Biológica", "Refrigerador A", 12])
+    i.add("2", ["Jeringa", "Bodega central", None])
+    i.add("3", ["Termómetro clínico", "Refrigerador B", ""])
+    return i
+
+
+def test_normalizar_quita_acentos_y_mayusculas():
+    assert normalizar("Biológico ÑANDÚ") == "biologico nandu"
+    assert normalizar(None) == ""
+    assert normalizar(42) == "42"
+
+
+def test_consulta_vacia_no_filtra(indice):
+    assert indice.search("") is None
+    assert indice.search("   ") is None
+
+
+def test_subcadena_sin_acentos(indice):
+    assert indice.search("biolog") == {"1"}
+    assert indice.search("BIOLÓG") == {"1"}
+    assert indice.search("termometro") == {"3"}
+
+
+def test_todos_los_terminos_deben_coincidir(indice):
+    assert indice.search("refrigerador") == {"1", "3"}
+    assert indice.search("refrigerador clinico") == {"3"}
+    assert indice.search("refrigerador jeringa") == set()
+
+
+def test_terminos_cortos(indice):
+    # Menos de 3 letras: sin trigramas, recorre los textos
+    assert indice.search("a") == {"1", "2", "3"}
+    assert indice.search("12") == {"1"}
+    assert indice.search("b 12") == {"1"}
+
+
+def test_no_cruza_campos(indice):
+    # "a" final de un campo + "re" del siguiente no forma "are"
+    assert indice.search("biologicarefri") == set()
+
+
+def test_sin_coincidencias(indice):
+    assert indice.search("zzz") == set()
+
+
+def test_actualizar_y_quitar(indice):
+    indice.update("2", ["Jeringa", "Refrigerador C"])
+    assert indice.search("refrigerador") == {"1", "2", "3"}
+    assert indice.search("bodega") == set()
+
+    indice.remove("1")
+    assert "1" not in indice
+    assert len(indice) == 2
+    assert indice.search("vacuna") == set()
+    assert indice.search("refrigerador") == {"2", "3"}
+
+
+def test_rebuild_reemplaza_todo(indice):
+    indice.rebuild([("x", ["Otro"])])
+    assert len(indice) == 1
+    assert indice.search("refrigerador") == set()
+    assert indice.search("otro") == {"x"}
+
+
+def test_indice_compartido_por_tipo():
+    assert get_search_index("tests") is get_search_index("tests")
+    assert get_search_index("tests") is not get_search_index("tests-otro")
@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+from ui.IA.regresion import regresion_lineal
+from ui.IA.tendencias import MotorTendencias
+
+
+def serie(n, semilla=0):
+    rnd = random.Random(semilla)
+    return [20 + 0.05 * i + rnd.gauss(0, 0.3) for i in range(n)]
+
+
+def test_motor_tendencias_igual_a_regresion_lineal():
+    motor = MotorTendencias(ventana=10, capacidad=2)
+    series = {("a", "T_Sonda"): serie(37, 1), ("b", "Hum"): serie(8, 2), ("c", "Luz"): serie(4, 3)}
+    for (dev, sensor), valores in series.items():
+        for v in valores:
+            motor.agregar(dev, sensor, v)
+
+    resultados = {(r["device_id"], r["sensor"]): r for r in motor.evaluar(min_muestras=5)}
+    # "c" no llega a min_muestras
+    assert set(resultados) == {("a", "T_Sonda"), ("b", "Hum")}
+    for clave, r in resultados.items():
+        ventana = series[clave][-10:]
+        pendiente, r2 = regresion_lineal(ventana)
+        assert r["slope"] == pytest.approx(pendiente, abs=1e-4)
+        assert r["r2"] == pytest.approx(r2, abs=1e-4)
+        assert r["valor"] == ventana[-1]
+        # Fórmula de predicción del análisis original del dashboard
+        media = sum(ventana) / len(ventana)
+        assert r["prediction"] == pytest.approx(r["slope"] * (len(ventana) + 5) + media)
+
+    # Sin lecturas nuevas no hay nada que recalcular
+    assert motor.evaluar(min_muestras=5) == []
@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+import pytest
+
+from database.timeutils import (
+    SQL_EPOCH_MS, epoch_ms_from_unix, from_epoch_ms, register_sql_functions, to_epoch_ms
+)
+
+ZONAS = ["UTC", "America/Santiago", "Europe/Madrid"]
+
+
+@pytest.fixture(params=ZONAS)
+def zona(request, monkeypatch):
+    """Hora local del proceso (y de SQLite) en la zona indicada"""
+    monkeypatch.setenv("TZ", request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+
+def epoch_sql(conn, timestamp):
+    return conn.execute(f"SELECT {SQL_EPOCH_MS.format(col='?')}", (timestamp,)).fetchone()[0]
+
+
+def instantes():
+    """Dos años cada ~97 min (pasa por todos los cambios de horario), con milisegundos"""
+    inicio = int(datetime(2023, 1, 1).timestamp() * 1000)
+    return range(inicio, inicio + 2 * 365 * 86_400_000, 97 * 60_000 + 123)
+
+
+# ==================== SQL = PYTHON ====================
+def test_sql_y_python_coinciden(zona):
+    conn = sqlite3.connect(":memory:")
+    register_sql_functions(conn)
+    for ms in instantes():
+        timestamp = from_epoch_ms(ms)
+        assert epoch_sql(conn, timestamp) == to_epoch_ms(timestamp), timestamp
+    assert epoch_sql(conn, None) is None
+
+
+def test_hora_repetida_al_salir_del_verano(monkeypatch):
+    monkeypatch.setenv("TZ", "Europe/Madrid")
+    time.tzset()
+    try:
+        conn = sqlite3.connect(":memory:")
+        register_sql_functions(conn)
+        # 02:30 existe dos veces el 29/10/2023
+        assert epoch_sql(conn, "2023-10-29T02:30:00") == to_epoch_ms("2023-10-29T02:30:00")
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_ida_y_vuelta_en_utc(monkeypatch):
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    try:
+        for ms in instantes():
+            assert to_epoch_ms(from_epoch_ms(ms)) == ms
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+# ==================== FILAS DE device_data ====================
+def test_ts_ms_sale_de_la_llegada(zona, device_service):
+    recibido = datetime(2023, 10, 29, 0, 30).timestamp()
+    for i in range(6):
+        llegada = recibido + i * 1800.25
+        fila = device_service._build_row({"ID": "a", "Recibido": llegada})
+        assert fila["ts_ms"] == epoch_ms_from_unix(llegada)
+        assert fila["timestamp"] == datetime.fromtimestamp(llegada).isoformat()
+
+
+def test_migracion_rellena_ts_ms_como_python(zona, tmp_path, monkeypatch):
+    from database import latest_cache
+    from database.devices_service import DeviceDataService
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(latest_cache, "_latest_cache", None)
+    os.mkdir("data")
+    # BD anterior a ts_ms
+    conn = sqlite3.connect("data/device_data.db")
+    conn.execute("""
+        CREATE TABLE device_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, device_id TEXT NOT NULL,
+            temp_sonda REAL, temp_amb REAL, humedad REAL, luz REAL, aceleracion REAL,
+            bateria REAL, alarma TEXT, activo INTEGER, punto_rocio REAL, seq INTEGER,
+            timestamp TEXT NOT NULL, synced INTEGER DEFAULT 0, last_sync TEXT
+        )
+    """)
+    timestamps = [from_epoch_ms(ms) for ms in instantes()][::20] + ["2023-10-29T02:30:00"]
+    conn.executemany(
+        "INSERT INTO device_data (device_id, timestamp) VALUES ('a', ?)",
+        [(t,) for t in timestamps]
+    )
+    conn.commit()
+    conn.close()
+
+    service = DeviceDataService()
+    filas = service.db.execute_query("SELECT timestamp, ts_ms FROM device_data")
+    assert len(filas) == len(timestamps)
+    for fila in filas:
+        assert fila["ts_ms"] == to_epoch_ms(fila["timestamp"]), fila["timestamp"]
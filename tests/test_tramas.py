@@ -0,0 +1,118 @@
+import binascii
+import json
+
+import pytest
+
+from core.sensores.tramas import (
+    MAX_TRAMA, PAYLOAD_V1, SYNC, ExtractorTramas, codificar_binaria, decodificar_binaria
+)
+
+LECTURA = {
+    "ID": "42",
+    "T_Sonda": 4.25,
+    "T_Amb": -3.5,
+    "Hum": 61.37,
+    "Luz": 120.0,
+    "seq": 123456.0,
+    "Aceleracion": 0.98,
+    "Bat": 3.712,
+    "Activo": True,
+    "Alarma": "A",
+}
+
+
+def linea(**d) -> bytes:
+    return json.dumps(d).encode() + b"\n"
+
+
+# ==================== CODIFICACIÓN BINARIA ====================
+def test_trama_binaria_ida_y_vuelta():
+    trama = codificar_binaria(LECTURA)
+    assert trama[:2] == SYNC
+    assert trama[2] == PAYLOAD_V1.size
+    assert len(trama) == 2 + 1 + PAYLOAD_V1.size + 2
+
+    lectura = decodificar_binaria(trama, 3)
+    for clave, valor in LECTURA.items():
+        assert lectura[clave] == pytest.approx(valor), clave
+    assert lectura["Rocio"] is not None
+
+
+def test_crc_cubre_largo_y_payload():
+    trama = codificar_binaria(LECTURA)
+    crc = trama[-2] | (trama[-1] << 8)
+    assert crc == binascii.crc_hqx(trama[2:-2], 0xFFFF)
+
+
+def test_valores_ausentes():
+    lectura = decodificar_binaria(codificar_binaria({"ID": "7", "seq": 1}), 3)
+    for clave in ("T_Sonda", "T_Amb", "Hum", "Luz", "Aceleracion", "Bat", "Rocio"):
+        assert lectura[clave] is None, clave
+    assert lectura["Activo"] is False
+    assert lectura["Alarma"] == "N"
+
+
+def test_version_desconocida():
+    trama = bytearray(codificar_binaria(LECTURA))
+    trama[3] = 99
+    assert decodificar_binaria(trama, 3) is None
+
+
+# ==================== EXTRACTOR ====================
+def test_extractor_json_y_binario_mezclados():
+    e = ExtractorTramas()
+    datos = (
+        linea(id="1", ts=5.0, h=50)
+        + codificar_binaria(LECTURA)
+        + linea(id="2", ts=6.0)
+    )
+    lecturas = e.alimentar(datos)
+    assert [l["ID"] for l in lecturas] == ["1", "42", "2"]
+    assert e.lineas == 2 and e.binarias == 1 and e.fallos == 0
+
+
+def test_extractor_trama_partida_en_varios_chunks():
+    e = ExtractorTramas()
+    datos = codificar_binaria(LECTURA) + linea(id="3")
+    lecturas = []
+    for i in range(len(datos)):
+        lecturas += e.alimentar(datos[i:i + 1])
+    assert [l["ID"] for l in lecturas] == ["42", "3"]
+    assert e.fallos == 0
+
+
+def test_extractor_crc_incorrecto_resincroniza():
+    e = ExtractorTramas()
+    mala = bytearray(codificar_binaria(LECTURA))
+    mala[-1] ^= 0xFF
+    lecturas = e.alimentar(bytes(mala) + codificar_binaria({**LECTURA, "ID": "9"}))
+    assert [l["ID"] for l in lecturas] == ["9"]
+    assert e.fallos >= 1
+
+
+def test_extractor_basura_antes_de_trama_binaria():
+    e = ExtractorTramas()
+    lecturas = e.alimentar(b"ruido" + codificar_binaria(LECTURA))
+    assert [l["ID"] for l in lecturas] == ["42"]
+    assert e.fallos == 1
+
+
+def test_extractor_json_invalido_y_sin_id():
+    e = ExtractorTramas()
+    lecturas = e.alimentar(b"{no json}\n" + linea(ts=1.0) + linea(id="5"))
+    assert [l["ID"] for l in lecturas] == ["5"]
+    assert e.fallos == 2
+
+
+def test_extractor_descarta_buffer_sin_separador():
+    e = ExtractorTramas()
+    assert e.alimentar(b"x" * (MAX_TRAMA + 1)) == []
+    assert e.alimentar(linea(id="1"))[0]["ID"] == "1"
+
+
+def test_extractor_lote_grande_de_json():
+    e = ExtractorTramas()
+    datos = b"".join(linea(id=str(i % 50), seq=i) for i in range(20000))
+    lecturas = e.alimentar(datos)
+    assert len(lecturas) == 20000
+    assert lecturas[-1]["seq"] == 19999
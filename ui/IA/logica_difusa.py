@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def fuzzify_slope(p):
     if abs(p) < 0.01:
         return 0.1
@@ -36,3 +39,49 @@ def evaluar_riesgo_difuso(pendiente, r2, valor_actual, minimo, maximo):
         return "medio", riesgo
     else:
         return "alto", riesgo
+
+
+# ==========================
+# EVALUACIÓN POR LOTES (arrays)
+# ==========================
+ETIQUETAS_RIESGO = np.array(["bajo", "medio", "alto"])
+
+
+def fuzzify_slope_lote(p):
+    a = np.abs(p)
+    return np.where(a < 0.01, 0.1, np.where(a < 0.03, 0.5, 1.0))
+
+
+def fuzzify_r2_lote(r2):
+    return np.where(r2 < 0.3, 0.2, np.where(r2 < 0.6, 0.6, 1.0))
+
+
+def fuzzify_proximity_lote(valor, minimo, maximo):
+    dentro = (minimo <= valor) & (valor <= maximo)
+    cerca = ((minimo - 1) <= valor) & (valor <= (maximo + 1))
+    return np.where(dentro, 0.2, np.where(cerca, 0.6, 1.0))
+
+
+def evaluar_riesgo_difuso_lote(pendientes, r2s, valores, minimos, maximos):
+    """
+    Igual que evaluar_riesgo_difuso para N series a la vez.
+    minimos/maximos pueden ser escalares o un array por serie.
+
+    Returns:
+        (etiquetas, riesgos): arrays de str ("bajo"/"medio"/"alto") y float
+    """
+    pendientes = np.asarray(pendientes, dtype=np.float64)
+    r2s = np.asarray(r2s, dtype=np.float64)
+    valores = np.asarray(valores, dtype=np.float64)
+    minimos = np.asarray(minimos, dtype=np.float64)
+    maximos = np.asarray(maximos, dtype=np.float64)
+
+    s = fuzzify_slope_lote(pendientes)
+    c = fuzzify_r2_lote(r2s)
+    p = fuzzify_proximity_lote(valores, minimos, maximos)
+
+    riesgo = (0.4 * s) + (0.3 * c) + (0.3 * p)
+
+    # 0 = bajo (< 0.35), 1 = medio (< 0.7), 2 = alto
+    nivel = (riesgo >= 0.35).astype(np.intp) + (riesgo >= 0.7)
+    return ETIQUETAS_RIESGO[nivel], riesgo
@@ -1,3 +1,5 @@
+import math
+from collections import deque
 from typing import List, Tuple
 
 def regresion_lineal(valores: List[float]) -> Tuple[float, float]:
@@ -30,3 +32,88 @@ def regresion_lineal(valores: List[float]) -> Tuple[float, float]:
     r2 = 1 - (ss_res / ss_tot) if ss_tot else 0.0
 
     return round(m, 4), round(r2, 4)
+
+
+class RegresionIncremental:
+    """
+    Regresión lineal sobre una ventana deslizante, O(1) por muestra.
+
+    Igual que regresion_lineal: x = orden de llegada dentro de la ventana
+    (0..n-1). Como x siempre es 0..n-1, Σx y Σx² salen en forma cerrada;
+    se mantienen Σy, Σy² y Σxy, que al expulsar la muestra más vieja
+    (todas las x bajan en 1) se corrigen con Σxy -= Σy.
+    """
+
+    # Cada cuántas expulsiones se recalculan las sumas desde la ventana
+    # para que el error de redondeo acumulado no crezca sin límite
+    RESYNC_CADA = 4096
+
+    def __init__(self, ventana: int):
+        self.valores = deque(maxlen=ventana)
+        self._sy = 0.0
+        self._syy = 0.0
+        self._sxy = 0.0
+        self._expulsiones = 0
+
+    def __len__(self) -> int:
+        return len(self.valores)
+
+    def agregar(self, y: float):
+        y = float(y)
+        if len(self.valores) == self.valores.maxlen:
+            viejo = self.valores.popleft()
+            self._sy -= viejo
+            self._syy -= viejo * viejo
+            self._sxy -= self._sy
+            self._expulsiones += 1
+
+        self._sxy += len(self.valores) * y
+        self._sy += y
+        self._syy += y * y
+        self.valores.append(y)
+
+        if self._expulsiones >= self.RESYNC_CADA:
+            self._resincronizar()
+
+    def _resincronizar(self):
+        self._sy = math.fsum(self.valores)
+        self._syy = math.fsum(v * v for v in self.valores)
+        self._sxy = math.fsum(i * v for i, v in enumerate(self.valores))
+        self._expulsiones = 0
+
+    def limpiar(self):
+        self.valores.clear()
+        self._sy = self._syy = self._sxy = 0.0
+        self._expulsiones = 0
+
+    @property
+    def media(self) -> float:
+        n = len(self.valores)
+        return self._sy / n if n else 0.0
+
+    def ajuste(self) -> Tuple[float, float, float]:
+        """(pendiente, intercepto, R²) sin redondear; (0, media, 0) con menos de 3 muestras"""
+        n = len(self.valores)
+        if n < 3:
+            return 0.0, self.media, 0.0
+
+        sx = n * (n - 1) / 2
+        sxx = (n - 1) * n * (2 * n - 1) / 6
+
+        den = sxx - sx * sx / n
+        num = self._sxy - sx * self._sy / n
+        ss_tot = self._syy - self._sy * self._sy / n
+
+        m = num / den
+        b = (self._sy - m * sx) / n
+
+        # ss_tot ~ 0 (serie plana) se trata como en regresion_lineal
+        if ss_tot <= 1e-12 * max(1.0, self._syy):
+            return m, b, 0.0
+        r2 = (num * num) / (den * ss_tot)
+        return m, b, min(1.0, max(0.0, r2))
+
+    def resultado(self) -> Tuple[float, float]:
+        """(pendiente, R²) redondeados, mismo contrato que regresion_lineal"""
+        m, _, r2 = self.ajuste()
+        return round(m, 4), round(r2, 4)
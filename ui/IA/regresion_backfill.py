@@ -0,0 +1,287 @@
+"""
+Backfill de regression_results desde el histórico de device_data.
+
+Recorre cada dispositivo por bloques (keyset sobre ts_ms, id), calcula la
+regresión de ventana deslizante con RegresionIncremental y el riesgo difuso
+por lotes, y guarda con executemany solo lo que pasa la política de
+persistencia (RegressionThrottle, con el reloj de los datos). La marca de
+agua por dispositivo (regression_watermark) hace que volver a correrlo solo
+procese lo nuevo.
+Cada dispositivo va a un proceso distinto.
+
+La corrida retoma siempre desde la marca de agua: también llena los huecos
+anteriores a los resultados que escribió el dashboard en vivo (lecturas con
+la app cerrada). Para no duplicar esos resultados se saltan las lecturas que
+caen dentro de un tramo cubierto en vivo: las que tienen un resultado
+guardado a menos de MAX_INTERVAL antes y después (mientras corre, el dashboard
+guarda cada serie activa al menos cada MAX_INTERVAL).
+Está pensado para correr con la app cerrada: si hay resultados de hace menos
+de LIVE_GUARD_S se aborta salvo --force, y aun así solo se procesan lecturas
+anteriores al inicio de la corrida.
+
+Uso:
+    python -m ui.IA.regresion_backfill [--workers N] [--device ID ...] [--reset] [--force]
+"""
+
+import argparse
+import bisect
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from database.db_service import get_db_service
+from database.timeutils import from_epoch_ms, now_ms, to_epoch_ms
+from ui.IA.logica_difusa import evaluar_riesgo_difuso_lote
+from ui.IA.regresion import RegresionIncremental
+from ui.IA.regresion_service import (
+    MAX_INTERVAL, RegressionService, RegressionThrottle, risk_label, trend_label
+)
+from ui.IA.tendencias import LIMITES_SENSOR
+
+DB_PATH = "data/device_data.db"
+
+# Mismos parámetros que el análisis en vivo del dashboard
+VENTANA = 10
+MIN_MUESTRAS = 5
+HORIZONTE = 5
+
+# Filas de device_data por bloque (una transacción de escritura por bloque)
+CHUNK_SIZE = 5000
+
+# Un resultado más nuevo que esto indica que el dashboard está escribiendo
+# (la política de persistencia guarda cada serie activa al menos cada 60 s)
+LIVE_GUARD_S = 120
+
+# Columna de device_data de cada sensor con límites definidos
+SENSOR_COLUMNS = {
+    "T_Sonda": "temp_sonda",
+    "Hum": "humedad",
+}
+
+WATERMARK_UPSERT = """
+INSERT INTO regression_watermark (device_id, last_ts_ms, last_id, updated_at)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (device_id) DO UPDATE SET
+    last_ts_ms = excluded.last_ts_ms,
+    last_id = excluded.last_id,
+    updated_at = excluded.updated_at
+"""
+
+
+def _prime(db, device_id: str, column: str, regresion: RegresionIncremental,
+           last_ts: int, last_id: int):
+    """Recarga la ventana con las últimas lecturas ya procesadas (corrida incremental)"""
+    rows = db.execute_query(f"""
+        SELECT {column} AS valor FROM device_data
+        WHERE device_id = ? AND {column} IS NOT NULL
+        AND (ts_ms < ? OR (ts_ms = ? AND id <= ?))
+        ORDER BY ts_ms DESC, id DESC
+        LIMIT ?
+    """, (device_id, last_ts, last_ts, last_id, regresion.valores.maxlen))
+    for row in reversed(rows):
+        regresion.agregar(row["valor"])
+
+
+def _resultados_guardados(db, device_id: str, desde_ms: int, hasta_ms: int) -> Dict[str, List[int]]:
+    """ts_ms ordenados de los resultados ya guardados por sensor, con MAX_INTERVAL de margen"""
+    margen = int(MAX_INTERVAL * 1000)
+    guardados = {}
+    for sensor in SENSOR_COLUMNS:
+        # Rango sobre el texto ISO: usa idx_reg_device_time (device_id, sensor, timestamp)
+        rows = db.execute_query("""
+            SELECT timestamp FROM regression_results
+            WHERE device_id = ? AND sensor = ? AND timestamp BETWEEN ? AND ?
+        """, (device_id, sensor, from_epoch_ms(desde_ms - margen), from_epoch_ms(hasta_ms + margen)))
+        guardados[sensor] = sorted(to_epoch_ms(row["timestamp"]) for row in rows)
+    return guardados
+
+
+def _cubierto(guardados: List[int], ts_ms: int) -> bool:
+    """Hay un resultado guardado a menos de MAX_INTERVAL antes y otro después"""
+    margen = MAX_INTERVAL * 1000
+    i = bisect.bisect_left(guardados, ts_ms)
+    if i < len(guardados) and guardados[i] == ts_ms:
+        return True
+    antes = i > 0 and ts_ms - guardados[i - 1] < margen
+    despues = i < len(guardados) and guardados[i] - ts_ms < margen
+    return antes and despues
+
+
+def _score(results: List[Dict]):
+    """Riesgo difuso de todo el bloque en una sola llamada vectorizada"""
+    if not results:
+        return
+    etiquetas, scores = evaluar_riesgo_difuso_lote(
+        [r["slope"] for r in results],
+        [r["r2"] for r in results],
+        [r.pop("_valor") for r in results],
+        [LIMITES_SENSOR[r["sensor"]][0] for r in results],
+        [LIMITES_SENSOR[r["sensor"]][1] for r in results]
+    )
+    for r, riesgo, score in zip(results, etiquetas, scores):
+        r["fuzzy_risk"] = str(riesgo)
+        r["fuzzy_score"] = float(score)
+
+
+def backfill_device(device_id: str, db_path: str = DB_PATH,
+                    chunk_size: int = CHUNK_SIZE, hasta_ms: Optional[int] = None) -> Dict:
+    """
+    Procesa un dispositivo desde su marca de agua hasta hasta_ms, sin repetir
+    los tramos que ya tienen resultados en vivo.
+    Corre en un proceso del pool: abre sus propias conexiones.
+    """
+    service = RegressionService(db_path)
+    db = service.db
+    hasta_ms = now_ms() if hasta_ms is None else hasta_ms
+
+    regresiones = {sensor: RegresionIncremental(VENTANA) for sensor in SENSOR_COLUMNS}
+    throttle = RegressionThrottle()
+    watermark = service.get_watermark(device_id)
+    last_ts, last_id = (
+        (watermark["last_ts_ms"], watermark["last_id"]) if watermark else (-1, 0)
+    )
+
+    if last_ts >= 0:
+        for sensor, column in SENSOR_COLUMNS.items():
+            _prime(db, device_id, column, regresiones[sensor], last_ts, last_id)
+
+    columns = ", ".join(f"{c} AS {s}" for s, c in SENSOR_COLUMNS.items())
+    read = written = 0
+
+    while True:
+        rows = db.execute_query(f"""
+            SELECT id, ts_ms, timestamp, {columns} FROM device_data
+            WHERE device_id = ?
+            AND (ts_ms > ? OR (ts_ms = ? AND id > ?))
+            AND ts_ms <= ?
+            ORDER BY ts_ms, id
+            LIMIT ?
+        """, (device_id, last_ts, last_ts, last_id, hasta_ms, chunk_size))
+        if not rows:
+            break
+
+        guardados = _resultados_guardados(db, device_id, rows[0]["ts_ms"], rows[-1]["ts_ms"])
+        results = []
+        for row in rows:
+            for sensor, regresion in regresiones.items():
+                valor = row[sensor]
+                if valor is None:
+                    continue
+                regresion.agregar(valor)
+                n = len(regresion)
+                # La ventana avanza igual; el resultado ya lo guardó el dashboard
+                if n < MIN_MUESTRAS or _cubierto(guardados[sensor], row["ts_ms"]):
+                    continue
+
+                slope, r2 = regresion.resultado()
+                results.append({
+                    "device_id": device_id,
+                    "sensor": sensor,
+                    "window_size": n,
+                    "slope": slope,
+                    "r2": r2,
+                    "prediction": slope * (n + HORIZONTE) + regresion.media,
+                    "trend": trend_label(slope),
+                    "risk_level": risk_label(r2),
+                    "timestamp": row["timestamp"],
+                    "_valor": valor,
+                    "_now": row["ts_ms"] / 1000,
+                })
+        _score(results)
+        results = [r for r in results if throttle.should_write(r, r.pop("_now"))]
+
+        last_ts, last_id = rows[-1]["ts_ms"], rows[-1]["id"]
+        # Resultados y marca de agua en la misma transacción: un corte no duplica filas
+        with db.get_connection() as conn:
+            conn.executemany(RegressionService.INSERT_QUERY, results)
+            conn.execute(WATERMARK_UPSERT, (
+                device_id, last_ts, last_id, datetime.now().isoformat()
+            ))
+            conn.commit()
+
+        read += len(rows)
+        written += len(results)
+
+    return {"device_id": device_id, "rows": read, "results": written}
+
+
+def _app_activa(db) -> bool:
+    """Hay resultados recientes: el dashboard está corriendo contra esta BD"""
+    row = db.execute_one("SELECT MAX(timestamp) AS ts FROM regression_results")
+    return bool(row and row["ts"]) and now_ms() - to_epoch_ms(row["ts"]) < LIVE_GUARD_S * 1000
+
+
+def run_backfill(device_ids: Optional[Sequence[str]] = None, workers: Optional[int] = None,
+                 reset: bool = False, db_path: str = DB_PATH, force: bool = False) -> List[Dict]:
+    """Backfill de todos los dispositivos (o los indicados) en un pool de procesos"""
+    # Solo lectura de device_data: sin DeviceDataService (no arranca la ingesta)
+    db = get_db_service(db_path)
+    columns = {row["name"] for row in db.execute_query("PRAGMA table_info(device_data)")}
+    if "ts_ms" not in columns:
+        print("[BACKFILL] device_data sin ts_ms: abrir la app una vez para migrar la BD")
+        return []
+
+    service = RegressionService(db_path)
+    if _app_activa(db) and not force:
+        print(
+            f"[BACKFILL] Hay resultados de hace menos de {LIVE_GUARD_S}s: la app parece "
+            f"abierta. Cerrarla o usar --force"
+        )
+        return []
+
+    device_ids = list(device_ids or [
+        row["device_id"] for row in db.execute_query(
+            "SELECT DISTINCT device_id FROM device_data ORDER BY device_id"
+        )
+    ])
+    if reset:
+        for device_id in device_ids:
+            service.clear_watermarks(device_id)
+            service.db.execute_update(
+                "DELETE FROM regression_results WHERE device_id = ?", (device_id,)
+            )
+
+    if not device_ids:
+        return []
+
+    # Corte común: lo que llegue durante la corrida queda para el análisis en vivo
+    hasta_ms = now_ms()
+    workers = min(workers or os.cpu_count() or 1, len(device_ids))
+    stats = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(backfill_device, device_id, db_path, CHUNK_SIZE, hasta_ms): device_id
+            for device_id in device_ids
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[BACKFILL] Error en dispositivo {futures[future]}: {e}")
+                continue
+            print(
+                f"[BACKFILL] Dispositivo {result['device_id']}: "
+                f"{result['rows']} lecturas → {result['results']} resultados"
+            )
+            stats.append(result)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill de regression_results")
+    parser.add_argument("--workers", type=int, default=None, help="procesos (por defecto: núcleos)")
+    parser.add_argument("--device", nargs="*", default=None, help="solo estos device_id")
+    parser.add_argument("--reset", action="store_true", help="borra resultados y marca de agua antes")
+    parser.add_argument("--force", action="store_true", help="corre aunque la app parezca abierta")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    stats = run_backfill(args.device, args.workers, args.reset, force=args.force)
+    total = sum(s["results"] for s in stats)
+    print(f"[BACKFILL] {total} resultados en {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,102 @@
+import time
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from database.db_service import get_db_service
 
+# Política de persistencia: una serie se guarda solo si cambió lo suficiente
+# o si pasó MAX_INTERVAL desde su última fila
+SLOPE_DELTA = 0.005
+R2_DELTA = 0.05
+PREDICTION_DELTA = 0.25
+MAX_INTERVAL = 60.0
+
+# Resultados pendientes que disparan una escritura aunque no se llame flush()
+BATCH_SIZE = 200
+
+
+def trend_label(slope: float) -> str:
+    return (
+        "Subiendo" if slope > 0.02 else
+        "Bajando" if slope < -0.02 else
+        "Estable"
+    )
+
+
+def risk_label(r2: float) -> str:
+    return (
+        "Alto" if r2 > 0.5 else
+        "Medio" if r2 > 0.2 else
+        "Bajo"
+    )
+
+
+class RegressionThrottle:
+    """Decide por serie (device_id, sensor) si un resultado merece una fila"""
+
+    def __init__(
+        self,
+        slope_delta: float = SLOPE_DELTA,
+        r2_delta: float = R2_DELTA,
+        prediction_delta: float = PREDICTION_DELTA,
+        max_interval: float = MAX_INTERVAL
+    ):
+        self.slope_delta = slope_delta
+        self.r2_delta = r2_delta
+        self.prediction_delta = prediction_delta
+        self.max_interval = max_interval
+        self._last: Dict[Tuple[str, str], Tuple[float, Dict]] = {}
+
+    def should_write(self, data: Dict, now: float) -> bool:
+        """
+        Args:
+            data: resultado (slope, r2, prediction, trend, fuzzy_risk)
+            now: segundos epoch del resultado (reloj real o del dato en un backfill)
+        """
+        key = (data["device_id"], data["sensor"])
+        last = self._last.get(key)
+        if last is not None:
+            written_at, prev = last
+            unchanged = (
+                now - written_at < self.max_interval
+                and abs(data["slope"] - prev["slope"]) < self.slope_delta
+                and abs((data.get("r2") or 0) - (prev.get("r2") or 0)) < self.r2_delta
+                and abs((data.get("prediction") or 0) - (prev.get("prediction") or 0)) < self.prediction_delta
+                and data.get("trend") == prev.get("trend")
+                and data.get("fuzzy_risk") == prev.get("fuzzy_risk")
+            )
+            if unchanged:
+                return False
+        self._last[key] = (now, data)
+        return True
+
+    def forget(self, device_id: Optional[str] = None):
+        if device_id is None:
+            self._last.clear()
+        else:
+            for key in [k for k in self._last if k[0] == device_id]:
+                del self._last[key]
+
 
 class RegressionService:
     """Servicio para almacenar resultados de regresión lineal"""
 
-    def __init__(self):
-        self.db = get_db_service("data/device_data.db")
+    INSERT_QUERY = """
+    INSERT INTO regression_results (
+        device_id, sensor, window_size,
+        slope, r2, prediction,
+        trend, risk_level, fuzzy_risk, fuzzy_score, timestamp
+    ) VALUES (
+        :device_id, :sensor, :window_size,
+        :slope, :r2, :prediction,
+        :trend, :risk_level, :fuzzy_risk, :fuzzy_score, :timestamp
+    )
+    """
+
+    def __init__(self, db_path: str = "data/device_data.db", batch_size: int = BATCH_SIZE):
+        self.db = get_db_service(db_path)
+        self.throttle = RegressionThrottle()
+        self.batch_size = batch_size
+        self._pending: List[Dict] = []
         self._init_db()
 
     def _init_db(self):
@@ -23,30 +112,71 @@ class RegressionService:
                 prediction REAL,
                 trend TEXT,
                 risk_level TEXT,
+                fuzzy_risk TEXT,
+                fuzzy_score REAL,
                 timestamp TEXT NOT NULL
             )
             """)
+
+            # BDs anteriores: columnas del riesgo difuso
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(regression_results)")}
+            for column, kind in (("fuzzy_risk", "TEXT"), ("fuzzy_score", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE regression_results ADD COLUMN {column} {kind}")
+
             conn.execute("""
             CREATE INDEX IF NOT EXISTS idx_reg_device_time
             ON regression_results (device_id, sensor, timestamp DESC)
             """)
+
+            # Marca de agua del backfill (ver ui.IA.regresion_backfill)
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS regression_watermark (
+                device_id TEXT PRIMARY KEY,
+                last_ts_ms INTEGER NOT NULL,
+                last_id INTEGER NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """)
             conn.commit()
 
-    def save_result(self, data: Dict) -> int:
+    @staticmethod
+    def _normalize(data: Dict) -> Dict:
         data.setdefault("timestamp", datetime.now().isoformat())
+        data.setdefault("fuzzy_risk", None)
+        data.setdefault("fuzzy_score", None)
+        return data
 
-        query = """
-        INSERT INTO regression_results (
-            device_id, sensor, window_size,
-            slope, r2, prediction,
-            trend, risk_level, timestamp
-        ) VALUES (
-            :device_id, :sensor, :window_size,
-            :slope, :r2, :prediction,
-            :trend, :risk_level, :timestamp
+    def save_result(self, data: Dict) -> int:
+        return self.db.execute_insert(self.INSERT_QUERY, self._normalize(data))
+
+    def save_results(self, results: List[Dict]) -> int:
+        """Inserta varios resultados en una sola transacción"""
+        if not results:
+            return 0
+        return self.db.execute_insert_batch(
+            self.INSERT_QUERY, [self._normalize(r) for r in results]
         )
+
+    def submit_result(self, data: Dict, now: Optional[float] = None) -> bool:
+        """
+        Flujo continuo de resultados: aplica la política de persistencia y
+        acumula lo que pasa; se escribe en lote con flush() (o al llenar el lote).
+
+        Returns:
+            True si el resultado quedó pendiente de escritura
         """
-        return self.db.execute_insert(query, data)
+        if not self.throttle.should_write(data, time.time() if now is None else now):
+            return False
+        self._pending.append(self._normalize(data))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        return True
+
+    def flush(self) -> int:
+        """Escribe los resultados pendientes en una sola transacción"""
+        pending, self._pending = self._pending, []
+        return self.save_results(pending)
 
     def get_latest(self, device_id: str, sensor: str) -> Optional[Dict]:
         query = """
@@ -56,3 +186,17 @@ class RegressionService:
         LIMIT 1
         """
         return self.db.execute_one(query, (device_id, sensor))
+
+    # ==================== BACKFILL ====================
+    def get_watermark(self, device_id: str) -> Optional[Dict]:
+        return self.db.execute_one(
+            "SELECT * FROM regression_watermark WHERE device_id = ?", (device_id,)
+        )
+
+    def clear_watermarks(self, device_id: Optional[str] = None):
+        if device_id:
+            self.db.execute_update(
+                "DELETE FROM regression_watermark WHERE device_id = ?", (device_id,)
+            )
+        else:
+            self.db.execute_update("DELETE FROM regression_watermark")
@@ -0,0 +1,182 @@
+"""
+Motor de tendencias vectorizado para todos los dispositivos y sensores.
+
+Cada serie (device_id, sensor) es una fila de una matriz NumPy preasignada
+que funciona como buffer circular. Las lecturas solo escriben una celda;
+en cada tick evaluar() calcula pendiente, R² y predicción de todas las
+series modificadas en una sola pasada.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ui.IA.logica_difusa import evaluar_riesgo_difuso_lote
+
+# Rango aceptable por sensor (alimenta la proximidad de la lógica difusa)
+LIMITES_SENSOR: Dict[str, Tuple[float, float]] = {
+    "T_Sonda": (2, 8),
+    "Hum": (30, 70),
+}
+
+
+class MotorTendencias:
+    """Regresión lineal por ventana deslizante para N series a la vez"""
+
+    def __init__(self, ventana: int = 10, capacidad: int = 256, horizonte: int = 5):
+        """
+        Args:
+            ventana: muestras por serie (x = orden de llegada, como regresion_lineal)
+            capacidad: series preasignadas (se duplica si se supera)
+            horizonte: término de la predicción pendiente * (n + horizonte) + media
+        """
+        self.ventana = ventana
+        self.horizonte = horizonte
+
+        self._valores = np.zeros((capacidad, ventana), dtype=np.float64)
+        self._conteo = np.zeros(capacidad, dtype=np.int64)
+        self._cabeza = np.zeros(capacidad, dtype=np.int64)   # próxima columna a escribir
+        self._sucio = np.zeros(capacidad, dtype=bool)
+
+        self._filas: Dict[Tuple[str, str], int] = {}
+        self._claves: List[Tuple[str, str]] = []
+
+        # x = 0..ventana-1 precomputado para el cálculo por lotes
+        self._columnas = np.arange(ventana, dtype=np.int64)
+
+    # ==================== INGESTA ====================
+    def _fila(self, clave: Tuple[str, str]) -> int:
+        fila = self._filas.get(clave)
+        if fila is None:
+            fila = len(self._claves)
+            if fila == len(self._conteo):
+                self._crecer()
+            self._filas[clave] = fila
+            self._claves.append(clave)
+        return fila
+
+    def _crecer(self):
+        capacidad = len(self._conteo) * 2
+        extra = capacidad - len(self._conteo)
+        self._valores = np.vstack([self._valores, np.zeros((extra, self.ventana))])
+        self._conteo = np.concatenate([self._conteo, np.zeros(extra, dtype=np.int64)])
+        self._cabeza = np.concatenate([self._cabeza, np.zeros(extra, dtype=np.int64)])
+        self._sucio = np.concatenate([self._sucio, np.zeros(extra, dtype=bool)])
+
+    def agregar(self, device_id: str, sensor: str, valor: Optional[float]):
+        """Escribe una lectura en el buffer de su serie (O(1), sin cálculo)"""
+        if valor is None:
+            return
+        fila = self._fila((str(device_id), sensor))
+        cabeza = self._cabeza[fila]
+        self._valores[fila, cabeza] = valor
+        self._cabeza[fila] = (cabeza + 1) % self.ventana
+        if self._conteo[fila] < self.ventana:
+            self._conteo[fila] += 1
+        self._sucio[fila] = True
+
+    def quitar_dispositivo(self, device_id: str):
+        """Vacía las series de un dispositivo (las filas se reutilizan si vuelve)"""
+        for clave, fila in self._filas.items():
+            if clave[0] == str(device_id):
+                self._conteo[fila] = 0
+                self._cabeza[fila] = 0
+                self._sucio[fila] = False
+
+    # ==================== CÁLCULO POR LOTES ====================
+    def evaluar(self, min_muestras: int = 5, solo_modificadas: bool = True) -> List[Dict]:
+        """
+        Regresión de todas las series (o solo las que recibieron datos desde
+        el último tick) con al menos min_muestras lecturas.
+
+        Returns:
+            [{"device_id", "sensor", "n", "slope", "intercept", "r2",
+              "prediction", "valor"}, ...] con slope/r2 redondeados a 4
+              decimales como regresion_lineal
+        """
+        total = len(self._claves)
+        conteo = self._conteo[:total]
+        seleccion = conteo >= min_muestras
+        if solo_modificadas:
+            seleccion &= self._sucio[:total]
+            self._sucio[:total] = False
+
+        filas = np.flatnonzero(seleccion)
+        if not len(filas):
+            return []
+
+        y = self._valores[filas]
+        n = conteo[filas]
+        cabeza = self._cabeza[filas]
+
+        # Posición temporal de cada celda: 0 = la más vieja de la ventana
+        inicio = (cabeza - n) % self.ventana
+        x = (self._columnas[None, :] - inicio[:, None]) % self.ventana
+        validas = x < n[:, None]
+        x = np.where(validas, x, 0).astype(np.float64)
+        y = np.where(validas, y, 0.0)
+
+        nf = n.astype(np.float64)
+        sx = nf * (nf - 1) / 2
+        sxx = (nf - 1) * nf * (2 * nf - 1) / 6
+        sy = y.sum(axis=1)
+        syy = (y * y).sum(axis=1)
+        sxy = (x * y).sum(axis=1)
+
+        den = sxx - sx * sx / nf
+        num = sxy - sx * sy / nf
+        ss_tot = syy - sy * sy / nf
+
+        pendiente = num / den
+        intercepto = (sy - pendiente * sx) / nf
+        plana = ss_tot <= 1e-12 * np.maximum(1.0, syy)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r2 = np.where(plana, 0.0, (num * num) / (den * ss_tot))
+        r2 = np.clip(r2, 0.0, 1.0)
+
+        ultimo = self._valores[filas, (cabeza - 1) % self.ventana]
+
+        pendiente = np.round(pendiente, 4)
+        r2 = np.round(r2, 4)
+
+        # Misma fórmula que el análisis original del dashboard
+        # (pendiente * (n + horizonte) + media), para no cambiar el
+        # significado de regression_results.prediction
+        prediccion = pendiente * (nf + self.horizonte) + sy / nf
+
+        resultados = []
+        for i, fila in enumerate(filas.tolist()):
+            device_id, sensor = self._claves[fila]
+            resultados.append({
+                "device_id": device_id,
+                "sensor": sensor,
+                "n": int(n[i]),
+                "slope": float(pendiente[i]),
+                "intercept": float(intercepto[i]),
+                "r2": float(r2[i]),
+                "prediction": float(prediccion[i]),
+                "valor": float(ultimo[i]),
+            })
+        return resultados
+
+
+def evaluar_riesgos(
+    resultados: List[Dict],
+    limites: Dict[str, Tuple[float, float]] = LIMITES_SENSOR
+) -> List[Dict]:
+    """Agrega risk/score difuso a cada serie cuyo sensor tiene límites definidos (una llamada por lote)"""
+    series = [r for r in resultados if r["sensor"] in limites]
+    if not series:
+        return []
+
+    etiquetas, scores = evaluar_riesgo_difuso_lote(
+        [r["slope"] for r in series],
+        [r["r2"] for r in series],
+        [r["valor"] for r in series],
+        [limites[r["sensor"]][0] for r in series],
+        [limites[r["sensor"]][1] for r in series]
+    )
+    return [
+        {**r, "risk": str(riesgo), "score": float(score)}
+        for r, riesgo, score in zip(series, etiquetas, scores)
+    ]
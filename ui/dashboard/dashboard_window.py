@@ -2,18 +2,22 @@ from PyQt6.QtWidgets import (
     QWidget, QHBoxLayout, QVBoxLayout, QFrame, QPushButton,
     QStackedWidget, QSizePolicy, QGridLayout, QLabel, QMessageBox, QScrollArea
 )
-from PyQt6.QtCore import Qt, QPropertyAnimation, QEasingCurve
+from PyQt6.QtCore import Qt, QPropertyAnimation, QEasingCurve, QTimer
 from PyQt6.QtGui import QCursor, QPixmap
 
-from collections import deque
 import datetime
 
-from core.sensores.esp32_worker import ESP32Worker
-from ui.IA.regresion import regresion_lineal
+from core.sensores.esp32_manager import ESP32AcquisitionManager
+from ui.IA.tendencias import MotorTendencias, evaluar_riesgos
+from ui.IA.regresion import RegresionIncremental
+from ui.IA.logica_difusa import evaluar_riesgo_difuso
 from database.devices_service import get_device_service
-from ui.IA.regresion_service import RegressionService
+from core.device_store import get_device_store
+from core.health_monitor import OFFLINE, get_health_monitor
+from ui.IA.regresion_service import RegressionService, risk_label, trend_label
 
 from ui.widgets.grafica import RealtimeChart
+from ui.dashboard.ui_scheduler import UIScheduler
 
 from ui.devices.devices_window import DevicesPage
 from ui.users.users_page import UsersPage
@@ -21,8 +25,6 @@ from ui.insumos.insumos_page import InsumosPage
 from ui.rutas.vehiculos_page import VehiculosPage
 from ui.historial.historial_page import HistorialPage
 from ui.historial.historial_buffer import HistorialBuffer
-from ui.IA.logica_difusa import evaluar_riesgo_difuso
-
 
 
 class Dashboard(QWidget):
@@ -54,16 +56,33 @@ class Dashboard(QWidget):
         self.registros_alert = 0
 
         # ==========================
-        # BUFFER REGRESIÓN
+        # TENDENCIAS (todas las series device×sensor, un cálculo por tick)
+        # ==========================
+        self.tendencias = MotorTendencias(ventana=10)
+        self.riesgo_tendencia = {}   # (device_id, sensor) -> "bajo"/"medio"/"alto"
+        # Ventana de T_Sonda por dispositivo para la alerta crítica de cada lectura
+        self.temp_regresion = {}     # device_id -> RegresionIncremental
+
+        self.timer_tendencias = QTimer(self)
+        self.timer_tendencias.timeout.connect(self._tick_tendencias)
+        self.timer_tendencias.start(1000)
+
+        # ==========================
+        # REFRESCO DE UI (estado sucio aplicado a tasa fija)
         # ==========================
-        self.temp_buffer = deque(maxlen=10)
+        self.ui = UIScheduler(self)
 
         # ==========================
-        # WORKER ESP32
+        # ADQUISICIÓN ESP32 (N puertos)
         # ==========================
-        self.worker = ESP32Worker()
-        self.worker.data_received.connect(self.on_sensor_data)
-        self.worker._running = True
+        # El store ingiere (y persiste) cada lote una sola vez; el dashboard
+        # y las demás páginas se suscriben a él
+        self.worker = ESP32AcquisitionManager(self)
+        self.device_store = get_device_store()
+        self.device_store.attach(self.worker)
+        self.device_store.readings.connect(self.on_sensor_batch)
+        self.health = get_health_monitor()
+        self.health.transiciones.connect(self._on_transiciones_conexion)
         self.worker.start()
 
         # ==========================
@@ -118,6 +137,10 @@ class Dashboard(QWidget):
         self.menu_animation.setDuration(250)
         self.menu_animation.setEasingCurve(QEasingCurve.Type.InOutCubic)
 
+        self.ui.registrar("badges", lambda _: self.actualizar_badges())
+        self.ui.registrar("alertas", self._aplicar_alertas, acumular=True)
+        self.ui.start()
+
     # ==========================
     # ESTILOS
     # ==========================
@@ -248,6 +271,7 @@ class Dashboard(QWidget):
         for i, title in enumerate(kpi_titles):
             card, lbl_value = self._build_kpi_card(title)
             self.kpi_cards[title] = lbl_value
+            self.ui.registrar(f"kpi:{title}", lbl_value.setText)
             row, col = divmod(i, 3)
             kpi_grid.addWidget(card, row, col)
 
@@ -255,7 +279,7 @@ class Dashboard(QWidget):
 
         # 🔥 SOLO GRÁFICAS (sin tarjeta intermedia)
         self.temp_chart = RealtimeChart("Temperatura", "°C")
-        self.hum_chart = RealtimeChart("Humedad", "%")
+        self.hum_chart = RealtimeChart("Humedad", "%", min_span=5.0)
 
         center.addWidget(self.temp_chart)
         center.addWidget(self.hum_chart)
@@ -326,15 +350,24 @@ class Dashboard(QWidget):
         return panel
 
     def _agregar_alerta_visual(self, texto, nivel):
+        """Encola la alerta; se inserta en el próximo tick de UI"""
+        self.ui.marcar("alertas", (texto, nivel))
+
+    def _aplicar_alertas(self, alertas):
+        # Solo caben 20: de una ráfaga no se crean widgets que se borrarían enseguida
+        for texto, nivel in alertas[-20:]:
+            self._insertar_alerta(texto, nivel)
+
+    def _insertar_alerta(self, texto, nivel):
         color = {"warn": "#ff9800", "alert": "#f44336"}.get(nivel, "#999")
         lbl = QLabel(texto)
         lbl.setWordWrap(True)
         lbl.setStyleSheet(f"color:{color}; font-size:12px; padding: 3px;")
         
-        # Limitar a 20 alertas máximo
-        count = self.alerts_container.count()
-        if count >= 20:
-            item = self.alerts_container.itemAt(count - 1)
+        # Limitar a 20 alertas máximo (takeAt: el layout las suelta ya,
+        # no al procesar deleteLater, así un tick con varias no se pasa)
+        while self.alerts_container.count() >= 20:
+            item = self.alerts_container.takeAt(self.alerts_container.count() - 1)
             if item and item.widget():
                 item.widget().deleteLater()
         
@@ -364,75 +397,103 @@ class Dashboard(QWidget):
         except Exception:
             return "--"
 
+    def _tick_tendencias(self):
+        """Regresión + riesgo difuso de todas las series que recibieron datos"""
+        resultados = evaluar_riesgos(self.tendencias.evaluar(min_muestras=5))
+        ahora = datetime.datetime.now().isoformat()
+
+        for r in resultados:
+            clave = (r["device_id"], r["sensor"])
+            anterior = self.riesgo_tendencia.get(clave)
+            self.riesgo_tendencia[clave] = r["risk"]
+
+            trend = trend_label(r["slope"])
+
+            self.regresion_service.submit_result({
+                "device_id": r["device_id"],
+                "sensor": r["sensor"],
+                "window_size": r["n"],
+                "slope": r["slope"],
+                "r2": r["r2"],
+                "prediction": r["prediction"],
+                "trend": trend,
+                "risk_level": risk_label(r["r2"]),
+                "fuzzy_risk": r["risk"],
+                "fuzzy_score": r["score"],
+                "timestamp": ahora
+            })
+
+            # Avisar al entrar en riesgo alto (no en cada tick mientras siga)
+            if r["risk"] == "alto" and anterior != "alto" and r["sensor"] == "T_Sonda":
+                self._agregar_alerta_visual(
+                    f"[Prevencion] Riesgo alto de aumento de temperatura "
+                    f"(dispositivo {r['device_id']}): ({trend}) °C",
+                    "alert"
+                )
+
+        # Lo que pasó la política de persistencia, en una sola transacción
+        self.regresion_service.flush()
+
+    def _on_transiciones_conexion(self, transiciones: list):
+        """Aviso cuando un dispositivo pasa a offline (según el monitor de salud)"""
+        for dev_id, _, nuevo in transiciones:
+            if nuevo != OFFLINE:
+                continue
+            stats = self.health.estadisticas(dev_id) or {}
+            mensaje = (
+                f"Dispositivo {dev_id} sin señal "
+                f"(pérdida {stats.get('perdida_pct', 0.0):.1f}%)"
+            )
+            hora = datetime.datetime.now().strftime("%H:%M:%S")
+            self._agregar_alerta_visual(f"[{hora}] {mensaje}", "warn")
+            HistorialBuffer.agregar("Conexión", "warn", mensaje)
+
+    def _set_kpi(self, title, text):
+        self.ui.marcar(f"kpi:{title}", text)
+
+    def on_sensor_batch(self, lote: list):
+        """Lecturas de un lote ya ingeridas (y encoladas para la BD) por el DeviceStore"""
+        for datos in lote:
+            # Una lectura mal formada no descarta el resto del lote
+            try:
+                self.on_sensor_data(datos)
+            except Exception as e:
+                print(f"[DASHBOARD] Error procesando lectura {datos!r}: {e}")
+
     def on_sensor_data(self, datos: dict):
-        # GUARDAR EN BASE DE DATOS
-        try:
-            self.device_service.save_device_data(datos)
-        except Exception as e:
-            print(f"[ERROR BD] No se pudo guardar sensor data: {e}")
-        
         estado = "ok"
         current_time = datetime.datetime.now().strftime("%H:%M:%S")
+        dev_id = str(datos.get("ID"))
+
+        # Solo escribe en el buffer de cada serie; el cálculo va en el tick
+        for sensor in ("T_Sonda", "T_Amb", "Hum", "Luz", "Aceleracion", "Bat"):
+            self.tendencias.agregar(dev_id, sensor, datos.get(sensor))
         
         if "ID" in datos:
-            self.kpi_cards["ID"].setText(str(datos["ID"]))
+            self._set_kpi("ID", str(datos["ID"]))
 
         if "T_Sonda" in datos:
             t = datos["T_Sonda"]
-            self.kpi_cards["Temp Ambiente"].setText(self._format_safe(t, ".2f", "°C"))
+            self._set_kpi("Temp Ambiente", self._format_safe(t, ".2f", "°C"))
             self.temp_chart.update_value(t)
 
-            self.temp_buffer.append(t)
-
-            if len(self.temp_buffer) >= 5:
-                y = list(self.temp_buffer)
-
-                pendiente, r2 =regresion_lineal(y)
-
-                riesgo, score = evaluar_riesgo_difuso(
-                    pendiente=pendiente,
-                    r2=r2,
-                    valor_actual=t,
-                    minimo=2,
-                    maximo=8
-                )
-
-                trend = (
-                    "Subiendo" if pendiente > 0.02 else
-                    "Bajando" if pendiente < -0.02 else
-                    "Estable"
-                )
-
-                risk = (
-                    "Alto" if r2 > 0.5 else
-                    "Medio" if r2 > 0.2 else
-                    "Bajo"
-                )
-
-                prediction = pendiente * (len(y) + 5) + sum(y) / len(y)
-
-                self.regresion_service.save_result({
-                    "device_id": str(datos.get("ID")),
-                    "sensor": "T_Sonda",
-                    "window_size": len(y),
-                    "slope": pendiente,
-                    "r2": r2,
-                    "prediction": prediction,
-                    "trend": trend,
-                    "risk_level": risk,
-                    "timestamp": datetime.datetime.now().isoformat()
-                })
-
-                # Evaluar y notificar sólo si la lógica difusa devolvió un riesgo
-                if riesgo and str(riesgo).lower() == "alto":
-                    self._agregar_alerta_visual(
-                        f"[Prevencion] Riesgo alto de aumento de temperatura: ({trend}) °C",
-                        "alert"
+            if t is not None:
+                regresion = self.temp_regresion.get(dev_id)
+                if regresion is None:
+                    regresion = self.temp_regresion[dev_id] = RegresionIncremental(10)
+                regresion.agregar(t)
+
+                # Riesgo difuso evaluado con ESTA lectura (O(1)); solo hace
+                # falta si la temperatura está fuera de rango
+                fuera = self.evaluar_estado(t, 2, 8, 1)
+                riesgo = None
+                if fuera != "ok" and len(regresion) >= 5:
+                    pendiente, r2 = regresion.resultado()
+                    riesgo, _ = evaluar_riesgo_difuso(
+                        pendiente=pendiente, r2=r2, valor_actual=t, minimo=2, maximo=8
                     )
-
-                    regresion_lineal(list(self.temp_buffer))
-
-                    estado = self.evaluar_estado(t, 2, 8, 1)
+                if riesgo and str(riesgo).lower() == "alto":
+                    estado = fuera
                     if estado == "alert":
                         alert_text = f"[{current_time}] Temperatura crítica: {t:.2f} °C"
                         self._agregar_alerta_visual(alert_text, "alert")
@@ -473,16 +534,16 @@ class Dashboard(QWidget):
                 estado = estado_hum
 
         if "Aceleracion" in datos:
-            self.kpi_cards["Aceleracion"].setText(self._format_safe(datos["Aceleracion"], ".2f", "m/s²"))
+            self._set_kpi("Aceleracion", self._format_safe(datos["Aceleracion"], ".2f", "m/s²"))
 
         if "Bat" in datos:
-            self.kpi_cards["Bateria"].setText(self._format_safe(datos["Bat"], ".2f", "V"))
+            self._set_kpi("Bateria", self._format_safe(datos["Bat"], ".2f", "V"))
 
         if "Luz" in datos:
-            self.kpi_cards["Luz"].setText(self._format_safe(datos["Luz"], ".0f", "lx"))
+            self._set_kpi("Luz", self._format_safe(datos["Luz"], ".0f", "lx"))
 
         if "Rocio" in datos:
-            self.kpi_cards["Temp condensacion"].setText(self._format_safe(datos["Rocio"], ".2f", "°C"))
+            self._set_kpi("Temp condensacion", self._format_safe(datos["Rocio"], ".2f", "°C"))
 
         # Actualizar contadores
         if estado == "alert":
@@ -492,8 +553,7 @@ class Dashboard(QWidget):
         else:
             self.registros_ok += 1
 
-        self.actualizar_badges()
-        self.page_historial.refrescar()
+        self.ui.marcar("badges")
 
     # ==========================
     # CONTROL
@@ -510,6 +570,12 @@ class Dashboard(QWidget):
     def _do_logout(self):
         if self.worker.isRunning():
             self.worker.stop()
+        self.device_store.readings.disconnect(self.on_sensor_batch)
+        self.health.transiciones.disconnect(self._on_transiciones_conexion)
+        self.timer_tendencias.stop()
+        self.ui.stop()
+        self.regresion_service.flush()
+        self.device_service.flush(timeout=5)
         if callable(self.on_logout):
             self.on_logout()
 
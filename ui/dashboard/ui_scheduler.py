@@ -0,0 +1,66 @@
+"""
+Planificador de actualizaciones de UI a frecuencia fija.
+
+Las lecturas solo marcan estado "sucio" (último valor por clave); un QTimer
+aplica ese estado a los widgets a una tasa fija, así el costo del hilo de UI
+depende de la frecuencia de refresco y no de la tasa de sensores.
+"""
+
+from typing import Any, Callable, Dict, List
+
+from PyQt6.QtCore import QObject, QTimer
+
+# Refrescos por segundo de los widgets del dashboard
+UI_HZ = 15
+
+
+class UIScheduler(QObject):
+    """Estado sucio por clave, aplicado en cada tick"""
+
+    def __init__(self, parent=None, hz: int = UI_HZ):
+        super().__init__(parent)
+        self._aplicadores: Dict[str, Callable[[Any], None]] = {}
+        self._acumulativas = set()
+        self._sucio: Dict[str, Any] = {}
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(1000 / hz))
+        self.timer.timeout.connect(self.tick)
+
+    def registrar(self, clave: str, aplicar: Callable[[Any], None], acumular: bool = False):
+        """
+        Args:
+            clave: identificador del widget o grupo de widgets
+            aplicar: recibe el último valor marcado (o la lista, si acumula)
+            acumular: conserva todos los valores del intervalo (p. ej. alertas)
+        """
+        self._aplicadores[clave] = aplicar
+        if acumular:
+            self._acumulativas.add(clave)
+
+    def marcar(self, clave: str, valor: Any = None):
+        """Registra el nuevo estado; no toca ningún widget"""
+        if clave in self._acumulativas:
+            self._sucio.setdefault(clave, []).append(valor)
+        else:
+            self._sucio[clave] = valor
+
+    def tick(self):
+        if not self._sucio:
+            return
+        sucio, self._sucio = self._sucio, {}
+        for clave, valor in sucio.items():
+            try:
+                self._aplicadores[clave](valor)
+            except Exception as e:
+                print(f"[UI] Error aplicando '{clave}': {e}")
+
+    def start(self):
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.tick()
+
+    def pendientes(self) -> List[str]:
+        return list(self._sucio)
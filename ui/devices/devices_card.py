@@ -1,139 +1,149 @@
-from PyQt6.QtWidgets import (
-    QFrame, QVBoxLayout, QHBoxLayout,
-    QLabel, QPushButton
-)
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QPixmap
+from PyQt6.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+from PyQt6.QtCore import QEvent, QRect, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QPainterPath, QPen, QPixmap
 
+from ui.devices.devices_model import DevicesTableModel, RecordRole
 
-class TarjetaDispositivo(QFrame):
-    def __init__(self, datos: dict, parent=None):
-        super().__init__(parent)
+CARD_SIZE = QSize(260, 170)
+IMG_SIZE = 48
 
-        self.datos = datos
-
-        
-        self.setFixedSize(260, 170)   
-        self.setStyleSheet("""
-            QFrame {
-                background: #ffffff;
-                border: 1px solid #e0e0e0;
-                border-radius: 10px;
-            }
-        """)
-
-        root = QVBoxLayout(self)
-        root.setContentsMargins(10, 8, 10, 8)
-        root.setSpacing(6)
-
-       
-        header = QHBoxLayout()
-
-        self.lbl_img = QLabel()
-        self.lbl_img.setFixedSize(48, 48)
-        self.lbl_img.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.lbl_img.setStyleSheet("""
-            QLabel {
-                background: #f2f2f2;
-                border-radius: 6px;
-            }
-        """)
-        header.addWidget(self.lbl_img)
-
-        self.lbl_nombre = QLabel()
-        self.lbl_nombre.setStyleSheet("""
-            font-weight: 600;
-            font-size: 13px;
-        """)
-        header.addWidget(self.lbl_nombre)
-        header.addStretch()
-
-        root.addLayout(header)
-
-       
-        self.lbl_info = QLabel()
-        self.lbl_info.setStyleSheet("""
-            font-size: 11px;
-            color: #555;
-        """)
-        root.addWidget(self.lbl_info)
-
-       
-        self.lbl_estado = QLabel()
-        self.lbl_estado.setStyleSheet("""
-            font-size: 10px;
-            color: #888;
-        """)
-        root.addWidget(self.lbl_estado)
-
-        acciones = QHBoxLayout()
-
-        self.btn_toggle = QPushButton()
-        self.btn_toggle.setFixedHeight(24)
-        self.btn_toggle.setStyleSheet("""
-            QPushButton {
-                border: 1px solid #ccc;
-                border-radius: 6px;
-                font-size: 11px;
-                padding: 2px 8px;
-            }
-        """)
-
-        self.btn_edit = QPushButton("✏️")
-        self.btn_edit.setFixedSize(28, 24)
-
-        self.btn_del = QPushButton("🗑️")
-        self.btn_del.setFixedSize(28, 24)
-
-        acciones.addWidget(self.btn_toggle)
-        acciones.addStretch()
-        acciones.addWidget(self.btn_edit)
-        acciones.addWidget(self.btn_del)
-
-        root.addLayout(acciones)
-
-        self.actualizar_visual(datos, "Sin datos")
-
- 
-    def actualizar_visual(self, datos: dict, texto_estado: str):
-        self.datos = datos
-
-        self.lbl_nombre.setText(
-            datos.get("name") or f"Dispositivo {datos.get('id', '')}"
-        )
 
-        self.lbl_info.setText(
-            f" {datos.get('battery', '--')}V   "
-            f" {datos.get('temp', '--')}°C   "
-            f" {datos.get('hum', '--')}%"
-        )
+class TarjetaDelegate(QStyledItemDelegate):
+    """
+    Tarjeta de dispositivo pintada por el delegate de un QListView (modo ícono).
+
+    No hay un QFrame con labels y botones por dispositivo: cada tarjeta se
+    dibuja desde su DeviceRecord solo cuando la vista la repinta, y los
+    clics en los botones se resuelven por posición.
+
+    Señal accion(nombre, dev_id) con nombre en "toggle", "editar", "eliminar".
+    """
 
-        self.lbl_estado.setText(f"📡 {texto_estado}")
+    accion = pyqtSignal(str, str)
 
-        
-        ruta = datos.get("foto")
-        if ruta:
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._fotos = {}   # ruta -> QPixmap ya escalado
+        self._font_nombre = QFont()
+        self._font_nombre.setPointSize(10)
+        self._font_nombre.setWeight(QFont.Weight.DemiBold)
+        self._font_info = QFont()
+        self._font_info.setPointSize(8)
+        self._font_estado = QFont()
+        self._font_estado.setPointSize(7)
+
+    def sizeHint(self, option, index):
+        return CARD_SIZE
+
+    # ==================== GEOMETRÍA ====================
+    @staticmethod
+    def _rect(option) -> QRect:
+        return QRect(option.rect.topLeft(), CARD_SIZE).adjusted(1, 1, -1, -1)
+
+    def _botones(self, rect: QRect):
+        fila = rect.bottom() - 8 - 24
+        return {
+            "toggle": QRect(rect.left() + 10, fila, 90, 24),
+            "editar": QRect(rect.right() - 10 - 28 - 4 - 28, fila, 28, 24),
+            "eliminar": QRect(rect.right() - 10 - 28, fila, 28, 24),
+        }
+
+    def _foto(self, ruta):
+        if not ruta:
+            return None
+        pix = self._fotos.get(ruta)
+        if pix is None:
             pix = QPixmap(ruta)
             if not pix.isNull():
-                self.lbl_img.setPixmap(
-                    pix.scaled(
-                        self.lbl_img.size(),
-                        Qt.AspectRatioMode.KeepAspectRatioByExpanding,
-                        Qt.TransformationMode.SmoothTransformation
-                    )
+                pix = pix.scaled(
+                    IMG_SIZE, IMG_SIZE,
+                    Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+                    Qt.TransformationMode.SmoothTransformation
                 )
-        else:
-            self.lbl_img.setPixmap(QPixmap())
-
-        
-        activo = datos.get("active", True)
+            self._fotos[ruta] = pix
+        return None if pix.isNull() else pix
+
+    # ==================== PINTADO ====================
+    def paint(self, painter, option, index):
+        record = index.data(RecordRole)
+        if record is None:
+            return
+        estado = index.sibling(index.row(), DevicesTableModel.SENAL_COL).data()
+
+        rect = self._rect(option)
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+
+        fondo = QPainterPath()
+        fondo.addRoundedRect(rect.toRectF(), 10, 10)
+        painter.fillPath(fondo, QColor("#ffffff" if record.active else "#f2f2f2"))
+        painter.setPen(QPen(QColor("#e0e0e0"), 1))
+        painter.drawPath(fondo)
+
+        # Cabecera: imagen y nombre
+        img = QRect(rect.left() + 10, rect.top() + 8, IMG_SIZE, IMG_SIZE)
+        marco = QPainterPath()
+        marco.addRoundedRect(img.toRectF(), 6, 6)
+        painter.fillPath(marco, QColor("#f2f2f2"))
+        pix = self._foto(record.foto)
+        if pix is not None:
+            painter.setClipPath(marco)
+            painter.drawPixmap(img, pix, QRect(
+                (pix.width() - IMG_SIZE) // 2, (pix.height() - IMG_SIZE) // 2, IMG_SIZE, IMG_SIZE
+            ))
+            painter.setClipping(False)
+
+        painter.setPen(QColor("#000000"))
+        painter.setFont(self._font_nombre)
+        painter.drawText(
+            QRect(img.right() + 10, img.top(), rect.right() - img.right() - 20, IMG_SIZE),
+            Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft,
+            record.name or f"Dispositivo {record.id}"
+        )
 
-        self.btn_toggle.setText("Desactivar" if activo else "Activar")
+        # Lecturas y estado de conexión
+        painter.setPen(QColor("#555555"))
+        painter.setFont(self._font_info)
+        painter.drawText(
+            QRect(rect.left() + 10, img.bottom() + 8, rect.width() - 20, 18),
+            Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+            f" {record.battery if record.battery is not None else '--'}V   "
+            f" {record.temp_sonda if record.temp_sonda is not None else '--'}°C   "
+            f" {record.humedad if record.humedad is not None else '--'}%"
+        )
+        painter.setPen(QColor("#888888"))
+        painter.setFont(self._font_estado)
+        painter.drawText(
+            QRect(rect.left() + 10, img.bottom() + 28, rect.width() - 20, 16),
+            Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+            f"📡 {estado}"
+        )
 
-        self.setStyleSheet("""
-            QFrame {
-                background: %s;
-                border: 1px solid #e0e0e0;
-                border-radius: 10px;
-            }
-        """ % ("#ffffff" if activo else "#f2f2f2"))
+        # Botones (estilo de la app: la hoja de estilos de la vista no aplica a botones)
+        style = QApplication.style()
+        textos = {
+            "toggle": "Desactivar" if record.active else "Activar",
+            "editar": "✏️",
+            "eliminar": "🗑️",
+        }
+        for nombre, r in self._botones(rect).items():
+            boton = QStyleOptionButton()
+            boton.rect = r
+            boton.text = textos[nombre]
+            boton.state = QStyle.StateFlag.State_Enabled | QStyle.StateFlag.State_Raised
+            style.drawControl(QStyle.ControlElement.CE_PushButton, boton, painter)
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if (
+            event.type() != QEvent.Type.MouseButtonRelease
+            or event.button() != Qt.MouseButton.LeftButton
+        ):
+            return False
+        pos = event.position().toPoint()
+        for nombre, r in self._botones(self._rect(option)).items():
+            if r.contains(pos):
+                self.accion.emit(nombre, index.data(Qt.ItemDataRole.UserRole))
+                return True
+        return False
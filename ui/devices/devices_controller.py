@@ -1,6 +1,7 @@
 from PyQt6.QtCore import QObject, pyqtSignal
 from database.devices_service import get_device_service
 from database.device_adapter import get_device_adapter
+from core.device_store import DeviceRecord, get_device_store
 
 
 class DevicesController(QObject):
@@ -9,133 +10,64 @@ class DevicesController(QObject):
     
     Flujo:
     1. ESP32 envía datos → handle_esp32_data()
-    2. Se guardan en la BD
-    3. Se envían a UI con fallback automático
+    2. Se actualiza el store compartido (búsqueda O(1) por ID) y se emiten
+       solo los deltas: agregados, campos modificados y eliminados
+
+    La ingesta (y la persistencia) es la del DeviceStore: el controlador
+    ve los mismos registros que el Dashboard y DevicesPage.
     """
-    devices_updated = pyqtSignal(list)
+    devices_added = pyqtSignal(list)
+    devices_changed = pyqtSignal(dict)
+    devices_removed = pyqtSignal(list)
 
     def __init__(self):
         super().__init__()
-        self.devices: list[dict] = []
+        self.store = get_device_store()
+        self.store.devices_added.connect(self.devices_added)
+        self.store.devices_changed.connect(self.devices_changed)
+        self.store.devices_removed.connect(self.devices_removed)
         self.device_service = get_device_service()
         self.device_adapter = get_device_adapter()
 
+    @property
+    def devices(self) -> list[dict]:
+        """Copia en formato dict de todos los dispositivos (O(n), solo bajo demanda)"""
+        return [r.as_dict() for r in self.store.records()]
+
+    def get(self, dev_id: str):
+        return self.store.get(dev_id)
+
 
     def handle_esp32_data(self, data: dict):
         """
         Maneja datos recibidos del ESP32.
-        Guarda en BD y actualiza UI.
+        Actualiza el store; las vistas reciben solo lo que cambió.
         """
         if "ID" not in data:
             return
-
-        device_id = str(data["ID"]).strip()
-        
-        # 1. GUARDAR EN BD
-        try:
-            self.device_service.save_device_data(data)
-        except Exception as e:
-            print(f"[DEVICES] Error guardando datos de {device_id}: {e}")
-        
-        # 2. ACTUALIZAR EN MEMORIA Y UI
-        idx = self._idx(device_id)
-
-        if idx != -1 and not self.devices[idx].get("active", True):
-            return
-
-        if idx == -1:
-            self.devices.append(self._nuevo(device_id, data))
-        else:
-            self._actualizar(idx, data)
-
-        self.devices_updated.emit(self.devices)
-
-    def _nuevo(self, dev_id, data):
-        """Crea un nuevo registro de dispositivo con datos iniciales"""
-        return {
-            "id": dev_id,
-            "name": f"Dispositivo {dev_id}",
-            "connections": "",
-            "location": "",
-            "battery": int(data.get("Bat", 100)) if isinstance(data.get("Bat"), (int, float)) else 100,
-            "active": True,
-            "foto": None,
-            "temp_amb": data.get("T_Amb"),
-            "humedad": data.get("Hum"),
-            "golpe": data.get("Aceleracion"),
-            "luz": data.get("Luz"),
-            "temp_sonda": data.get("T_Sonda"),
-            "punto_condensacion": data.get("Rocio"),
-            "_source": "realtime",
-            "_synced": False
-        }
-
-    def _actualizar(self, idx, data):
-        """Actualiza datos de un dispositivo existente"""
-        d = self.devices[idx]
-        mapa = {
-            "T_Amb": "temp_amb",
-            "Hum": "humedad",
-            "Aceleracion": "golpe",
-            "Luz": "luz",
-            "T_Sonda": "temp_sonda",
-            "Rocio": "punto_condensacion",
-            "Bat": "battery",
-        }
-        for k_in, k_out in mapa.items():
-            if k_in in data:
-                valor = data[k_in]
-                # Convertir a int si es batería
-                if k_out == "battery" and isinstance(valor, (int, float)):
-                    valor = int(valor)
-                d[k_out] = valor
-        
-        d["_source"] = "realtime"
-        d["_synced"] = False
+        self.store.ingest(data)
 
 
     def add_manual(self):
         """Añade un dispositivo creado manualmente"""
-        new_id = f"DVC-{len(self.devices)+1}"
-        self.devices.append({
-            "id": new_id,
-            "name": f"Dispositivo {len(self.devices)+1}",
-            "connections": "",
-            "location": "",
-            "battery": 100,
-            "active": True,
-            "foto": None,
-            "temp_amb": None,
-            "humedad": None,
-            "golpe": None,
-            "luz": None,
-            "temp_sonda": None,
-            "punto_condensacion": None,
-            "_source": "manual",
-            "_synced": True
-        })
-        self.devices_updated.emit(self.devices)
+        n = len(self.store) + 1
+        while f"DVC-{n}" in self.store:
+            n += 1
+        self.store.add(DeviceRecord(f"DVC-{n}", name=f"Dispositivo {n}"))
 
     def update(self, dev_id, datos):
         """Actualiza datos completos de un dispositivo"""
-        idx = self._idx(dev_id)
-        if idx != -1:
-            self.devices[idx] = datos
-            self.devices_updated.emit(self.devices)
+        self.store.update(dev_id, datos)
 
     def toggle_active(self, dev_id):
         """Activa/desactiva un dispositivo"""
-        idx = self._idx(dev_id)
-        if idx != -1:
-            self.devices[idx]["active"] = not self.devices[idx]["active"]
-            self.devices_updated.emit(self.devices)
+        record = self.store.get(dev_id)
+        if record is not None:
+            self.store.update(dev_id, {"active": not record.active})
 
     def delete(self, dev_id):
         """Elimina un dispositivo"""
-        idx = self._idx(dev_id)
-        if idx != -1:
-            self.devices.pop(idx)
-            self.devices_updated.emit(self.devices)
+        self.store.remove(dev_id)
 
     def get_device_history(self, dev_id: str, limit: int = 100) -> list:
         """Obtiene historial de un dispositivo desde BD"""
@@ -150,36 +82,4 @@ class DevicesController(QObject):
         Restaura dispositivos desde la BD (para inicialización o recuperación).
         Mantiene en memoria los últimos datos de cada dispositivo.
         """
-        latest_data = self.device_service.get_latest_all_devices()
-        
-        device_map = {}
-        for record in latest_data:
-            dev_id = record["device_id"]
-            if dev_id not in device_map:
-                device_map[dev_id] = {
-                    "id": dev_id,
-                    "name": f"Dispositivo {dev_id}",
-                    "connections": "",
-                    "location": "",
-                    "battery": int(record.get("bateria", 100)) if record.get("bateria") else 100,
-                    "active": True,
-                    "foto": None,
-                    "temp_amb": record.get("temp_amb"),
-                    "humedad": record.get("humedad"),
-                    "golpe": record.get("aceleracion"),
-                    "luz": record.get("luz"),
-                    "temp_sonda": record.get("temp_sonda"),
-                    "punto_condensacion": record.get("punto_rocio"),
-                    "_source": "database",
-                    "_synced": True
-                }
-        
-        self.devices = list(device_map.values())
-        self.devices_updated.emit(self.devices)
-
-    def _idx(self, dev_id):
-        """Encuentra índice de un dispositivo por ID"""
-        for i, d in enumerate(self.devices):
-            if d["id"] == dev_id:
-                return i
-        return -1
+        self.store.restore_from_database()
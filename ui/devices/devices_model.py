@@ -0,0 +1,180 @@
+import datetime
+from typing import Dict, List
+
+from PyQt6.QtCore import QAbstractTableModel, QEvent, QModelIndex, Qt, pyqtSignal
+from PyQt6.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+
+from core.device_store import DeviceStore
+from core.health_monitor import OFFLINE, ONLINE, STALE, HealthMonitor
+
+# Rol con el DeviceRecord de la fila (lo usan los delegates)
+RecordRole = Qt.ItemDataRole.UserRole + 1
+
+
+def texto_ultima_senal(record, estado) -> str:
+    """Estado de conexión (del monitor de salud) y hora de la última lectura"""
+    ts = record.last_signal_ts
+    if not ts:
+        return "Sin datos"
+    if estado == ONLINE:
+        return "Conectado"
+
+    hora = datetime.datetime.fromtimestamp(ts).strftime("%H:%M:%S")
+    if estado == STALE:
+        return f"Inestable · {hora}"
+    return f"Sin señal · {hora}"
+
+
+class DevicesTableModel(QAbstractTableModel):
+    """
+    Dispositivos del DeviceStore para la tabla y la grilla de tarjetas.
+
+    Sigue las señales delta del store: una fila nueva es un insertRows,
+    un cambio emite dataChanged solo de esa fila. El estado de conexión
+    viene de las transiciones del HealthMonitor; no hay refresco periódico.
+    """
+
+    COLUMNS = (
+        ("ID", "id"),
+        ("Nombre", "name"),
+        ("Batería", "battery"),
+        ("Temp", "temp_sonda"),
+        ("Hum", "humedad"),
+        ("Luz", "luz"),
+        ("Última señal", "last_signal_ts"),
+        ("Pérdida", None),
+        ("Intervalo", None),
+        ("Estado", "active"),
+        ("Editar", None),
+        ("Eliminar", None),
+    )
+    SENAL_COL = 6
+    PERDIDA_COL = 7
+    INTERVALO_COL = 8
+    EDIT_COL = 10
+    DELETE_COL = 11
+
+    def __init__(self, store: DeviceStore, monitor: HealthMonitor, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.monitor = monitor
+        self._ids: List[str] = store.ids()
+        self._rows: Dict[str, int] = {dev_id: i for i, dev_id in enumerate(self._ids)}
+
+        store.devices_added.connect(self._on_added)
+        store.devices_changed.connect(self._on_changed)
+        store.devices_removed.connect(self._on_removed)
+        monitor.transiciones.connect(self._on_transiciones)
+
+    # ==================== DELTAS DEL STORE ====================
+    def _on_added(self, ids: list):
+        ids = [i for i in ids if i not in self._rows]
+        if not ids:
+            return
+        first = len(self._ids)
+        self.beginInsertRows(QModelIndex(), first, first + len(ids) - 1)
+        for dev_id in ids:
+            self._rows[dev_id] = len(self._ids)
+            self._ids.append(dev_id)
+        self.endInsertRows()
+
+    def _on_changed(self, cambios: dict):
+        last = len(self.COLUMNS) - 1
+        for dev_id in cambios:
+            row = self._rows.get(dev_id)
+            if row is not None:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, last))
+
+    def _on_removed(self, ids: list):
+        for row in sorted((self._rows[i] for i in ids if i in self._rows), reverse=True):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._ids[row]
+            self.endRemoveRows()
+        self._rows = {dev_id: i for i, dev_id in enumerate(self._ids)}
+
+    def _on_transiciones(self, transiciones: list):
+        for dev_id, _, _ in transiciones:
+            row = self._rows.get(dev_id)
+            if row is not None:
+                # Columna 0 incluida: la tarjeta se pinta desde ella
+                self.dataChanged.emit(
+                    self.index(row, 0), self.index(row, self.SENAL_COL),
+                    [Qt.ItemDataRole.DisplayRole]
+                )
+
+    def row_of(self, dev_id: str) -> int:
+        return self._rows.get(dev_id, -1)
+
+    # ==================== QAbstractTableModel ====================
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.store.get(self._ids[index.row()])
+        if record is None:
+            return None
+
+        if role == RecordRole:
+            return record
+        if role == Qt.ItemDataRole.UserRole:
+            return record.id
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+
+        column = index.column()
+        if column == self.SENAL_COL:
+            return texto_ultima_senal(record, self.monitor.estado(record.id) or OFFLINE)
+        if column in (self.PERDIDA_COL, self.INTERVALO_COL):
+            salud = self.monitor.salud(record.id)
+            if salud is None:
+                return "--"
+            if column == self.PERDIDA_COL:
+                total = salud.recibidas + salud.perdidas
+                return f"{100.0 * salud.perdidas / total:.1f}%" if total else "--"
+            if salud.intervalo is None:
+                return "--"
+            return f"{salud.intervalo * 1000:.0f} ± {salud.jitter * 1000:.0f} ms"
+        if column == self.EDIT_COL:
+            return "Editar"
+        if column == self.DELETE_COL:
+            return "Eliminar"
+
+        key = self.COLUMNS[column][1]
+        if key == "active":
+            return "Activo" if record.active else "Inactivo"
+        value = getattr(record, key)
+        return "--" if value is None else str(value)
+
+
+class BotonDelegate(QStyledItemDelegate):
+    """Pinta la celda como un botón (sin widget por fila) y emite el ID al hacer clic"""
+
+    clicked = pyqtSignal(str)
+
+    def paint(self, painter, option, index):
+        boton = QStyleOptionButton()
+        boton.rect = option.rect.adjusted(4, 3, -4, -3)
+        boton.text = index.data()
+        boton.state = QStyle.StateFlag.State_Enabled | QStyle.StateFlag.State_Raised
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_PushButton, boton, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if (
+            event.type() == QEvent.Type.MouseButtonRelease
+            and event.button() == Qt.MouseButton.LeftButton
+            and option.rect.contains(event.position().toPoint())
+        ):
+            self.clicked.emit(index.data(Qt.ItemDataRole.UserRole))
+            return True
+        return False
@@ -1,32 +1,29 @@
-import time
 import csv
-from functools import partial
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton,
-    QScrollArea, QGridLayout, QTableWidget, QTableWidgetItem,
-    QMessageBox, QFileDialog, QHeaderView
+    QListView, QTableView, QMessageBox, QFileDialog, QHeaderView
 )
-from PyQt6.QtCore import QTimer
 
-from ui.devices.devices_card import TarjetaDispositivo
+from core.device_store import DeviceRecord, get_device_store
+from core.health_monitor import get_health_monitor
+from core.search_index import SearchFilterProxyModel, get_search_index
+from ui.devices.devices_card import TarjetaDelegate
 from ui.devices.devices_form import DispositivoDialog
+from ui.devices.devices_model import BotonDelegate, DevicesTableModel
 from ui.devices.puertos import Puertos
-from database.devices_service import get_device_service
-
-UMBRAL_DESCONEXION = 10
 
 
 class DevicesPage(QWidget):
+    # Campos de DeviceRecord que entran al índice de búsqueda
+    CAMPOS_BUSQUEDA = ("id", "name", "location", "connections", "com")
+
     def __init__(self, esp32_worker=None, parent=None):
         super().__init__(parent)
 
         self.worker = esp32_worker
-        self.devices: dict[str, dict] = {}
-        self.cards = {}
-        
-        # Inicializar servicio de BD
-        self.device_service = get_device_service()
+        # Estado compartido: la ingesta de lecturas la hace el store, no la página
+        self.store = get_device_store()
 
         root = QVBoxLayout(self)
 
@@ -53,253 +50,163 @@ class DevicesPage(QWidget):
         barra.addStretch()
         root.addLayout(barra)
 
-       
-        self.scroll = QScrollArea(widgetResizable=True)
-        self.cards_container = QWidget()
-        self.cards_layout = QGridLayout(self.cards_container)
-        self.cards_layout.setSpacing(12)
-        self.scroll.setWidget(self.cards_container)
-        root.addWidget(self.scroll)
-
-        self.table = QTableWidget()
-        self.table.setColumnCount(10)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Nombre", "Batería", "Temp", "Hum", "Luz",
-            "Última señal", "Estado", "Editar", "Eliminar"
-        ])
+        # Un solo modelo (y filtro) para tarjetas y tabla
+        self.model = DevicesTableModel(self.store, get_health_monitor(), self)
+        self.indice = get_search_index("dispositivos")
+        for d in self.store.records():
+            self._indexar(d)
+        self.store.devices_added.connect(self._on_devices_added)
+        self.store.devices_changed.connect(self._on_devices_changed)
+        self.store.devices_removed.connect(self._on_devices_removed)
+        self.store.persist_error.connect(self._on_persist_error)
+        self.proxy = SearchFilterProxyModel(self.indice, self)
+        self.proxy.setSourceModel(self.model)
+
+        self.cards_view = QListView()
+        self.cards_view.setViewMode(QListView.ViewMode.IconMode)
+        self.cards_view.setMovement(QListView.Movement.Static)
+        self.cards_view.setResizeMode(QListView.ResizeMode.Adjust)
+        self.cards_view.setUniformItemSizes(True)
+        self.cards_view.setSpacing(6)
+        self.cards_view.setSelectionMode(QListView.SelectionMode.NoSelection)
+        self.cards_view.setStyleSheet("QListView { border: none; background: transparent; }")
+        self.cards_view.setModel(self.proxy)
+        self.tarjetas = TarjetaDelegate(self.cards_view)
+        self.tarjetas.accion.connect(self._on_accion_tarjeta)
+        self.cards_view.setItemDelegate(self.tarjetas)
+        root.addWidget(self.cards_view)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.verticalHeader().setVisible(False)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.btn_editar = BotonDelegate(self.table)
+        self.btn_editar.clicked.connect(self.editar)
+        self.table.setItemDelegateForColumn(DevicesTableModel.EDIT_COL, self.btn_editar)
+        self.btn_eliminar = BotonDelegate(self.table)
+        self.btn_eliminar.clicked.connect(self.eliminar)
+        self.table.setItemDelegateForColumn(DevicesTableModel.DELETE_COL, self.btn_eliminar)
         self.table.hide()
         root.addWidget(self.table)
 
    
         if self.worker:
-            self.worker.data_received.connect(self._on_esp32_data)
+            self.store.attach(self.worker)
             self.worker.error.connect(self._on_esp32_error)
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.actualizar_vistas)
-        self.timer.start(1000)
-        
-        # Cargar dispositivos existentes desde la BD
-        self.cargar_dispositivos_desde_bd()
-   
-    def cargar_dispositivos_desde_bd(self):
-        """Carga los dispositivos y sus últimos datos desde la BD"""
-        try:
-            # Obtener último registro de cada dispositivo
-            latest_data = self.device_service.get_latest_all_devices()
-            
-            for record in latest_data:
-                dev_id = record["device_id"]
-                
-                # Evitar duplicados
-                if dev_id in self.devices:
-                    continue
-                
-                # Crear entrada de dispositivo con todas las claves necesarias
-                self.devices[dev_id] = {
-                    "id": dev_id,
-                    "name": f"Dispositivo {dev_id}",
-                    "active": True,
-                    "com": None,  # Se actualiza cuando llegan datos del ESP32
-                    "baud": None,  # Se actualiza cuando llegan datos del ESP32
-                    "battery": int(record.get("bateria", 100)) if record.get("bateria") else 100,
-                    "temp": record.get("temp_sonda"),  # Nombre consistente
-                    "hum": record.get("humedad"),  # Nombre consistente
-                    "luz": record.get("luz"),
-                    "last_signal_ts": time.time()
-                }
-            
-            # Actualizar UI
-            self.actualizar_vistas()
-            
-            if latest_data:
-                print(f"[DevicesPage] Cargados {len(latest_data)} dispositivos desde BD")
-        except Exception as e:
-            print(f"[ERROR] No se pudieron cargar dispositivos desde BD: {e}")
-
    
     def configurar_esp32(self):
-        dlg = Puertos(self)
+        activos = {p: b for p, b, _ in self.worker.puertos()} if self.worker else {}
+        dlg = Puertos(self, activos)
         if not dlg.exec() or not self.worker:
             return
 
-        puerto, baudios = dlg.get_config()
-        self.worker.reconectar(puerto, baudios)
+        configs = dict(dlg.get_configs())
+        for puerto in activos.keys() - configs.keys():
+            self.worker.quitar_puerto(puerto)
+        for puerto, baudios in configs.items():
+            # Sin cambios: no se reconecta un puerto que ya se está leyendo
+            if activos.get(puerto) != baudios:
+                self.worker.agregar_puerto(puerto, baudios)
 
     def _on_esp32_error(self, msg: str):
         QMessageBox.warning(self, "ESP32", msg)
 
-    def _on_esp32_data(self, data: dict):
-        dev_id = str(data.get("ID")).strip()
-        if not dev_id:
-            return
-
-        # GUARDAR ENBASE DE DATOS
-        try:
-            self.device_service.save_device_data(data)
-        except Exception as e:
-            print(f"[ERROR BD] No se pudo guardar dispositivo {dev_id}: {e}")
-
-        now = time.time()
-
-        if dev_id in self.devices:
-            d = self.devices[dev_id]
-            estaba_inactivo = not d.get("active", True)
-            
-            # Si llegan datos AHORA, está activo (acaba de conectarse)
-            d["active"] = True
-            
-            # Si se reconectó (estaba inactivo y ahora tiene datos)
-            if estaba_inactivo:
-                print(f"[ESP32] Dispositivo {dev_id} RECONECTADO ✓")
-        else:
-            d = self.devices.setdefault(dev_id, {
-                "id": dev_id,
-                "name": f"Dispositivo {dev_id}",
-                "active": True,
-                "com": None,
-                "baud": None,
-                "last_signal_ts": now
-            })
-            estaba_inactivo = False
-
-        if d["com"] is None and self.worker.serial.ser:
-            d["com"] = self.worker.serial.ser.port
-            d["baud"] = self.worker.serial.ser.baudrate
-
-        # Actualizar siempre los datos del sensor
-        d.update({
-            "battery": data.get("Bat"),
-            "temp": data.get("T_Sonda"),
-            "hum": data.get("Hum"),
-            "luz": data.get("Luz"),
-            "last_signal_ts": now
-        })
-        
-        # Actualizar tarjeta si existe, o actualizar_vistas si es nueva
-        if dev_id in self.cards:
-            # Dispositivo existente: actualizar su tarjeta
-            card = self.cards[dev_id]
-            card.actualizar_visual(d, self.texto_ultima_senal(d))
-        else:
-            # Dispositivo nuevo: actualizar toda la vista para crear la tarjeta
-            self.actualizar_vistas()
-
- 
-    def actualizar_vistas(self):
-        self._actualizar_tarjetas()
-        self._actualizar_tabla()
-
-    def _actualizar_tarjetas(self):
-        # Limpiar layout existente
-        while self.cards_layout.count():
-            item = self.cards_layout.takeAt(0)
-            if item.widget():
-                # No eliminar el widget, solo sacarlo del layout
-                pass
-        
-        for i, d in enumerate(self.devices.values()):
-            dev_id = d["id"]
-
-            if dev_id not in self.cards:
-                card = TarjetaDispositivo(d)
-                card.btn_toggle.clicked.connect(partial(self.toggle, dev_id))
-                card.btn_edit.clicked.connect(partial(self.editar, dev_id))
-                card.btn_del.clicked.connect(partial(self.eliminar, dev_id))
-                self.cards[dev_id] = card
-            else:
-                card = self.cards[dev_id]
-
-            card.actualizar_visual(d, self.texto_ultima_senal(d))
-            self.cards_layout.addWidget(card, i // 3, i % 3)
-
-    def _actualizar_tabla(self):
-        self.table.setRowCount(len(self.devices))
-
-        for row, d in enumerate(self.devices.values()):
-            self.table.setItem(row, 0, QTableWidgetItem(d["id"]))
-            self.table.setItem(row, 1, QTableWidgetItem(d.get("name", "")))
-            self.table.setItem(row, 2, QTableWidgetItem(str(d.get("battery", "--"))))
-            self.table.setItem(row, 3, QTableWidgetItem(str(d.get("temp", "--"))))
-            self.table.setItem(row, 4, QTableWidgetItem(str(d.get("hum", "--"))))
-            self.table.setItem(row, 5, QTableWidgetItem(str(d.get("luz", "--"))))
-            self.table.setItem(row, 6, QTableWidgetItem(self.texto_ultima_senal(d)))
-            self.table.setItem(
-                row, 7,
-                QTableWidgetItem("Activo" if d.get("active") else "Inactivo")
-            )
-
-            btn_edit = QPushButton("Editar")
-            btn_edit.clicked.connect(partial(self.editar, d["id"]))
-            self.table.setCellWidget(row, 8, btn_edit)
-
-            btn_del = QPushButton("Eliminar")
-            btn_del.clicked.connect(partial(self.eliminar, d["id"]))
-            self.table.setCellWidget(row, 9, btn_del)
-
-    def texto_ultima_senal(self, d):
-        ts = d.get("last_signal_ts")
-        if not ts:
-            return "Sin datos"
-
-        delta = int(time.time() - ts)
-        
-        return "Conectado" if delta < UMBRAL_DESCONEXION else f"Hace {delta}s"
+    def _on_persist_error(self, msg: str):
+        QMessageBox.warning(self, "Base de datos", msg)
 
     def toggle_view(self):
-        showing = self.scroll.isVisible()
-        self.scroll.setVisible(not showing)
+        showing = self.cards_view.isVisible()
+        self.cards_view.setVisible(not showing)
         self.table.setVisible(showing)
 
     def filter_devices(self, text):
-        text = text.lower()
-        for card in self.cards.values():
-            card.setVisible(any(text in str(v).lower() for v in card.datos.values()))
+        self.proxy.set_query(text)
+
+    # ==================== ÍNDICE DE BÚSQUEDA ====================
+    def _indexar(self, d):
+        self.indice.add(d.id, [getattr(d, c) for c in self.CAMPOS_BUSQUEDA])
+
+    def _on_devices_added(self, ids: list):
+        for dev_id in ids:
+            self._indexar(self.store.get(dev_id))
+        self.proxy.refresh()
+
+    def _on_devices_changed(self, cambios: dict):
+        # Las lecturas de sensores no tocan campos buscables: no se reindexa
+        reindexar = [
+            dev_id for dev_id, campos in cambios.items()
+            if any(c in self.CAMPOS_BUSQUEDA for c in campos)
+        ]
+        for dev_id in reindexar:
+            self._indexar(self.store.get(dev_id))
+        if reindexar:
+            self.proxy.refresh()
+
+    def _on_devices_removed(self, ids: list):
+        for dev_id in ids:
+            self.indice.remove(dev_id)
 
     
     def agregar_dispositivo(self):
         dlg = DispositivoDialog(parent=self)
         if dlg.exec():
             d = dlg.get_datos()
-            d["id"] = str(d["id"]).strip()
+            dev_id = str(d.pop("id")).strip()
             d.setdefault("active", True)
-            d["last_signal_ts"] = None
-            self.devices[d["id"]] = d
-            self.actualizar_vistas()
+            self.store.add(DeviceRecord(dev_id, **d))
+
+    def _on_accion_tarjeta(self, accion: str, dev_id: str):
+        if accion == "toggle":
+            self.toggle(dev_id)
+        elif accion == "editar":
+            self.editar(dev_id)
+        elif accion == "eliminar":
+            self.eliminar(dev_id)
 
     def editar(self, dev_id):
-        d = self.devices.get(dev_id)
+        d = self.store.get(dev_id)
         if not d:
             return
 
-        dlg = DispositivoDialog(d, parent=self)
+        dlg = DispositivoDialog(d.as_dict(), parent=self)
         if dlg.exec():
-            d.update(dlg.get_datos())
+            self.store.update(dev_id, dlg.get_datos())
 
     def eliminar(self, dev_id):
-        self.devices.pop(dev_id, None)
-        card = self.cards.pop(dev_id, None)
-        if card:
-            card.deleteLater()
+        self.store.remove(dev_id)
 
     def toggle(self, dev_id):
-        d = self.devices.get(dev_id)
+        d = self.store.get(dev_id)
         if d:
-            d["active"] = not d["active"]
+            self.store.update(dev_id, {"active": not d.active})
 
-   
     def exportar_csv(self):
         path, _ = QFileDialog.getSaveFileName(self, "Exportar CSV", "", "CSV (*.csv)")
         if not path:
             return
 
+        monitor = self.model.monitor
         with open(path, "w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
-            writer.writerow(["ID", "Nombre", "Batería", "Temp", "Hum", "Luz"])
-            for d in self.devices.values():
+            writer.writerow([
+                "ID", "Nombre", "Batería", "Temp", "Hum", "Luz",
+                "Conexión", "Pérdida %", "Intervalo ms", "Jitter ms", "Disponibilidad %"
+            ])
+            for d in self.store.records():
+                salud = monitor.estadisticas(d.id) or {}
                 writer.writerow([
-                    d["id"], d.get("name"),
-                    d.get("battery"), d.get("temp"),
-                    d.get("hum"), d.get("luz")
+                    d.id, d.name,
+                    d.battery, d.temp_sonda,
+                    d.humedad, d.luz,
+                    salud.get("estado", "--"),
+                    _redondear(salud.get("perdida_pct")),
+                    _redondear(salud.get("intervalo_ms")),
+                    _redondear(salud.get("jitter_ms")),
+                    _redondear(salud.get("disponibilidad_pct")),
                 ])
+
+
+def _redondear(valor, decimales: int = 1):
+    return "" if valor is None else round(valor, decimales)
@@ -1,26 +1,35 @@
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QFormLayout,
-    QComboBox, QPushButton, QHBoxLayout
+    QComboBox, QPushButton, QHBoxLayout,
+    QListWidget, QListWidgetItem
 )
+from PyQt6.QtCore import Qt
 import serial.tools.list_ports
 
 
 class Puertos(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, activos=None):
+        """
+        Args:
+            activos: puertos que ya se están leyendo; aparecen marcados y
+                desmarcarlos los deja de leer
+        """
         super().__init__(parent)
+        self.activos = set(activos or ())
         self.setWindowTitle("Configurar ESP32")
         self.setMinimumWidth(300)
 
         layout = QVBoxLayout(self)
         form = QFormLayout()
 
-        self.cmb_port = QComboBox()
+        # Se pueden marcar varios gateways: cada uno se lee en su propio hilo
+        self.lst_ports = QListWidget()
         self.cmb_baud = QComboBox()
 
         self.cmb_baud.addItems(["115200"])
         self._cargar_puertos()
 
-        form.addRow("Puerto COM:", self.cmb_port)
+        form.addRow("Puertos COM:", self.lst_ports)
         form.addRow("Baudios:", self.cmb_baud)
 
         layout.addLayout(form)
@@ -38,9 +47,26 @@ class Puertos(QDialog):
         layout.addLayout(botones)
 
     def _cargar_puertos(self):
-        self.cmb_port.clear()
-        for p in serial.tools.list_ports.comports():
-            self.cmb_port.addItem(p.device)
+        self.lst_ports.clear()
+        disponibles = [p.device for p in serial.tools.list_ports.comports()]
+        # Un puerto activo desconectado sigue en la lista para poder quitarlo
+        disponibles += sorted(self.activos - set(disponibles))
+        for i, puerto in enumerate(disponibles):
+            item = QListWidgetItem(puerto)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            marcado = puerto in self.activos if self.activos else i == 0
+            item.setCheckState(Qt.CheckState.Checked if marcado else Qt.CheckState.Unchecked)
+            self.lst_ports.addItem(item)
+
+    def get_configs(self) -> list[tuple[str, int]]:
+        """[(puerto, baudios)] de todos los puertos marcados"""
+        baudios = int(self.cmb_baud.currentText())
+        return [
+            (self.lst_ports.item(i).text(), baudios)
+            for i in range(self.lst_ports.count())
+            if self.lst_ports.item(i).checkState() == Qt.CheckState.Checked
+        ]
 
     def get_config(self):
-        return self.cmb_port.currentText(), int(self.cmb_baud.currentText())
+        configs = self.get_configs()
+        return configs[0] if configs else ("", int(self.cmb_baud.currentText()))
@@ -0,0 +1,62 @@
+from collections import deque
+
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt
+from PyQt6.QtGui import QBrush, QColor
+
+
+class AlertasModel(QAbstractListModel):
+    """
+    Registros de HistorialBuffer para un QListView (el más nuevo arriba).
+    Solo inserta filas nuevas y quita las que exceden el tope.
+    """
+
+    COLORES = {"warn": QColor("#ff9800"), "alert": QColor("#f44336")}
+    ICONOS = {"warn": "🟠", "alert": "🔴"}
+    FONDO = QBrush(QColor("#f4f6fa"))
+
+    def __init__(self, maximo: int = 500, parent=None):
+        super().__init__(parent)
+        self.maximo = maximo
+        self._registros = deque()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._registros)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        r = self._registros[index.row()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            icono = self.ICONOS.get(r["nivel"], "")
+            return f"{icono} {r['fecha']}  ·  {r['sensor'].upper()}\n{r['mensaje']}"
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return self.COLORES.get(r["nivel"])
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return self.FONDO
+        if role == Qt.ItemDataRole.UserRole:
+            return r
+        return None
+
+    def agregar(self, registros: list):
+        """Inserta un lote (del más viejo al más nuevo) arriba de la lista"""
+        registros = registros[-self.maximo:]
+        if not registros:
+            return
+
+        self.beginInsertRows(QModelIndex(), 0, len(registros) - 1)
+        self._registros.extendleft(registros)
+        self.endInsertRows()
+
+        sobrante = len(self._registros) - self.maximo
+        if sobrante > 0:
+            total = len(self._registros)
+            self.beginRemoveRows(QModelIndex(), total - sobrante, total - 1)
+            for _ in range(sobrante):
+                self._registros.pop()
+            self.endRemoveRows()
+
+    def reiniciar(self, registros: list):
+        self.beginResetModel()
+        self._registros = deque(reversed(registros[-self.maximo:]))
+        self.endResetModel()
@@ -1,24 +1,44 @@
+from collections import deque
 from datetime import datetime
 
 
 class HistorialBuffer:
-    _registros = []
+    # deque con tope: el registro más viejo sale en O(1)
+    MAXIMO = 500
+    _registros = deque(maxlen=MAXIMO)
+    _suscriptores = []
 
     @classmethod
     def agregar(cls, sensor: str, nivel: str, mensaje: str):
         if nivel not in ("warn", "alert"):
             return
 
-        cls._registros.append({
+        registro = {
             "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "sensor": sensor, 
             "nivel": nivel,     
             "mensaje": mensaje
-        })
+        }
+        cls._registros.append(registro)
+
+        for callback in list(cls._suscriptores):
+            callback(registro)
+
+    @classmethod
+    def suscribir(cls, callback):
+        """callback(registro) por cada registro nuevo; callback(None) al limpiar"""
+        if callback not in cls._suscriptores:
+            cls._suscriptores.append(callback)
 
-        # límite de seguridad
-        if len(cls._registros) > 500:
-            cls._registros.pop(0)
+    @classmethod
+    def desuscribir(cls, callback):
+        if callback in cls._suscriptores:
+            cls._suscriptores.remove(callback)
+
+    @classmethod
+    def obtener(cls):
+        """Todos los registros, del más viejo al más nuevo"""
+        return list(cls._registros)
 
     @classmethod
     def obtener_por_sensor(cls):
@@ -40,3 +60,5 @@ class HistorialBuffer:
     @classmethod
     def limpiar(cls):
         cls._registros.clear()
+        for callback in list(cls._suscriptores):
+            callback(None)
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+from PyQt6.QtWidgets import QFrame, QVBoxLayout
+
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+
+
+class GraficaRango(QFrame):
+    """
+    Vista general del rango cargado en el historial: temperatura de sonda y
+    humedad. La serie ya viene acotada a ~max_points (rollups para rangos
+    largos), así que se dibuja completa sin importar cuántas filas tenga el rango.
+    """
+
+    SERIES = (
+        ("temp_sonda", "T. Sonda (°C)", "tab:red"),
+        ("humedad", "Humedad (%)", "tab:blue"),
+    )
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setStyleSheet("background:white; border-radius:8px;")
+        self.setFixedHeight(220)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 8, 8, 8)
+
+        self.fig = Figure(figsize=(6, 2))
+        self.canvas = FigureCanvas(self.fig)
+        self.ax_temp = self.fig.add_subplot(111)
+        self.ax_hum = self.ax_temp.twinx()
+        layout.addWidget(self.canvas)
+
+    def limpiar(self):
+        self.ax_temp.clear()
+        self.ax_hum.clear()
+        self.canvas.draw_idle()
+
+    def mostrar(self, serie: list):
+        """
+        Args:
+            serie: filas de get_data_range(max_points=...): crudas o de rollup
+                (con columnas _min/_max y resolution)
+        """
+        self.ax_temp.clear()
+        self.ax_hum.clear()
+        if not serie:
+            self.canvas.draw_idle()
+            return
+
+        x = [datetime.fromisoformat(r["timestamp"]) for r in serie]
+        for (col, etiqueta, color), ax in zip(self.SERIES, (self.ax_temp, self.ax_hum)):
+            ax.plot(x, [r.get(col) for r in serie], color=color, linewidth=1, label=etiqueta)
+            if f"{col}_min" in serie[0]:
+                # Rollup: banda mín/máx de cada bucket
+                ax.fill_between(
+                    x,
+                    [_nan(r.get(f"{col}_min")) for r in serie],
+                    [_nan(r.get(f"{col}_max")) for r in serie],
+                    color=color, alpha=0.15, linewidth=0
+                )
+            ax.set_ylabel(etiqueta, color=color)
+
+        resolucion = serie[0].get("resolution")
+        self.ax_temp.set_title(
+            f"Promedio cada {resolucion // 60} min" if resolucion else "Lecturas",
+            fontsize=9
+        )
+        self.fig.autofmt_xdate()
+        self.canvas.draw_idle()
+
+
+def _nan(valor):
+    return float("nan") if valor is None else valor
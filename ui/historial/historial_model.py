@@ -0,0 +1,143 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from database.timeutils import from_epoch_ms
+
+# Filas por página leída de device_data
+PAGE_SIZE = 500
+
+# Páginas que se mantienen en memoria (LRU): el consumo no depende del rango
+MAX_PAGES = 8
+
+
+class HistorialTableModel(QAbstractTableModel):
+    """
+    Historial crudo de un dispositivo para un QTableView.
+
+    rowCount es el total del rango, pero las filas se piden a la BD por
+    páginas recién cuando la vista las necesita (al hacer scroll), con
+    paginación por clave (ts_ms, id) y un LRU de páginas en memoria.
+    """
+
+    COLUMNS = (
+        ("Fecha", "ts_ms"),
+        ("T. Sonda (°C)", "temp_sonda"),
+        ("T. Amb (°C)", "temp_amb"),
+        ("Humedad (%)", "humedad"),
+        ("Luz (lx)", "luz"),
+        ("Batería", "bateria"),
+        ("Alarma", "alarma"),
+    )
+
+    def __init__(self, device_service, parent=None):
+        super().__init__(parent)
+        self.device_service = device_service
+        self.device_id: Optional[str] = None
+        self.start_ms = 0
+        self.end_ms = 0
+        self._total = 0
+        self._pages: "OrderedDict[int, List[Dict]]" = OrderedDict()
+        # Clave (ts_ms, id) de la última fila de cada página ya vista: la
+        # siguiente se pide con un seek en vez de un OFFSET
+        self._anchors: Dict[int, Tuple[int, int]] = {}
+
+    # ==================== CONSULTA ====================
+    def set_range(
+        self,
+        device_id: Optional[str],
+        start_ms: int,
+        end_ms: int,
+        total: Optional[int] = None,
+        first_page: Optional[List[Dict]] = None
+    ):
+        """
+        Cambia dispositivo/rango. Sin `total` se cuenta aquí (solo índice);
+        total y primera página se pueden pasar ya leídos fuera del hilo de UI.
+        """
+        self.beginResetModel()
+        self.device_id = device_id
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self._pages.clear()
+        self._anchors.clear()
+        if device_id is None:
+            self._total = 0
+        elif total is None:
+            self._total = self.device_service.count_range(device_id, start_ms, end_ms)
+        else:
+            self._total = total
+        if device_id is not None and first_page:
+            self._pages[0] = first_page
+            self._anchors[0] = (first_page[-1]["ts_ms"], first_page[-1]["id"])
+        self.endResetModel()
+
+    def clear(self):
+        self.set_range(None, 0, 0)
+
+    def _page(self, number: int) -> List[Dict]:
+        page = self._pages.get(number)
+        if page is not None:
+            self._pages.move_to_end(number)
+            return page
+
+        after = self._anchors.get(number - 1) if number else None
+        if number and after is None:
+            # Salto a una página lejana: su clave de inicio sale del índice
+            after = self.device_service.get_range_key(
+                self.device_id, self.start_ms, self.end_ms, number * PAGE_SIZE - 1
+            )
+
+        page = self.device_service.get_range_page(
+            self.device_id, self.start_ms, self.end_ms, after, PAGE_SIZE
+        )
+        if page:
+            self._anchors[number] = (page[-1]["ts_ms"], page[-1]["id"])
+
+        self._pages[number] = page
+        if len(self._pages) > MAX_PAGES:
+            self._pages.popitem(last=False)
+        return page
+
+    def record(self, row: int) -> Optional[Dict]:
+        page = self._page(row // PAGE_SIZE)
+        offset = row % PAGE_SIZE
+        return page[offset] if offset < len(page) else None
+
+    # ==================== QAbstractTableModel ====================
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._total
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (
+            Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.TextAlignmentRole
+        ):
+            return None
+
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if index.column() == 0:
+                return None
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+
+        record = self.record(index.row())
+        if record is None:
+            return None
+
+        key = self.COLUMNS[index.column()][1]
+        value = record.get(key)
+        if value is None:
+            return "--"
+        if key == "ts_ms":
+            return from_epoch_ms(value).replace("T", " ")[:19]
+        if isinstance(value, float):
+            return f"{value:.2f}"
+        return str(value)
@@ -1,14 +1,22 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QComboBox, QPushButton,
-    QScrollArea, QFrame, QHBoxLayout
+    QFrame, QHBoxLayout, QListView, QStackedWidget, QTableView, QHeaderView,
+    QFileDialog
 )
-from PyQt6.QtCore import Qt, QDateTime
+from PyQt6.QtCore import Qt, QDateTime, QTimer
 from PyQt6.QtWidgets import QDateTimeEdit
 
 from ui.historial.historial_buffer import HistorialBuffer
+from ui.historial.alertas_model import AlertasModel
+from ui.historial.historial_model import HistorialTableModel
+from ui.historial.historial_grafica import GraficaRango
+from ui.historial import historial_queries
+from core.query_executor import QueryExecutor
 from database.devices_service import get_device_service
-from datetime import datetime, timedelta
+from database.timeutils import to_epoch_ms
 
+# Rangos largos (semana/mes) se grafican desde los rollups con ~este número de puntos
+HISTORIAL_MAX_PUNTOS = 500
 
 class HistorialPage(QWidget):
     def __init__(self):
@@ -16,6 +24,13 @@ class HistorialPage(QWidget):
         
         self.device_service = get_device_service()
 
+        # Consultas a la BD fuera del hilo de UI; un pedido nuevo cancela al anterior
+        self.queries = QueryExecutor(self)
+        self.queries.partial.connect(self._on_query_partial)
+        self.queries.finished.connect(self._on_query_finished)
+        self.queries.failed.connect(self._on_query_failed)
+        self._consulta = None   # (device_id, start_ms, end_ms) del último pedido
+
         root = QVBoxLayout(self)
         root.setContentsMargins(24, 24, 24, 24)
         root.setSpacing(18)
@@ -51,20 +66,85 @@ class HistorialPage(QWidget):
         self.btn_cargar = QPushButton("Cargar Historial")
         self.btn_cargar.clicked.connect(self.cargar_historial)
         controles.addWidget(self.btn_cargar)
+
+        self.btn_exportar = QPushButton("Exportar CSV")
+        self.btn_exportar.clicked.connect(self.exportar_historial)
+        controles.addWidget(self.btn_exportar)
+
+        # Cambiar el rango deja obsoletas las consultas en curso
+        self.start_datetime.dateTimeChanged.connect(self._cancelar_consultas)
+        self.end_datetime.dateTimeChanged.connect(self._cancelar_consultas)
         
         controles.addStretch()
         root.addLayout(controles)
 
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setFrameShape(QFrame.Shape.NoFrame)
+        self.vistas = QStackedWidget()
+
+        # Alertas en tiempo real: lista virtualizada (solo pinta lo visible)
+        alertas = QWidget()
+        alertas_layout = QVBoxLayout(alertas)
+        alertas_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.lbl_sin_alertas = QLabel("No hay advertencias ni alertas registradas.")
+        self.lbl_sin_alertas.setStyleSheet("font-size:14px; color:#666;")
+        alertas_layout.addWidget(self.lbl_sin_alertas)
+
+        self.alertas_model = AlertasModel(parent=self)
+        self.alertas_view = QListView()
+        self.alertas_view.setModel(self.alertas_model)
+        self.alertas_view.setUniformItemSizes(True)
+        self.alertas_view.setSpacing(6)
+        self.alertas_view.setFrameShape(QFrame.Shape.NoFrame)
+        self.alertas_view.setStyleSheet("""
+            QListView { background:white; border-radius:18px; padding:12px; }
+            QListView::item { border-radius:14px; padding:10px; font-size:13px; }
+        """)
+        alertas_layout.addWidget(self.alertas_view, 1)
+        self.vistas.addWidget(alertas)
+
+        # Historial de la BD: tabla virtualizada, páginas bajo demanda
+        historial = QWidget()
+        historial_layout = QVBoxLayout(historial)
+        historial_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.lbl_historial = QLabel()
+        self.lbl_historial.setStyleSheet("font-size:14px; color:#666;")
+        historial_layout.addWidget(self.lbl_historial)
+
+        self.lbl_stats = QLabel()
+        self.lbl_stats.setStyleSheet("font-size:12px; color:#555;")
+        historial_layout.addWidget(self.lbl_stats)
+
+        self.grafica = GraficaRango()
+        historial_layout.addWidget(self.grafica)
+
+        self.historial_model = HistorialTableModel(self.device_service, self)
+        self.historial_view = QTableView()
+        self.historial_view.setModel(self.historial_model)
+        self.historial_view.setAlternatingRowColors(True)
+        self.historial_view.setFrameShape(QFrame.Shape.NoFrame)
+        self.historial_view.setStyleSheet("background:white; border-radius:8px;")
+        # Alto fijo de fila: la vista no mide todas las filas del rango
+        self.historial_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.historial_view.verticalHeader().setDefaultSectionSize(24)
+        self.historial_view.verticalHeader().setVisible(False)
+        self.historial_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        historial_layout.addWidget(self.historial_view, 1)
+        self.vistas.addWidget(historial)
+        root.addWidget(self.vistas, 1)
 
-        self.container = QWidget()
-        self.list_layout = QVBoxLayout(self.container)
-        self.list_layout.setSpacing(20)
+        # Registros nuevos del buffer: se acumulan y se insertan en lote,
+        # solo mientras la página está visible (si no, al mostrarse)
+        self._pendientes = []
+        self._reiniciar = True
+        self._timer_pendientes = QTimer(self)
+        self._timer_pendientes.setSingleShot(True)
+        self._timer_pendientes.setInterval(100)
+        self._timer_pendientes.timeout.connect(self._aplicar_pendientes)
 
-        scroll.setWidget(self.container)
-        root.addWidget(scroll, 1)
+        callback = self._on_registro
+        HistorialBuffer.suscribir(callback)
+        self.destroyed.connect(lambda *_: HistorialBuffer.desuscribir(callback))
 
         self.refrescar()
     
@@ -81,7 +161,20 @@ class HistorialPage(QWidget):
     
     def on_device_changed(self):
         """Se llama cuando cambia el dispositivo seleccionado"""
-        pass
+        self._cancelar_consultas()
+
+    def _cancelar_consultas(self):
+        if self.queries.is_running("historial"):
+            self.lbl_historial.setText("")
+        self.queries.cancel("historial")
+        self.queries.cancel("stats")
+        self.queries.cancel("serie")
+        self._consulta = None
+
+    def _rango_ms(self):
+        start_dt = self.start_datetime.dateTime().toPyDateTime()
+        end_dt = self.end_datetime.dateTime().toPyDateTime()
+        return to_epoch_ms(start_dt.isoformat()), to_epoch_ms(end_dt.isoformat())
     
     def cargar_historial(self):
         """Carga el historial del dispositivo seleccionado en el rango de fechas"""
@@ -89,149 +182,135 @@ class HistorialPage(QWidget):
         
         if not device_id:
             # Cargar datos de buffer en tiempo real
+            self._cancelar_consultas()
             self.refrescar()
             return
         
-        start_dt = self.start_datetime.dateTime().toPyDateTime()
-        end_dt = self.end_datetime.dateTime().toPyDateTime()
-        
-        try:
-            history = self.device_service.get_data_range(
-                device_id,
-                start_dt.isoformat(),
-                end_dt.isoformat()
-            )
-            
-            self._mostrar_historial_datos(device_id, history)
-        except Exception as e:
-            print(f"[ERROR] No se pudieron cargar datos: {e}")
-    
-    def _mostrar_historial_datos(self, device_id: str, records: list):
-        """Muestra los registros históricos en la UI"""
-        # Limpiar
-        while self.list_layout.count():
-            item = self.list_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        
-        if not records:
-            lbl = QLabel(f"No hay datos para {device_id} en el período seleccionado")
-            lbl.setStyleSheet("font-size:14px; color:#666;")
-            self.list_layout.addWidget(lbl)
-            self.list_layout.addStretch()
+        start_ms, end_ms = self._rango_ms()
+        self._consulta = (device_id, start_ms, end_ms)
+
+        self.vistas.setCurrentIndex(1)
+        self.historial_model.clear()
+        self.lbl_historial.setText(f"Cargando historial de {device_id}...")
+        self.lbl_stats.setText("")
+        self.grafica.limpiar()
+
+        args = (self.device_service, device_id, start_ms, end_ms)
+        self.queries.submit("historial", historial_queries.consultar_rango, *args)
+        self.queries.submit("stats", historial_queries.estadisticas_rango, *args)
+        self.queries.submit(
+            "serie", historial_queries.serie_rango, *args, HISTORIAL_MAX_PUNTOS
+        )
+
+    def exportar_historial(self):
+        """Exporta el rango seleccionado a CSV en segundo plano"""
+        device_id = self.device_combo.currentData()
+        if not device_id:
             return
-        
-        # Agrupar por fecha
-        by_date = {}
-        for record in records:
-            ts = record.get("timestamp", "")
-            date = ts[:10] if ts else "Unknown"
-            if date not in by_date:
-                by_date[date] = []
-            by_date[date].append(record)
-        
-        # Mostrar por fecha
-        for date in sorted(by_date.keys(), reverse=True):
-            section = QFrame()
-            section.setStyleSheet("background:white; border-radius:8px;")
-            layout = QVBoxLayout(section)
-            layout.setContentsMargins(12, 12, 12, 12)
-            
-            # Header con fecha
-            header = QLabel(date)
-            header.setStyleSheet("font-weight:600; font-size:14px;")
-            layout.addWidget(header)
-            
-            # Registros de esa fecha
-            for record in by_date[date]:
-                record_text = (
-                    f"⏰ {record.get('timestamp', '')}: "
-                    f"Temp={record.get('temp_amb')}°C, "
-                    f"Hum={record.get('humedad')}%, "
-                    f"Luz={record.get('luz')}, "
-                    f"Bat={record.get('bateria')}%"
-                )
-                lbl = QLabel(record_text)
-                lbl.setStyleSheet("font-size:12px; color:#555;")
-                layout.addWidget(lbl)
-            
-            self.list_layout.addWidget(section)
-        
-        self.list_layout.addStretch()
 
-    def refrescar(self):
-        """Recarga el historial del buffer en tiempo real"""
-        while self.list_layout.count():
-            item = self.list_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-
-        data = HistorialBuffer.obtener_por_sensor()
-
-        if not data:
-            lbl = QLabel("No hay advertencias ni alertas registradas.")
-            lbl.setStyleSheet("font-size:14px; color:#666;")
-            self.list_layout.addWidget(lbl)
-            self.list_layout.addStretch()
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Exportar historial", f"historial_{device_id}.csv", "CSV (*.csv)"
+        )
+        if not path:
             return
 
-        for sensor, registros in data.items():
-            self.list_layout.addWidget(self._build_sensor_section(sensor, registros))
+        start_ms, end_ms = self._rango_ms()
+        self.btn_exportar.setText("Exportando...")
+        self.queries.submit(
+            "export", historial_queries.exportar_csv,
+            self.device_service, device_id, start_ms, end_ms, path
+        )
+
+    # ==========================
+    # RESPUESTAS DE CONSULTAS
+    # ==========================
+    def _on_query_partial(self, kind, request_id, value):
+        if kind == "historial" and self._consulta:
+            self.lbl_historial.setText(
+                f"{self._consulta[0]}: {value['total']} registros, cargando..."
+            )
+        elif kind == "export":
+            self.btn_exportar.setText(f"Exportando... {value}")
 
-        self.list_layout.addStretch()
+    def _on_query_finished(self, kind, request_id, result):
+        if kind == "historial" and self._consulta:
+            device_id, start_ms, end_ms = self._consulta
+            self._mostrar_historial_datos(device_id, start_ms, end_ms, result)
+        elif kind == "stats" and self._consulta:
+            self._mostrar_estadisticas(result)
+        elif kind == "serie" and self._consulta:
+            self.grafica.mostrar(result)
+        elif kind == "export":
+            self.btn_exportar.setText("Exportar CSV")
+            print(f"[HISTORIAL] Exportadas {result['rows']} filas a {result['path']}")
 
-    def _build_sensor_section(self, sensor, registros):
-        section = QFrame()
-        section.setStyleSheet("""
-            background:white;
-            border-radius:18px;
-        """)
+    def _on_query_failed(self, kind, request_id, message):
+        print(f"[ERROR] Consulta '{kind}' falló: {message}")
+        if kind == "export":
+            self.btn_exportar.setText("Exportar CSV")
+        elif kind == "historial":
+            self.lbl_historial.setText("No se pudieron cargar datos")
 
-        layout = QVBoxLayout(section)
-        layout.setContentsMargins(18, 16, 18, 16)
-        layout.setSpacing(12)
-
-        title = QLabel(sensor.upper())
-        title.setStyleSheet("font-size:18px; font-weight:700;")
-        layout.addWidget(title)
-
-        for r in registros:
-            layout.addWidget(
-                self._build_item(
-                    r["fecha"],
-                    r["nivel"],
-                    r["mensaje"]
-                )
-            )
+    def _mostrar_historial_datos(self, device_id: str, start_ms: int, end_ms: int, result: dict):
+        """Muestra el rango en la tabla (las filas se leen al hacer scroll)"""
+        self.vistas.setCurrentIndex(1)
+        self.historial_model.set_range(
+            device_id, start_ms, end_ms,
+            total=result["total"], first_page=result["first_page"]
+        )
+        self.historial_view.scrollToTop()
 
-        return section
+        total = result["total"]
+        if total:
+            self.lbl_historial.setText(f"{device_id}: {total} registros en el período")
+        else:
+            self.lbl_historial.setText(f"No hay datos para {device_id} en el período seleccionado")
 
-    def _build_item(self, fecha, nivel, mensaje):
-        card = QFrame()
-        card.setStyleSheet("""
-            background:#f4f6fa;
-            border-radius:14px;
-        """)
-        card.setMinimumHeight(70)
+    def _mostrar_estadisticas(self, stats: dict):
+        if not stats.get("total"):
+            self.lbl_stats.setText("")
+            return
 
-        layout = QVBoxLayout(card)
-        layout.setContentsMargins(14, 10, 14, 10)
+        def fmt(v):
+            return "--" if v is None else f"{v:.2f}"
 
-        color = "#ff9800" if nivel == "warn" else "#f44336"
-        icon = "🟠" if nivel == "warn" else "🔴"
+        self.lbl_stats.setText(
+            f"Temp: mín {fmt(stats['temp_min'])} · prom {fmt(stats['temp_avg'])} · máx {fmt(stats['temp_max'])} °C"
+            f"    Hum: mín {fmt(stats['hum_min'])} · prom {fmt(stats['hum_avg'])} · máx {fmt(stats['hum_max'])} %"
+        )
 
-        header = QLabel(f"{icon} {fecha}")
-        header.setStyleSheet(f"""
-            font-size:13px;
-            font-weight:600;
-            color:{color};
-        """)
+    # ==========================
+    # ALERTAS EN TIEMPO REAL
+    # ==========================
+    def _on_registro(self, registro):
+        """Suscripción a HistorialBuffer: O(1) por registro, sin tocar widgets"""
+        if registro is None or len(self._pendientes) >= HistorialBuffer.MAXIMO:
+            # Oculta mucho tiempo: más pendientes que el propio buffer no
+            # aportan nada; al mostrarse se recarga desde HistorialBuffer
+            self._pendientes.clear()
+            self._reiniciar = True
+        elif not self._reiniciar:
+            self._pendientes.append(registro)
 
-        body = QLabel(mensaje)
-        body.setStyleSheet("font-size:13px;")
-        body.setWordWrap(True)
+        if self.isVisible() and not self._timer_pendientes.isActive():
+            self._timer_pendientes.start()
 
-        layout.addWidget(header)
-        layout.addWidget(body)
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._aplicar_pendientes()
 
-        return card
+    def _aplicar_pendientes(self):
+        if self._reiniciar:
+            self._reiniciar = False
+            self._pendientes.clear()
+            self.alertas_model.reiniciar(HistorialBuffer.obtener())
+        elif self._pendientes:
+            pendientes, self._pendientes = self._pendientes, []
+            self.alertas_model.agregar(pendientes)
+
+        self.lbl_sin_alertas.setVisible(self.alertas_model.rowCount() == 0)
+
+    def refrescar(self):
+        """Muestra las alertas del buffer en tiempo real (aplica solo lo nuevo)"""
+        self.vistas.setCurrentIndex(0)
+        self._aplicar_pendientes()
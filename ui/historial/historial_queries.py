@@ -0,0 +1,63 @@
+"""
+Consultas del historial para QueryExecutor: corren fuera del hilo de UI,
+revisan el CancelToken entre bloques y entregan avances con emit_partial.
+"""
+
+import csv
+
+from ui.historial.historial_model import HistorialTableModel, PAGE_SIZE
+from database.timeutils import from_epoch_ms
+
+# Filas por bloque de exportación (un chequeo de cancelación por bloque)
+EXPORT_CHUNK = 5000
+
+
+def consultar_rango(token, emit_partial, service, device_id, start_ms, end_ms):
+    """Total del rango y primera página (lo que la tabla necesita para mostrarse)"""
+    total = service.count_range(device_id, start_ms, end_ms)
+    emit_partial({"total": total})
+    token.check()
+    first_page = service.get_range_page(device_id, start_ms, end_ms, None, PAGE_SIZE) if total else []
+    return {"total": total, "first_page": first_page}
+
+
+def serie_rango(token, emit_partial, service, device_id, start_ms, end_ms, max_points):
+    """
+    Serie para la gráfica del rango: get_data_range con max_points lee del
+    rollup (1 min/15 min/1 h) en rangos largos. En rangos cortos vienen filas
+    crudas y se toma una de cada k para no dibujar más de max_points.
+    """
+    serie = service.get_data_range(
+        device_id, from_epoch_ms(start_ms), from_epoch_ms(end_ms), max_points=max_points
+    )
+    token.check()
+    if len(serie) > max_points and "resolution" not in serie[0]:
+        serie = serie[::-(-len(serie) // max_points)]
+    return serie
+
+
+def estadisticas_rango(token, emit_partial, service, device_id, start_ms, end_ms):
+    return service.get_range_stats(device_id, start_ms, end_ms)
+
+
+def exportar_csv(token, emit_partial, service, device_id, start_ms, end_ms, path):
+    """Escribe el rango a CSV por bloques (keyset), informando filas escritas"""
+    columns = [key for _, key in HistorialTableModel.COLUMNS]
+    written = 0
+    after = None
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp"] + columns[1:])
+        while True:
+            token.check()
+            rows = service.get_range_page(device_id, start_ms, end_ms, after, EXPORT_CHUNK)
+            if not rows:
+                break
+            writer.writerows(
+                [from_epoch_ms(r["ts_ms"])] + [r.get(c) for c in columns[1:]]
+                for r in rows
+            )
+            written += len(rows)
+            after = (rows[-1]["ts_ms"], rows[-1]["id"])
+            emit_partial(written)
+    return {"rows": written, "path": path}
@@ -11,6 +11,7 @@ from typing import Optional
 from ui.insumos.insumos_card import InsumoCard
 from ui.insumos.insumos_form import InsumoDialog
 from ui.insumos.stock_dialog import StockDialog  
+from core.search_index import BusquedaDebounced, get_search_index
 
 from database.insumos_db import (
     init_db,
@@ -53,6 +54,9 @@ class InsumosPage(QWidget):
         # Top
         top = QHBoxLayout()
         self.search_input = QLineEdit(placeholderText="Buscar insumo por nombre, lote, registro sanitario...")
+        self.indice = get_search_index("insumos")
+        self.busqueda = BusquedaDebounced(self.indice, self)
+        self.busqueda.resultados.connect(self._aplicar_filtro)
         self.search_input.textChanged.connect(self._on_search_changed)
         top.addWidget(self.search_input)
 
@@ -70,8 +74,12 @@ class InsumosPage(QWidget):
         self._setup_tab("Medicamento")
         self._setup_tab("Dispositivo Médico")
         self._setup_tab("Biológico")
+        self.tabs.currentChanged.connect(lambda _: self.busqueda.buscar())
         root.addWidget(self.tabs)
 
+        # Fila de la tabla de cada insumo, por tipo (para ocultar sin recorrer celdas)
+        self._rows = {tipo: {} for tipo in self.data}
+
         self._counters = {"Medicamento": 1, "Dispositivo Médico": 1, "Biológico": 1}
 
         init_db()
@@ -86,6 +94,11 @@ class InsumosPage(QWidget):
             if insumo["tipo"] in self.data:
                 self.data[insumo["tipo"]].append(insumo)
 
+        self.indice.rebuild(
+            (it["id"], self._campos_busqueda(it))
+            for items in self.data.values() for it in items
+        )
+
         for tipo in self.data:
             self._refresh_tab(tipo)
 
@@ -127,26 +140,32 @@ class InsumosPage(QWidget):
 
 
 
+    # ==================== BÚSQUEDA ====================
+    @staticmethod
+    def _campos_busqueda(it: dict):
+        return [
+            it.get(k) for k in (
+                "id", "nombre", "tipo", "lote", "modelo",
+                "fecha_caducidad", "fecha_fabricacion", "registro_sanitario"
+            )
+        ]
+
     def _on_search_changed(self, text: str):
-        text = text.lower()
+        self.busqueda.set_texto(text)
+
+    def _aplicar_filtro(self, coincidencias):
+        """Muestra solo las tarjetas/filas del tipo actual que están en coincidencias"""
         idx = self.tabs.currentIndex()
         tipo = self.tabs.tabText(idx)
+        page = self.tabs.widget(idx)
 
-        for card in self.cards[tipo].values():
-            d = card.property("data") or {}
-            hay = any(text in str(d.get(k, "")).lower()
-                      for k in ("nombre", "lote", "registro_sanitario", "modelo"))
-            card.setVisible(hay)
+        for insumo_id, card in self.cards[tipo].items():
+            card.setVisible(coincidencias is None or insumo_id in coincidencias)
 
-        page = self.tabs.widget(idx)
-        for row in range(page.table.rowCount()):
-            visible = False
-            for col in range(page.table.columnCount()):
-                item = page.table.item(row, col)
-                if item and text in item.text().lower():
-                    visible = True
-                    break
-            page.table.setRowHidden(row, not visible)
+        for insumo_id, row in self._rows[tipo].items():
+            oculto = coincidencias is not None and insumo_id not in coincidencias
+            if page.table.isRowHidden(row) != oculto:
+                page.table.setRowHidden(row, oculto)
 
   
 
@@ -169,6 +188,7 @@ class InsumosPage(QWidget):
 
         insert(base)
         self.data[tipo].append(base)
+        self.indice.add(uid, self._campos_busqueda(base))
         self._refresh_tab(tipo)
 
     def _edit_by_id(self, tipo: str, insumo_id: str):
@@ -181,6 +201,7 @@ class InsumosPage(QWidget):
             nuevo = dlg.get_data()
             self.data[tipo][idx].update(nuevo)
             update(self.data[tipo][idx])
+            self.indice.update(insumo_id, self._campos_busqueda(self.data[tipo][idx]))
 
             if insumo_id in self.cards[tipo]:
                 self.cards[tipo][insumo_id].update_visual(self.data[tipo][idx])
@@ -200,6 +221,7 @@ class InsumosPage(QWidget):
 
         delete(insumo_id)
         self.data[tipo].pop(idx)
+        self.indice.remove(insumo_id)
 
         if insumo_id in self.cards[tipo]:
             self.cards[tipo][insumo_id].deleteLater()
@@ -237,8 +259,11 @@ class InsumosPage(QWidget):
 
         tbl = page.table
         tbl.setRowCount(len(self.data[tipo]))
+        self._rows[tipo] = {}
 
         for row, it in enumerate(self.data[tipo]):
+            self._rows[tipo][it["id"]] = row
+            tbl.setRowHidden(row, False)
             tbl.setItem(row, 0, QTableWidgetItem(it.get("id", "")))
             tbl.setItem(row, 1, QTableWidgetItem(it.get("nombre", "")))
             tbl.setItem(row, 2, QTableWidgetItem(it.get("tipo", "")))
@@ -254,6 +279,10 @@ class InsumosPage(QWidget):
             btn_del.clicked.connect(partial(self._delete_by_id, tipo, it["id"]))
             tbl.setCellWidget(row, 7, btn_del)
 
+        # Mantener el filtro vigente sobre las tarjetas/filas nuevas
+        if tipo == self.tabs.tabText(self.tabs.currentIndex()) and self.busqueda.texto:
+            self.busqueda.buscar()
+
    
 
     def _open_stock(self, tipo: str, insumo_id: str):
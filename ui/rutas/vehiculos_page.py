@@ -46,6 +46,8 @@ from ui.rutas.ruta_dialog import RutaDialog
 from ui.rutas.asignacion_card import AsignacionCard
 from ui.rutas.asignacion_dialog import AsignacionDialog
 
+from core.search_index import BusquedaDebounced, get_search_index
+
 
 class VehiculosPage(QWidget):
 
@@ -72,20 +74,23 @@ class VehiculosPage(QWidget):
 
         root.addLayout(top)
 
-        
+        # Un debounce para la barra; busca en el índice de la pestaña actual
+        self.busqueda = BusquedaDebounced(get_search_index("vehiculos"), self)
+        self.busqueda.resultados.connect(self._aplicar_filtro)
+
         self.tabs = QTabWidget()
         self.tabs.currentChanged.connect(self._on_tab_changed)
         root.addWidget(self.tabs)
 
-        self._build_tab("Vehículos")
-        self._build_tab("Rutas")
-        self._build_tab("Asignaciones")
+        self._build_tab("Vehículos", "vehiculos")
+        self._build_tab("Rutas", "rutas")
+        self._build_tab("Asignaciones", "asignaciones")
 
         self.refresh()
         self._on_tab_changed(0)
 
     
-    def _build_tab(self, name):
+    def _build_tab(self, name, tipo_indice):
         page = QWidget()
         lay = QVBoxLayout(page)
 
@@ -100,6 +105,7 @@ class VehiculosPage(QWidget):
 
         page.grid = grid
         page.cards = []
+        page.indice = get_search_index(tipo_indice)
 
         self.tabs.addTab(page, name)
 
@@ -109,6 +115,10 @@ class VehiculosPage(QWidget):
         self._load_rutas()
         self._load_asignaciones()
 
+        # Mantener el filtro vigente sobre las tarjetas recargadas
+        if self.busqueda.texto:
+            self.busqueda.buscar()
+
     
     def _load_vehiculos(self):
         self._clear_tab(0)
@@ -152,27 +162,31 @@ class VehiculosPage(QWidget):
             if w:
                 w.deleteLater()
         page.cards.clear()
+        page.indice.clear()
 
     def _add_card(self, idx, card, i):
         page = self.tabs.widget(idx)
         page.cards.append(card)
+        page.indice.add(card.data["id"], card.data.values())
         r, c = divmod(i, 3)  
         page.grid.addWidget(card, r, c)
 
    
     def _apply_filter(self, text):
+        self.busqueda.set_texto(text)
+
+    def _aplicar_filtro(self, coincidencias):
         page = self.tabs.currentWidget()
-        text = text.lower()
 
         for card in page.cards:
-            card.setVisible(
-                any(text in str(v).lower() for v in card.data.values())
-            )
+            card.setVisible(coincidencias is None or card.data["id"] in coincidencias)
 
     
     def _on_tab_changed(self, idx):
         name = self.tabs.tabText(idx)
+        self.busqueda.index = self.tabs.widget(idx).indice
         self.search.clear()
+        self._aplicar_filtro(None)
 
         if name == "Vehículos":
             self.search.setPlaceholderText("Buscar vehículos")
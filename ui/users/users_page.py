@@ -10,6 +10,7 @@ from datetime import datetime
 
 from ui.users.users_card import UserCard
 from ui.users.users_form import UserDialog
+from core.search_index import BusquedaDebounced, get_search_index
 
 from database.users_db import (
     init_db, fetch_all_users,
@@ -19,6 +20,12 @@ from database.users_db import (
 
 API_URL = "http://192.168.1.68:8000"
 
+# Campos buscables (no se indexa la contraseña)
+CAMPOS_BUSQUEDA = (
+    "id", "nombre", "apellido", "usuario", "email", "telefono",
+    "rol", "rfc", "licencia_num", "estado_documentos"
+)
+
 
 class UsersPage(QWidget):
 
@@ -32,6 +39,11 @@ class UsersPage(QWidget):
         self.user_cards = {}
         self._next_id = get_next_user_id()
 
+        self.indice = get_search_index("usuarios")
+        self.indice.rebuild((u["id"], self._campos_busqueda(u)) for u in self.users)
+        self.busqueda = BusquedaDebounced(self.indice, self)
+        self.busqueda.resultados.connect(self._aplicar_filtro)
+
         layout = QVBoxLayout(self)
 
         if self.current_role.lower() != "administrador":
@@ -110,6 +122,7 @@ class UsersPage(QWidget):
             try:
                 insert_user(user)
                 self.users.append(user)
+                self.indice.add(user["id"], self._campos_busqueda(user))
                 self.actualizar_vistas()
 
             except ValueError as e:
@@ -127,6 +140,7 @@ class UsersPage(QWidget):
                     try:
                         self.users[i].update(updated)
                         update_user(self.users[i])
+                        self.indice.update(uid, self._campos_busqueda(self.users[i]))
                         self.actualizar_vistas()
 
                     except ValueError as e:
@@ -141,6 +155,7 @@ class UsersPage(QWidget):
 
         delete_user(uid)
         self.users = [u for u in self.users if u["id"] != uid]
+        self.indice.remove(uid)
         self.actualizar_vistas()
 
 #actualizar vitas
@@ -161,12 +176,20 @@ class UsersPage(QWidget):
             self.cards_layout.addWidget(card, i // 3, i % 3)
             self.user_cards[u["id"]] = card
 
+        # Mantener el filtro vigente sobre las tarjetas nuevas
+        if self.busqueda.texto:
+            self.busqueda.buscar()
+
+    @staticmethod
+    def _campos_busqueda(u: dict):
+        return [u.get(k) for k in CAMPOS_BUSQUEDA]
+
     def filter_users(self, text):
-        text = text.lower()
-        for card in self.user_cards.values():
-            data = card.property("data") or {}
-            full = " ".join(str(v) for v in data.values()).lower()
-            card.setVisible(text in full)
+        self.busqueda.set_texto(text)
+
+    def _aplicar_filtro(self, coincidencias):
+        for uid, card in self.user_cards.items():
+            card.setVisible(coincidencias is None or uid in coincidencias)
 
     
 
@@ -1,24 +1,56 @@
 # ui/widgets/grafica.py
 
-from collections import deque
 import numpy as np
 
 from PyQt6.QtWidgets import QFrame, QVBoxLayout
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
-from ui.IA.regresion import regresion_lineal
+from ui.IA.regresion import RegresionIncremental
+
+# Tope de redibujos por segundo, sin importar la tasa de datos
+MAX_FPS = 20
+
+# Escala Y: rango mínimo (en unidades del eje) y cuadros seguidos con los
+# datos ocupando poco del rango antes de achicarlo. Crecer es inmediato.
+MIN_SPAN = 1.0
+SHRINK_FRAMES = 40
 
 
 class RealtimeChart(QFrame):
-    def __init__(self, titulo: str, unidad: str, max_points=30):
+    """
+    Gráfica en tiempo real con blitting.
+
+    Ejes, título, leyenda y cuadrícula se dibujan una vez y quedan en un
+    fondo cacheado; en cada cuadro solo se actualizan (set_data) y se
+    repintan los artistas animados. Los update_value() que llegan entre
+    cuadros se agrupan en un solo redibujo.
+    """
+
+    def __init__(self, titulo: str, unidad: str, max_points=30, max_fps: int = MAX_FPS,
+                 min_span: float = MIN_SPAN):
         super().__init__()
 
         self.titulo = titulo
         self.unidad = unidad
-        self.data = deque(maxlen=max_points)
+        self.max_points = max_points
+        self.min_span = min_span
+        self._frames_chicos = 0
+
+        # La ventana de la regresión es también la serie que se dibuja
+        self.regresion = RegresionIncremental(max_points)
+        self.data = self.regresion.valores
+
+        self._background = None
+        self._x = np.arange(max_points)
+
+        # Un solo redibujo por cuadro aunque lleguen muchas muestras
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setSingleShot(True)
+        self._frame_timer.setInterval(int(1000 / max_fps))
+        self._frame_timer.timeout.connect(self._render)
 
         self._build()
 
@@ -36,6 +68,35 @@ class RealtimeChart(QFrame):
         self.ax.set_xlabel("Tiempo (muestras)")
         self.ax.set_ylabel(self.unidad)
         self.ax.grid(True)
+        self.ax.set_xlim(-0.5, self.max_points - 0.5)
+        self.ax.set_ylim(0, 1)
+
+        # Artistas creados una sola vez; animated=True los deja fuera del fondo
+        (self.line_data,) = self.ax.plot([], [], "o", label="Datos", animated=True)
+        (self.line_fit,) = self.ax.plot([], [], "-", label="Regresión lineal", animated=True)
+        self.text = self.ax.text(
+            0.02,
+            0.98,
+            "",
+            transform=self.ax.transAxes,
+            ha="left",
+            va="top",
+            fontsize=9,
+            bbox=dict(
+                facecolor="white",
+                alpha=0.85,
+                edgecolor="gray"
+            ),
+            animated=True
+        )
+        self.text.set_visible(False)
+        self._artists = (self.line_data, self.line_fit, self.text)
+
+        self.ax.legend(loc="lower right")
+
+        # Cada redibujo completo (primer pintado, resize, cambio de escala)
+        # renueva el fondo cacheado
+        self.canvas.mpl_connect("draw_event", self._on_draw)
 
         layout.addWidget(self.canvas)
 
@@ -43,62 +104,82 @@ class RealtimeChart(QFrame):
     # ACTUALIZAR CON DATOS REALES
     # ==========================
     def update_value(self, value: float):
-        self.data.append(value)
-
-        y = np.array(self.data)
-        x = np.arange(len(y))
+        if value is None:
+            return
+        self.regresion.agregar(value)
+        if not self._frame_timer.isActive():
+            self._frame_timer.start()
 
-        self.ax.clear()
-        self.ax.grid(True)
-        self.ax.set_title(self.titulo)
-        self.ax.set_xlabel("Tiempo (muestras)")
-        self.ax.set_ylabel(self.unidad)
+    def _render(self):
+        n = len(self.data)
+        if not n:
+            return
 
-        # ==========================
-        # DATOS REALES
-        # ==========================
-        self.ax.plot(
-            x,
-            y,
-            "o",
-            label="Datos"
-        )
+        x = self._x[:n]
+        y = np.fromiter(self.data, dtype=float, count=n)
+        self.line_data.set_data(x, y)
 
         # ==========================
         # REGRESIÓN LINEAL
         # ==========================
-        if len(y) >= 3:
-            pendiente, r2 = regresion_lineal(y.tolist())
-            y_fit = pendiente * x + y.mean()
-
-            self.ax.plot(
-                x,
-                y_fit,
-                "-",
-                label="Regresión lineal"
-            )
-
-            
-            texto = (
+        visibles = [y]
+        if n >= 3:
+            m, b, _ = self.regresion.ajuste()
+            pendiente, r2 = self.regresion.resultado()
+            y_fit = m * x + b
+            self.line_fit.set_data(x, y_fit)
+            self.text.set_text(
                 f"Pendiente = {pendiente:.4f}\n"
                 f"R² = {r2:.4f}"
             )
-
-            self.ax.text(
-                0.02,
-                0.98,
-                texto,
-                transform=self.ax.transAxes,
-                ha="left",
-                va="top",
-                fontsize=9,
-                bbox=dict(
-                    facecolor="white",
-                    alpha=0.85,
-                    edgecolor="gray"
-                )
-            )
-
-        self.ax.legend(loc="lower right")
-
-        self.canvas.draw_idle()
+            self.text.set_visible(True)
+            visibles.append(y_fit)
+        else:
+            self.line_fit.set_data([], [])
+            self.text.set_visible(False)
+
+        if self._rescale(min(v.min() for v in visibles), max(v.max() for v in visibles)):
+            # Cambió la escala: redibujo completo (draw_event recaptura el fondo)
+            self.canvas.draw()
+        elif self._background is None:
+            self.canvas.draw()
+        else:
+            self._blit()
+
+    def _rescale(self, lo: float, hi: float) -> bool:
+        """
+        Ajusta el eje Y: crece en cuanto los datos salen del rango y se achica
+        solo si ocupan muy poco de él durante SHRINK_FRAMES cuadros seguidos.
+        El rango nunca baja de min_span, así el ruido de una señal plana no
+        fuerza redibujos completos.
+        """
+        cur_lo, cur_hi = self.ax.get_ylim()
+        span = max(hi - lo, self.min_span)
+
+        # Al crecer se deja margen extra para que una señal que deriva no
+        # obligue a reescalar en cada cuadro
+        mitad = span
+        if lo >= cur_lo and hi <= cur_hi:
+            if span >= 0.25 * (cur_hi - cur_lo):
+                self._frames_chicos = 0
+                return False
+            self._frames_chicos += 1
+            if self._frames_chicos < SHRINK_FRAMES:
+                return False
+            mitad = span * 0.65
+
+        self._frames_chicos = 0
+        centro = (lo + hi) / 2
+        self.ax.set_ylim(centro - mitad, centro + mitad)
+        return True
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self._artists:
+            self.ax.draw_artist(artist)
+
+    def _blit(self):
+        self.canvas.restore_region(self._background)
+        for artist in self._artists:
+            self.ax.draw_artist(artist)
+        self.canvas.blit(self.fig.bbox)